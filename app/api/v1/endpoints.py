@@ -1,126 +1,542 @@
 # app/api/v1/endpoints.py
-import math
+import asyncio
+import csv
+import hmac
+import io
+import json
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
 import numpy as np
-from fastapi import APIRouter, Request, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Header, Request, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import insert, select, tuple_
 from sqlalchemy.orm import Session
 
+from app.core.admission import ControleAdmission
 from app.core.config import settings
-from app.core.rate_limit import limiter
-from app.models.schemas import EntreePrediction, SortiePrediction
+from app.core.json_rapide import reponse_json, valider_corps
+from app.core.contexte import etape
+from app.core.pagination import decoder_curseur, encoder_curseur
+from app.core.profilage import profileur
+from app.models.schemas import (
+    CandidatDepart,
+    EntreeDepartOptimal,
+    EntreeMatrice,
+    EntreePrediction,
+    EntreeRetour,
+    SortieDepartOptimal,
+    SortieMatrice,
+    SortiePrediction,
+)
+from app.services.batching import OrdonnanceurLots
+from app.services.cache import CachePredictions
+from app.services.entrainement import GestionnaireEntrainement
+from app.services.geodesie import haversine_km, haversine_km_np, matrice_distances_km
+from app.services.persistance import TamponEcriture, TamponPlein
+from app.services.recommandations import (  # pylint: disable=unused-import
+    masques_np,
+    recommandations,  # référence, réexportée pour les appelants existants
+    recommandations_lot,
+    recommandations_table,
+)
+from app.services.apprentissage import ApprentissageEnLigne
+from app.services.artefact import charger_ou_entrainer
 from app.services.model import ModeleTrafic
-from app.database import get_db, Prediction
+from app.database import get_db, Prediction, Retour
 
 router = APIRouter(prefix=settings.API_V1_STR, tags=["Prédiction de trafic"])
 
-MODELE = ModeleTrafic(seed=settings.MODEL_SEED)
-
-
-def haversine_km(lat1, lon1, lat2, lon2):
-    R = 6371.0088
-    p1, p2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dl = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
-    return 2 * R * math.asin(math.sqrt(a))
-
-
-def recommandations(e: EntreePrediction, proba: float, y: int):
-    rec = []
-    if y == 1 or proba >= 0.6:
-        rec.append("Réduire la vitesse et augmenter la distance de sécurité.")
-        rec.append("Privilégier un itinéraire alternatif si possible.")
-        if e.incidents == 1:
-            rec.append("Éviter la zone d’incident signalée (contournement recommandé).")
-        if e.meteo == 1:
-            rec.append("Pluie : allonger les distances de freinage.")
-        if e.meteo == 2:
-            rec.append("Neige : conduite prudente, éviter les manœuvres brusques.")
-    else:
-        rec.append("Circulation fluide : maintenir une conduite défensive.")
-    if e.heure in [7, 8, 9, 16, 17, 18]:
-        rec.append("Heure de pointe : attention aux ralentissements soudains.")
-    if e.distance_km and e.distance_km > 10:
-        rec.append("Trajet long : planifier une pause si nécessaire.")
-    return rec
-
-
-@router.get("/sante")
-async def sante(request: Request):
-    limiter.check(request)
-    return {"ok": True, "nom": settings.APP_NAME}
+MODELE = charger_ou_entrainer(settings.MODEL_ARTIFACT_PATH, seed=settings.MODEL_SEED)
+ADMISSION = ControleAdmission(
+    max_concurrence=settings.INFERENCE_MAX_CONCURRENCY,
+    profondeur_file=settings.INFERENCE_QUEUE_DEPTH,
+    retry_after_s=settings.INFERENCE_RETRY_AFTER_S,
+)
+ORDONNANCEUR = OrdonnanceurLots(
+    MODELE,
+    taille_max=settings.BATCH_MAX_SIZE,
+    attente_max_ms=settings.BATCH_MAX_WAIT_MS,
+    executeur=ADMISSION.executeur,
+)
+ENTRAINEMENTS = GestionnaireEntrainement(MODELE, max_workers=settings.RETRAIN_WORKERS)
+APPRENTISSAGE = ApprentissageEnLigne(
+    MODELE,
+    intervalle_s=settings.FEEDBACK_INTERVAL_S,
+    taille_min=settings.FEEDBACK_MIN_BATCH,
+    taux=settings.FEEDBACK_LEARNING_RATE,
+    capacite=settings.FEEDBACK_BUFFER_MAX,
+)
+CACHE = CachePredictions(
+    taille_max=settings.CACHE_MAX_ENTRIES,
+    ttl_s=settings.CACHE_TTL_S,
+    decimales=settings.CACHE_ROUNDING,
+)
+TAMPON = TamponEcriture(
+    taille_lot=settings.WRITE_BEHIND_BATCH_SIZE,
+    intervalle_ms=settings.WRITE_BEHIND_FLUSH_MS,
+    capacite=settings.WRITE_BEHIND_QUEUE_MAX,
+    attente_max_s=settings.WRITE_BEHIND_PUT_TIMEOUT_S,
+    tentatives=settings.WRITE_BEHIND_RETRIES,
+    delai_reessai_ms=settings.WRITE_BEHIND_RETRY_BACKOFF_MS,
+)
 
 
-@router.post("/predire", response_model=SortiePrediction)
-async def predire(request: Request, entree: EntreePrediction, db: Session = Depends(get_db)):
-    limiter.check(request)
+def distance_trajet(e) -> float:
     # Calcul distance si non fournie mais lat/lon présents
-    dist = entree.distance_km
-    if dist is None and all(
-        v is not None for v in [entree.lat_a, entree.lon_a, entree.lat_b, entree.lon_b]
-    ):
+    dist = e.distance_km
+    if dist is None and all(v is not None for v in [e.lat_a, e.lon_a, e.lat_b, e.lon_b]):
         try:
-            dist = haversine_km(entree.lat_a, entree.lon_a, entree.lat_b, entree.lon_b)
+            dist = haversine_km(e.lat_a, e.lon_a, e.lat_b, e.lon_b)
         except Exception:  # pylint: disable=broad-exception-caught
             dist = 0.0
     if dist is None:
         dist = 0.0
+    return dist
+
+
+def _ligne_prediction(
+    e: EntreePrediction, dist: float, vitesse_prevue: float, temps_trajet: float, ts: datetime
+) -> dict:
+    """Colonnes d'une ligne `Prediction` (insertion ORM, groupée ou différée)."""
+    return {
+        "lat_depart": e.lat_a,
+        "lon_depart": e.lon_a,
+        "lat_arrivee": e.lat_b,
+        "lon_arrivee": e.lon_b,
+        "distance_km": dist,
+        "heure": e.heure,
+        "jour_semaine": e.jour_semaine,
+        "meteo": e.meteo,
+        "incidents": e.incidents,
+        "vitesse_moyenne": e.vitesse_moyenne,
+        "debit_vehicules": e.debit_vehicules,
+        "vitesse_prevue": vitesse_prevue,
+        "temps_trajet_prevu": temps_trajet,
+        "timestamp": ts,
+    }
+
+
+@router.get("/sante")
+async def sante():
+    return {"ok": True, "nom": settings.APP_NAME}
+
+
+def _inferer_et_finaliser(
+    entree: EntreePrediction, dist: float, ligne: List[float], db: Optional[Session]
+) -> Tuple[Tuple[int, float, int], Tuple[SortiePrediction, dict]]:
+    """Inférence puis finalisation (commit compris) en un seul passage sur l'exécuteur."""
+    with etape("inference"):
+        y, proba, version = MODELE.predire_versionne(np.array([ligne], dtype=float))
+    y0, p = int(y[0]), float(proba[0])
+    return (y0, p, version), _finaliser(entree, dist, y0, p, version, db)
+
+
+def _caracteristiques(entree: EntreePrediction) -> Tuple[float, List[float]]:
+    with etape("distance"):
+        dist = distance_trajet(entree)
+    ligne = [
+        float(entree.heure),
+        float(entree.jour_semaine),
+        float(entree.meteo),
+        float(entree.incidents),
+        float(entree.vitesse_moyenne),
+        float(entree.debit_vehicules),
+        float(dist),
+    ]
+    return dist, ligne
 
-    X = np.array(
-        [
-            [
-                float(entree.heure),
-                float(entree.jour_semaine),
-                float(entree.meteo),
-                float(entree.incidents),
-                float(entree.vitesse_moyenne),
-                float(entree.debit_vehicules),
-                float(dist),
-            ]
-        ],
-        dtype=float,
-    )
 
-    y, proba = MODELE.predire(X)
-    p = float(proba[0])
-    niveau = "élevé" if y[0] == 1 else "faible"
-    recos = recommandations(entree, p, y[0])
+def _finaliser(
+    entree: EntreePrediction, dist: float, y0: int, p: float, version: int, db: Optional[Session]
+) -> Tuple[SortiePrediction, dict]:
+    """Recommandations et ligne à persister ; commit synchrone si `db` est fourni."""
+    niveau = "élevé" if y0 == 1 else "faible"
+    with etape("recommandations"):
+        recos = recommandations_table(entree, p, y0)
 
     # Sauvegarder les données de prédiction dans la base de données
-    vitesse_prevue = entree.vitesse_moyenne * (1.0 - 0.2 * float(y[0]))  # Estimation simple
+    vitesse_prevue = entree.vitesse_moyenne * (1.0 - 0.2 * float(y0))  # Estimation simple
     temps_trajet = dist / vitesse_prevue * 60 if vitesse_prevue > 0 else 0  # minutes
 
-    nouvelle_prediction = Prediction(
-        lat_depart=entree.lat_a,
-        lon_depart=entree.lon_a,
-        lat_arrivee=entree.lat_b,
-        lon_arrivee=entree.lon_b,
-        distance_km=dist,
-        heure=entree.heure,
-        jour_semaine=entree.jour_semaine,
-        meteo=entree.meteo,
-        incidents=entree.incidents,
-        vitesse_moyenne=entree.vitesse_moyenne,
-        debit_vehicules=entree.debit_vehicules,
-        vitesse_prevue=vitesse_prevue,
-        temps_trajet_prevu=temps_trajet,
-        timestamp=datetime.now(),
+    ligne_db = _ligne_prediction(entree, dist, vitesse_prevue, temps_trajet, datetime.now())
+    if db is not None:
+        with etape("persistance"):
+            db.add(Prediction(**ligne_db))
+            db.commit()
+
+    sortie = SortiePrediction(
+        risque=niveau, proba=round(p, 3), recommandations=recos, version_modele=version
+    )
+    return sortie, ligne_db
+
+
+ADAPTATEUR_ENTREE = TypeAdapter(EntreePrediction)
+ADAPTATEUR_SORTIE = TypeAdapter(SortiePrediction)
+ADAPTATEUR_LOT_ENTREE = TypeAdapter(List[EntreePrediction])
+ADAPTATEUR_LOT_SORTIE = TypeAdapter(List[SortiePrediction])
+
+
+@router.post("/predire", response_model=SortiePrediction)
+async def predire(request: Request, db: Session = Depends(get_db)):
+    # Corps validé depuis les octets (chemin rapide de pydantic-core), même schéma strict
+    with etape("validation"):
+        entree: EntreePrediction = await valider_corps(request, ADAPTATEUR_ENTREE)
+
+    # Tout le travail bloquant (inférence, commit) passe par l'exécuteur borné, en
+    # un seul passage quand c'est possible ; au-delà de sa capacité la requête
+    # échoue tout de suite en 503 + Retry-After. Le reste (caractéristiques,
+    # recommandations) ne coûte que quelques µs et reste sur la boucle.
+    with ADMISSION.admettre():
+        dist, ligne = _caracteristiques(entree)
+        differe = settings.WRITE_BEHIND_ENABLED
+        db_sync = None if differe else db
+        finalise = None  # (sortie, ligne_db) si la finalisation a suivi l'inférence
+
+        async def direct(caracteristiques: List[float]) -> Tuple[int, float, int]:
+            nonlocal finalise
+            resultat, finalise = await ADMISSION.executer(
+                _inferer_et_finaliser, entree, dist, caracteristiques, db_sync
+            )
+            return resultat
+
+        async def scorer(caracteristiques: List[float]) -> Tuple[int, float, int]:
+            if not settings.BATCH_ENABLED:
+                return await direct(caracteristiques)
+            with ORDONNANCEUR.reserver() as isolee:
+                if isolee:  # aucun lot ne peut se former : pas d'attente
+                    return await direct(caracteristiques)
+                with etape("inference"):
+                    return await ORDONNANCEUR.soumettre(caracteristiques)
+
+        if settings.CACHE_ENABLED:
+            cle = CACHE.cle(MODELE.version, ligne)
+            # On score la ligne arrondie : la valeur en cache ne dépend que de sa clé
+            y0, p, version = await CACHE.obtenir(cle, lambda: scorer(list(cle[1:])))
+        else:
+            y0, p, version = await scorer(ligne)
+
+        if finalise is None:
+            # Succès du cache ou lot partagé : reste la finalisation, sur l'exécuteur
+            # seulement s'il y a un commit synchrone
+            if db_sync is None:
+                finalise = _finaliser(entree, dist, y0, p, version, None)
+            else:
+                finalise = await ADMISSION.executer(
+                    _finaliser, entree, dist, y0, p, version, db_sync
+                )
+        sortie, ligne_db = finalise
+        if differe:
+            try:
+                with etape("persistance"):
+                    await TAMPON.ajouter(ligne_db)
+            except TamponPlein as exc:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Base de données saturée. Réessayez plus tard.",
+                    headers={"Retry-After": "1"},
+                ) from exc
+
+    return reponse_json(sortie, ADAPTATEUR_SORTIE)
+
+
+def _optionnels(entrees: List[EntreePrediction], champ: str) -> np.ndarray:
+    """Colonne float d'un champ optionnel, NaN quand la valeur est absente."""
+    return np.array(
+        [np.nan if getattr(e, champ) is None else getattr(e, champ) for e in entrees], dtype=float
     )
 
-    db.add(nouvelle_prediction)
+
+def _predire_lot(entrees: List[EntreePrediction], db: Session) -> List[SortiePrediction]:
+    # Distances : valeur fournie, sinon haversine vectorisée, sinon 0
+    fournie = _optionnels(entrees, "distance_km")
+    calculee = haversine_km_np(
+        _optionnels(entrees, "lat_a"),
+        _optionnels(entrees, "lon_a"),
+        _optionnels(entrees, "lat_b"),
+        _optionnels(entrees, "lon_b"),
+    )
+    dist = np.where(np.isnan(fournie), calculee, fournie)
+    dist = np.nan_to_num(dist, nan=0.0, posinf=0.0, neginf=0.0)
+
+    X = np.column_stack(
+        [
+            np.array(
+                [
+                    (
+                        e.heure,
+                        e.jour_semaine,
+                        e.meteo,
+                        e.incidents,
+                        e.vitesse_moyenne,
+                        e.debit_vehicules,
+                    )
+                    for e in entrees
+                ],
+                dtype=float,
+            ),
+            dist,
+        ]
+    )
+    y, proba, version = MODELE.predire_versionne(X)
+
+    vitesse_prevue = X[:, 4] * (1.0 - 0.2 * y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        temps_trajet = np.where(vitesse_prevue > 0, dist / vitesse_prevue * 60, 0.0)
+
+    recos = recommandations_lot(masques_np(y, proba, X[:, 3], X[:, 2], X[:, 0], fournie))
+
+    maintenant = datetime.now()
+    lignes = [
+        _ligne_prediction(
+            e, float(dist[i]), float(vitesse_prevue[i]), float(temps_trajet[i]), maintenant
+        )
+        for i, e in enumerate(entrees)
+    ]
+    db.execute(insert(Prediction), lignes)
     db.commit()
 
-    return SortiePrediction(risque=niveau, proba=round(p, 3), recommandations=recos)
+    return [
+        SortiePrediction(
+            risque="élevé" if y[i] == 1 else "faible",
+            proba=round(float(proba[i]), 3),
+            recommandations=recos[i],
+            version_modele=version,
+        )
+        for i, e in enumerate(entrees)
+    ]
+
+
+@router.post("/predire/lot", response_model=List[SortiePrediction])
+async def predire_lot(request: Request, db: Session = Depends(get_db)):
+    """
+    Score un lot de trajets en un seul appel au modèle et les enregistre
+    avec une seule insertion groupée.
+    """
+    entrees: List[EntreePrediction] = await valider_corps(request, ADAPTATEUR_LOT_ENTREE)
+    if not entrees:
+        return []
+    if len(entrees) > settings.PREDICTION_LOT_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lot trop volumineux (maximum {settings.PREDICTION_LOT_MAX} trajets).",
+        )
+
+    with ADMISSION.admettre():
+        sorties = await ADMISSION.executer(_predire_lot, entrees, db)
+    return reponse_json(sorties, ADAPTATEUR_LOT_SORTIE)
+
+
+def _depart_optimal(entree: EntreeDepartOptimal) -> SortieDepartOptimal:
+    dist = float(distance_trajet(entree))
+    if entree.heure_debut <= entree.heure_fin:
+        heures = np.arange(entree.heure_debut, entree.heure_fin + 1)
+    else:
+        heures = np.r_[np.arange(entree.heure_debut, 24), np.arange(0, entree.heure_fin + 1)]
+    H, J = np.meshgrid(heures, np.array(entree.jours), indexing="ij")
+    n = H.size
+
+    X = np.empty((n, 7), dtype=float)
+    X[:, 0], X[:, 1] = H.ravel(), J.ravel()
+    X[:, 2:] = (
+        entree.meteo,
+        entree.incidents,
+        entree.vitesse_moyenne,
+        entree.debit_vehicules,
+        dist,
+    )
+    y, proba, version = MODELE.predire_versionne(X)
+
+    vitesse_prevue = entree.vitesse_moyenne * (1.0 - 0.2 * y)
+    temps_trajet = dist / vitesse_prevue * 60
+    ordre = np.lexsort((temps_trajet, proba))[: entree.nombre]
 
+    return SortieDepartOptimal(
+        distance_km=dist,
+        version_modele=version,
+        departs=[
+            CandidatDepart(
+                heure=int(X[i, 0]),
+                jour_semaine=int(X[i, 1]),
+                risque="élevé" if y[i] == 1 else "faible",
+                proba=round(float(proba[i]), 3),
+                temps_trajet_prevu=round(float(temps_trajet[i]), 2),
+            )
+            for i in ordre
+        ],
+    )
+
+
+@router.post("/depart-optimal", response_model=SortieDepartOptimal)
+async def depart_optimal(entree: EntreeDepartOptimal):
+    """
+    Classe toutes les heures de départ candidates (heures × jours de la fenêtre)
+    par risque croissant, en un seul appel vectorisé au modèle.
+    """
+    with ADMISSION.admettre():
+        return await ADMISSION.executer(_depart_optimal, entree)
+
+
+ADAPTATEUR_MATRICE = TypeAdapter(EntreeMatrice)
+
+
+def _matrice_trajets(entree: EntreeMatrice) -> dict:
+    dtype = np.float32 if entree.simple_precision else np.float64
+    origines = np.array([(p.lat, p.lon) for p in entree.origines])
+    destinations = np.array([(p.lat, p.lon) for p in entree.destinations])
+    dist = matrice_distances_km(origines, destinations, dtype=dtype)
+
+    # Une seule passe du modèle sur les N × M paires : seules les distances varient
+    X = np.empty((dist.size, 7))
+    X[:, :6] = (
+        entree.heure,
+        entree.jour_semaine,
+        entree.meteo,
+        entree.incidents,
+        entree.vitesse_moyenne,
+        entree.debit_vehicules,
+    )
+    X[:, 6] = dist.ravel()
+    y, proba, version = MODELE.predire_versionne(X)
+
+    vitesse_prevue = entree.vitesse_moyenne * (1.0 - 0.2 * y)
+    temps_trajet = X[:, 6] / vitesse_prevue * 60  # minutes (vitesse_moyenne > 0)
+    return {
+        "version_modele": version,
+        "distance_km": np.round(dist, 3),
+        "proba": np.round(proba, 3).reshape(dist.shape),
+        "temps_trajet_prevu": np.round(temps_trajet, 3).reshape(dist.shape).astype(dtype),
+    }
+
+
+@router.post("/matrice-trajets", response_model=SortieMatrice)
+async def matrice_trajets(request: Request):
+    """
+    Grille origines × destinations (dépôts × clients) : distance, probabilité de
+    congestion et temps de trajet prévu de chaque paire, en un seul appel au modèle.
+    """
+    entree: EntreeMatrice = await valider_corps(request, ADAPTATEUR_MATRICE)
+    paires = len(entree.origines) * len(entree.destinations)
+    if paires > settings.MATRICE_MAX_PAIRES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Matrice trop grande (maximum {settings.MATRICE_MAX_PAIRES} paires).",
+        )
+    with ADMISSION.admettre():
+        return reponse_json(await ADMISSION.executer(_matrice_trajets, entree))
 
-@router.post("/reentrainer")
-async def reentrainer(request: Request, seed: int | None = None):
-    limiter.check(request)
-    MODELE.reentrainer(seed or settings.MODEL_SEED)
-    return {"ok": True}
+
+@router.get("/metriques/lots")
+async def metriques_lots():
+    """Histogrammes de taille des lots et d'attente en file du micro-batching."""
+    return ORDONNANCEUR.stats()
+
+
+@router.get("/metriques/cache")
+async def metriques_cache():
+    """Compteurs du cache de prédictions (succès, échecs, partages, évictions)."""
+    return {"actif": settings.CACHE_ENABLED, **CACHE.stats()}
+
+
+@router.get("/metriques/apprentissage")
+async def metriques_apprentissage():
+    """Compteurs des mises à jour incrémentales issues des retours terrain."""
+    return APPRENTISSAGE.stats()
+
+
+@router.get("/metriques/admission")
+async def metriques_admission():
+    """Occupation de l'exécuteur d'inférence et nombre de requêtes rejetées (503)."""
+    return ADMISSION.stats()
+
+
+@router.get("/metriques/persistance")
+async def metriques_persistance():
+    """Compteurs de l'écriture différée des prédictions."""
+    return {"actif": settings.WRITE_BEHIND_ENABLED, **TAMPON.stats()}
+
+
+def verifier_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Surface d'administration : absente sans PROFILING_ENABLED, refusée tant
+    qu'ADMIN_TOKEN n'est pas défini, puis réservée au porteur du jeton.
+    """
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="ADMIN_TOKEN non configuré")
+    if not hmac.compare_digest((x_admin_token or "").encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Jeton d'administration invalide")
+
+
+@router.post("/admin/profil", dependencies=[Depends(verifier_admin)])
+async def profil_cpu(
+    duree_s: float = Query(10.0, gt=0),
+    intervalle_ms: Optional[float] = Query(None, ge=0.5, le=1000),
+):
+    """Profil d'échantillonnage du serveur pendant `duree_s` secondes (fichier .folded)."""
+    duree_s = min(duree_s, settings.PROFILING_MAX_DURATION_S)
+    resultat = await asyncio.to_thread(profileur.profil_cpu, duree_s, intervalle_ms)
+    if resultat is None:
+        raise HTTPException(status_code=409, detail="Un profil est déjà en cours")
+    return resultat
+
+
+@router.post("/admin/memoire", dependencies=[Depends(verifier_admin)])
+async def profil_memoire(duree_s: float = Query(10.0, gt=0), top: int = Query(20, ge=1, le=200)):
+    """Différence d'allocations tracemalloc sur `duree_s` secondes (points chauds + .folded)."""
+    duree_s = min(duree_s, settings.PROFILING_MAX_DURATION_S)
+    resultat = await asyncio.to_thread(profileur.diff_memoire, duree_s, top)
+    if resultat is None:
+        raise HTTPException(status_code=409, detail="Un relevé mémoire est déjà en cours")
+    return resultat
+
+
+@router.post("/reentrainer", status_code=202)
+async def reentrainer(
+    seed: int | None = None,
+    source: str = Query("synthetique", pattern="^(synthetique|historique)$"),
+    n_echantillons: Optional[int] = Query(None, ge=1, le=1_000_000_000),
+    taille_bloc: int = Query(ModeleTrafic.TAILLE_BLOC, ge=1000, le=5_000_000),
+    date_debut: Optional[datetime] = None,
+    date_fin: Optional[datetime] = None,
+    observees_seulement: bool = False,
+):
+    """
+    Soumet un ré-entraînement en tâche de fond et renvoie immédiatement son
+    identifiant ; le nouveau modèle est publié automatiquement à la fin.
+    Avec `n_echantillons`, l'entraînement se fait en flux par blocs de
+    `taille_bloc` lignes (mémoire constante) ; le débit est dans le rapport.
+    Avec `source=historique`, les blocs sont lus en flux dans la table
+    `predictions` (filtrée par `date_debut`/`date_fin`), étiquetée par les
+    retours terrain quand ils existent ; `observees_seulement` ignore les
+    lignes sans retour.
+    """
+    if source == "historique":
+        parametres = {
+            "source": source,
+            "taille_bloc": taille_bloc,
+            "date_debut": date_debut,
+            "date_fin": date_fin,
+            "observees_seulement": observees_seulement,
+        }
+    else:
+        parametres = {"seed": seed or settings.MODEL_SEED}
+        if n_echantillons is not None:
+            parametres.update(n_echantillons=n_echantillons, taille_bloc=taille_bloc)
+    with etape("soumission"):
+        tache = ENTRAINEMENTS.soumettre(**parametres)
+    return {"ok": True, **tache.resume()}
+
+
+@router.get("/reentrainer/{job_id}")
+async def statut_reentrainement(job_id: str):
+    """État d'une tâche de ré-entraînement (en_attente, en_cours, terminee, echec)."""
+    tache = ENTRAINEMENTS.obtenir(job_id)
+    if tache is None:
+        raise HTTPException(status_code=404, detail="Tâche de ré-entraînement inconnue")
+    return tache.resume()
 
 
 # Modèle Pydantic pour la sortie des prédictions stockées
@@ -145,21 +561,41 @@ class PredictionOutput(BaseModel):
         orm_mode = True
 
 
+# Encodage direct des lignes de /predictions : colonnes lues en tuples, flottants
+# normalisés comme le ferait PredictionOutput, puis orjson (ni ORM ni jsonable_encoder)
+CHAMPS_SORTIE = [
+    (nom, champ.annotation in (float, Optional[float]))
+    for nom, champ in PredictionOutput.model_fields.items()
+]
+COLONNES_SORTIE = [getattr(Prediction, nom) for nom, _ in CHAMPS_SORTIE]
+
+
+def _ligne_sortie(ligne) -> dict:
+    return {
+        nom: float(v) if flottant and v is not None else v
+        for (nom, flottant), v in zip(CHAMPS_SORTIE, ligne)
+    }
+
+
 @router.get("/predictions", response_model=List[PredictionOutput])
 async def lire_predictions(
-    request: Request,
     skip: int = 0,
     limit: int = 100,
     date_debut: Optional[datetime] = None,
     date_fin: Optional[datetime] = None,
+    curseur: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
     """
     Récupère les prédictions sauvegardées dans la base de données.
     Les résultats peuvent être filtrés par date.
+
+    Pagination : `skip`/`limit` (décalage, conservé pour compatibilité) ou
+    `curseur` (keyset sur (timestamp, id), coût constant quelle que soit la
+    profondeur). Quand la page est pleine, l'en-tête `X-Curseur-Suivant`
+    contient le jeton de la page suivante.
     """
-    limiter.check(request)
-    query = db.query(Prediction)
+    query = db.query(*COLONNES_SORTIE)
 
     if date_debut:
         query = query.filter(Prediction.timestamp >= date_debut)
@@ -167,16 +603,152 @@ async def lire_predictions(
     if date_fin:
         query = query.filter(Prediction.timestamp <= date_fin)
 
-    return query.order_by(Prediction.timestamp.desc()).offset(skip).limit(limit).all()
+    if curseur:
+        ts, id_ = decoder_curseur(curseur)
+        query = query.filter(tuple_(Prediction.timestamp, Prediction.id) < tuple_(ts, id_))
+
+    query = query.order_by(Prediction.timestamp.desc(), Prediction.id.desc())
+    if not curseur:
+        query = query.offset(skip)
+    with etape("db.requete"):
+        resultats = query.limit(limit).all()
+
+    headers = {}
+    if resultats and len(resultats) == limit:
+        dernier = resultats[-1]
+        headers["X-Curseur-Suivant"] = encoder_curseur(dernier.timestamp, dernier.id)
+    return reponse_json([_ligne_sortie(ligne) for ligne in resultats], headers=headers)
+
+
+COLONNES_EXPORT = list(Prediction.__table__.columns)
+
+
+def _flux_export(db: Session, requete, format_: str) -> Iterator[bytes]:
+    """
+    Itère sur un curseur serveur (`stream_results`) par blocs de `yield_per`
+    lignes et encode directement chaque tuple, sans objet ORM ni validation
+    Pydantic : la mémoire reste constante quelle que soit la taille de l'export.
+    """
+    noms = [c.name for c in COLONNES_EXPORT]
+    try:
+        resultat = db.execute(
+            requete.execution_options(stream_results=True, yield_per=settings.EXPORT_CHUNK_SIZE)
+        )
+        if format_ == "csv":
+            tampon = io.StringIO()
+            ecrivain = csv.writer(tampon, lineterminator="\n")
+            ecrivain.writerow(noms)
+            for bloc in resultat.partitions():
+                ecrivain.writerows(
+                    [v.isoformat() if isinstance(v, datetime) else v for v in ligne]
+                    for ligne in bloc
+                )
+                yield tampon.getvalue().encode("utf-8")
+                tampon.seek(0)
+                tampon.truncate()
+            if tampon.tell():
+                yield tampon.getvalue().encode("utf-8")
+        else:
+            for bloc in resultat.partitions():
+                yield "".join(
+                    json.dumps(dict(zip(noms, ligne)), default=datetime.isoformat) + "\n"
+                    for ligne in bloc
+                ).encode("utf-8")
+    finally:
+        db.close()
+
+
+@router.get("/predictions/export")
+async def exporter_predictions(
+    format_: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    date_debut: Optional[datetime] = None,
+    date_fin: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Exporte en flux (NDJSON ou CSV) toutes les prédictions de l'intervalle,
+    par ordre chronologique.
+    """
+    requete = select(*COLONNES_EXPORT).order_by(Prediction.timestamp, Prediction.id)
+    if date_debut:
+        requete = requete.where(Prediction.timestamp >= date_debut)
+    if date_fin:
+        requete = requete.where(Prediction.timestamp <= date_fin)
+
+    # get_db ferme la session avant l'envoi du flux : le générateur la rouvre
+    # (une Session fermée reste réutilisable) puis la referme en fin d'export.
+    media = "text/csv" if format_ == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _flux_export(db, requete, format_),
+        media_type=media,
+        headers={"Content-Disposition": f'attachment; filename="predictions.{format_}"'},
+    )
 
 
 @router.get("/predictions/{prediction_id}", response_model=PredictionOutput)
-async def lire_prediction(request: Request, prediction_id: int, db: Session = Depends(get_db)):
+async def lire_prediction(prediction_id: int, db: Session = Depends(get_db)):
     """
     Récupère une prédiction spécifique par son ID.
     """
-    limiter.check(request)
     prediction = db.query(Prediction).filter(Prediction.id == prediction_id).first()
     if prediction is None:
         raise HTTPException(status_code=404, detail="Prédiction non trouvée")
     return prediction
+
+
+def _enregistrer_retour(prediction_id: int, retour: EntreeRetour, db: Session) -> dict:
+    prediction = db.query(Prediction).filter(Prediction.id == prediction_id).first()
+    if prediction is None:
+        raise HTTPException(status_code=404, detail="Prédiction non trouvée")
+
+    congestion = retour.congestion
+    if congestion is None:
+        if not prediction.distance_km:
+            # Sans distance, aucune vitesse réelle : l'étiquette ne peut pas être déduite
+            raise HTTPException(
+                status_code=422,
+                detail="Distance inconnue pour cette prédiction : préciser `congestion`",
+            )
+        # Même convention que la prédiction : congestion = vitesse réduite d'au moins 20 %
+        vitesse_reelle = prediction.distance_km / (retour.temps_trajet_reel / 60)
+        congestion = int(vitesse_reelle < 0.8 * prediction.vitesse_moyenne)
+
+    nouveau_retour = Retour(
+        prediction_id=prediction.id,
+        temps_trajet_reel=retour.temps_trajet_reel,
+        congestion=congestion,
+        timestamp=datetime.now(),
+    )
+    db.add(nouveau_retour)
+    db.commit()
+
+    APPRENTISSAGE.ajouter(
+        [
+            prediction.heure,
+            prediction.jour_semaine,
+            prediction.meteo,
+            prediction.incidents,
+            prediction.vitesse_moyenne,
+            prediction.debit_vehicules,
+            prediction.distance_km,
+        ],
+        congestion,
+    )
+    return {
+        "ok": True,
+        "retour_id": nouveau_retour.id,
+        "congestion": congestion,
+        "en_attente": APPRENTISSAGE.stats()["en_attente"],
+    }
+
+
+@router.post("/predictions/{prediction_id}/retour", status_code=202)
+async def enregistrer_retour(
+    prediction_id: int, retour: EntreeRetour, db: Session = Depends(get_db)
+):
+    """
+    Enregistre l'issue réelle d'un trajet prédit. L'observation est mise en
+    tampon puis appliquée au modèle servi lors de la prochaine mise à jour
+    incrémentale planifiée.
+    """
+    return await ADMISSION.executer(_enregistrer_retour, prediction_id, retour, db)
@@ -0,0 +1,71 @@
+# app/core/admission.py
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException
+
+T = TypeVar("T")
+
+
+class ControleAdmission:
+    """
+    Contrôle d'admission devant un exécuteur borné dédié au travail bloquant
+    (calcul, inférence, base de données) : au plus `max_concurrence` tâches
+    s'exécutent et `profondeur_file` attendent. Au-delà, la requête échoue
+    immédiatement en 503 + Retry-After au lieu d'allonger la file sans limite.
+    """
+
+    def __init__(self, max_concurrence: int = 4, profondeur_file: int = 64, retry_after_s: int = 1):
+        self.max_concurrence = max(1, max_concurrence)
+        self.profondeur_file = max(0, profondeur_file)
+        self.capacite = self.max_concurrence + self.profondeur_file
+        self.retry_after_s = retry_after_s
+        self.admises = 0
+        self.rejets = 0
+        self._en_cours = 0
+        self._lock = Lock()
+        self.executeur = ThreadPoolExecutor(
+            max_workers=self.max_concurrence, thread_name_prefix="inference"
+        )
+
+    @contextmanager
+    def admettre(self):
+        with self._lock:
+            if self._en_cours >= self.capacite:
+                self.rejets += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Serveur surchargé. Réessayez plus tard.",
+                    headers={"Retry-After": str(self.retry_after_s)},
+                )
+            self._en_cours += 1
+            self.admises += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._en_cours -= 1
+
+    async def executer(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Exécute `fn` sur l'exécuteur borné sans bloquer la boucle d'événements."""
+        # Le contexte (identifiant et chronométrage de la requête) suit l'appel
+        contexte = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executeur, functools.partial(contexte.run, fn, *args, **kwargs)
+        )
+
+    def stats(self):
+        en_cours = self._en_cours
+        return {
+            "en_cours": en_cours,
+            "profondeur_file": max(0, en_cours - self.max_concurrence),
+            "max_concurrence": self.max_concurrence,
+            "capacite": self.capacite,
+            "admises": self.admises,
+            "rejets": self.rejets,
+        }
@@ -0,0 +1,76 @@
+# app/core/contexte.py
+"""
+Contexte de la requête en cours, indépendant de la couche HTTP : identifiant,
+durées par étape (Server-Timing) et trace éventuelle. Le middleware l'active
+pour chaque requête ; services et accès aux données ne dépendent que d'ici.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Optional
+
+from app.core.tracing import TraceRequete
+
+
+class ChronoRequete:
+    """Durées cumulées par étape (ms) pour la requête en cours, et sa trace si échantillonnée."""
+
+    __slots__ = ("request_id", "debut", "etapes", "trace")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.debut = time.perf_counter()
+        self.etapes: Dict[str, float] = {}
+        self.trace: Optional[TraceRequete] = None
+
+    def ajouter(self, nom: str, duree_ms: float):
+        self.etapes[nom] = self.etapes.get(nom, 0.0) + duree_ms
+
+    def server_timing(self, total_ms: float) -> str:
+        entrees = [f"{nom};dur={duree:.3f}" for nom, duree in self.etapes.items()]
+        entrees.append(f"total;dur={total_ms:.3f}")
+        return ", ".join(entrees)
+
+
+_chrono: ContextVar[Optional[ChronoRequete]] = ContextVar("chrono_requete", default=None)
+
+
+def chrono_courant() -> Optional[ChronoRequete]:
+    return _chrono.get()
+
+
+def request_id_courant() -> Optional[str]:
+    chrono = _chrono.get()
+    return chrono.request_id if chrono is not None else None
+
+
+@contextmanager
+def etape(nom: str):
+    """Chronomètre un bloc et l'ajoute au Server-Timing de la requête courante."""
+    chrono = _chrono.get()
+    if chrono is None:
+        yield
+        return
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        fin = time.perf_counter()
+        chrono.ajouter(nom, (fin - debut) * 1000.0)
+        if chrono.trace is not None:
+            chrono.trace.ajouter(nom, debut, fin)
+
+
+def span(nom: str, debut: float, fin: float, **attributs):
+    """Span seul (sans entrée Server-Timing) si la requête courante est tracée."""
+    chrono = _chrono.get()
+    if chrono is not None and chrono.trace is not None:
+        chrono.trace.ajouter(nom, debut, fin, **attributs)
+
+
+def activer(chrono: ChronoRequete) -> Token:
+    return _chrono.set(chrono)
+
+
+def desactiver(jeton: Token):
+    _chrono.reset(jeton)
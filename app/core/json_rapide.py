@@ -0,0 +1,42 @@
+# app/core/json_rapide.py
+"""
+Chemins JSON rapides pour les endpoints chauds.
+
+- Entrée : `TypeAdapter.validate_json` valide directement les octets du corps
+  (analyse et validation en une passe dans pydantic-core), au lieu de
+  `json.loads` puis validation d'un dict. Les contraintes des schémas sont
+  inchangées ; les erreurs gardent le format 422 de FastAPI.
+- Sortie : `dump_json` (sérialiseur Rust du schéma) ou `orjson.dumps` sur des
+  dicts déjà prêts, sans passer par `jsonable_encoder`.
+"""
+from typing import Any, Dict, Optional, TypeVar
+
+import orjson
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from starlette.responses import Response
+
+T = TypeVar("T")
+
+
+async def valider_corps(request: Request, adaptateur: TypeAdapter) -> Any:
+    corps = await request.body()
+    try:
+        return adaptateur.validate_json(corps)
+    except ValidationError as exc:
+        erreurs = [
+            {**erreur, "loc": ("body", *erreur["loc"])} for erreur in exc.errors(include_url=False)
+        ]
+        raise RequestValidationError(erreurs, body=corps) from exc
+
+
+def reponse_json(
+    contenu: Any, adaptateur: Optional[TypeAdapter] = None, headers: Optional[Dict] = None
+) -> Response:
+    """Réponse JSON encodée par le schéma (`adaptateur`) ou par orjson."""
+    if adaptateur is not None:
+        corps = adaptateur.dump_json(contenu)
+    else:
+        corps = orjson.dumps(contenu, option=orjson.OPT_SERIALIZE_NUMPY)
+    return Response(corps, media_type="application/json", headers=headers)
@@ -1,9 +1,32 @@
 # app/core/logging.py
-# pylint: disable=no-member,import-self
+# pylint: disable=no-member,import-self,import-error,no-name-in-module
+"""
+Journalisation JSON non bloquante.
+
+Les appelants ne font que déposer l'enregistrement dans une file bornée
+(`QueueHandler`) ; le formatage JSON et l'écriture sur stdout ont lieu dans
+le thread d'un `QueueListener`. File pleine : l'enregistrement est abandonné
+et compté plutôt que de bloquer la boucle d'événements. Les logs INFO (et
+moins) peuvent être échantillonnés pour garder un coût constant en charge.
+"""
+import atexit
 import json
 import logging
+import queue
+import random
 import sys
 import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.core.metrics import REGISTRE
+from app.core.contexte import request_id_courant
+
+# Attributs standard d'un LogRecord : tout le reste vient de `extra=`
+_ATTRIBUTS_STANDARD = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message",
+    "asctime",
+}
 
 
 class JsonFormatter(logging.Formatter):
@@ -14,16 +37,114 @@ class JsonFormatter(logging.Formatter):
             "msg": record.getMessage(),
             "name": record.name,
         }
+        for cle, valeur in record.__dict__.items():
+            if cle not in _ATTRIBUTS_STANDARD:
+                payload[cle] = valeur
         if record.exc_info:
             payload["exc_info"] = self.formatException(record.exc_info)
-        return json.dumps(payload, ensure_ascii=False)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class EchantillonnageInfo(logging.Filter):
+    """Ne garde qu'une fraction `taux` des enregistrements INFO et inférieurs."""
+
+    def __init__(self, taux: float = 1.0):
+        super().__init__()
+        self.taux = min(1.0, max(0.0, taux))
+        self.ecartes = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or self.taux >= 1.0:
+            return True
+        if self.taux > 0.0 and random.random() < self.taux:
+            return True
+        self.ecartes += 1
+        return False
+
+
+class QueueHandlerNonBloquant(QueueHandler):
+    """`QueueHandler` sur file bornée : abandonne (et compte) au lieu de bloquer."""
+
+    def __init__(self, file: queue.Queue):
+        super().__init__(file)
+        self.abandons = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Seul le message est figé ici (ses arguments peuvent changer ensuite) ;
+        # le formatage JSON et la trace d'exception restent au thread d'écriture.
+        record.msg = record.getMessage()
+        record.args = None
+        if "request_id" not in record.__dict__:
+            request_id = request_id_courant()
+            if request_id is not None:
+                record.request_id = request_id
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.abandons += 1
+
 
+class EcouteurFile(QueueListener):
+    def enqueue_sentinel(self):
+        # File éventuellement pleine : attendre que le thread d'écriture fasse de la place
+        self.queue.put(self._sentinel)
+
+
+_ecouteur: Optional[QueueListener] = None
+_handler: Optional[QueueHandlerNonBloquant] = None
+_echantillonnage: Optional[EchantillonnageInfo] = None
+
+
+def setup_logging(level: str = "INFO", taille_file: int = 10000, taux_info: float = 1.0):
+    global _ecouteur, _handler, _echantillonnage  # pylint: disable=global-statement
+    arreter_logging()
+
+    sortie = logging.StreamHandler(sys.stdout)
+    sortie.setFormatter(JsonFormatter())
+    _echantillonnage = EchantillonnageInfo(taux_info)
+    _handler = QueueHandlerNonBloquant(queue.Queue(maxsize=max(1, taille_file)))
+    _handler.addFilter(_echantillonnage)
+    _ecouteur = EcouteurFile(_handler.queue, sortie, respect_handler_level=True)
+    _ecouteur.start()
 
-def setup_logging(level: str = "INFO"):
-    h = logging.StreamHandler(sys.stdout)
-    h.setFormatter(JsonFormatter())
     root = logging.getLogger()
     root.handlers.clear()
-    root.addHandler(h)
+    root.addHandler(_handler)
     root.setLevel(level.upper())
     return root
+
+
+def arreter_logging():
+    """Vide la file puis arrête le thread d'écriture (idempotent)."""
+    global _ecouteur  # pylint: disable=global-statement
+    if _ecouteur is not None:
+        _ecouteur.stop()
+        _ecouteur = None
+
+
+def stats_logging():
+    return {
+        "abandons": _handler.abandons if _handler else 0,
+        "ecartes": _echantillonnage.ecartes if _echantillonnage else 0,
+        "en_file": _handler.queue.qsize() if _handler else 0,
+    }
+
+
+atexit.register(arreter_logging)
+
+
+REGISTRE.fonction(
+    "mobilitysoft_logs_abandonnes_total",
+    "Enregistrements de log abandonnés (file pleine)",
+    "counter",
+    lambda: stats_logging()["abandons"],
+)
+REGISTRE.fonction(
+    "mobilitysoft_logs_ecartes_total",
+    "Enregistrements INFO écartés par échantillonnage",
+    "counter",
+    lambda: stats_logging()["ecartes"],
+)
@@ -0,0 +1,218 @@
+# app/core/metrics.py
+"""
+Métriques de service et exposition au format texte Prometheus (version 0.0.4).
+
+Les collecteurs ne prennent qu'un verrou non contesté par observation ; les
+valeurs déjà tenues ailleurs (compteurs du limiteur, état du pool SQL) sont
+lues par des fonctions au moment de l'exposition, sans coût sur le chemin chaud.
+"""
+import math
+from bisect import bisect_left
+from threading import Lock
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+BORNES_LATENCE_S = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+BORNES_ATTENTE_S = (0.00001, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+TYPE_CONTENU = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogramme:
+    """Histogramme à bornes fixes (style Prometheus : bornes supérieures inclusives)."""
+
+    def __init__(self, bornes: Sequence[float]):
+        self.bornes = tuple(sorted(bornes))
+        self._comptes = [0] * (len(self.bornes) + 1)  # dernier seau = +Inf
+        self._somme = 0.0
+        self._nombre = 0
+        self._lock = Lock()
+
+    def observer(self, valeur: float):
+        i = bisect_left(self.bornes, valeur)
+        with self._lock:
+            self._comptes[i] += 1
+            self._somme += valeur
+            self._nombre += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            comptes = list(self._comptes)
+            somme, nombre = self._somme, self._nombre
+        cumul, seaux = 0, {}
+        for borne, c in zip(list(self.bornes) + ["+Inf"], comptes):
+            cumul += c
+            seaux[str(borne)] = cumul
+        return {"seaux": seaux, "somme": somme, "nombre": nombre}
+
+
+class Compteur:
+    def __init__(self):
+        self._valeur = 0.0
+        self._lock = Lock()
+
+    def inc(self, n: float = 1.0):
+        with self._lock:
+            self._valeur += n
+
+    @property
+    def valeur(self) -> float:
+        return self._valeur
+
+
+class Jauge(Compteur):
+    def dec(self, n: float = 1.0):
+        with self._lock:
+            self._valeur -= n
+
+    def fixer(self, valeur: float):
+        self._valeur = valeur
+
+
+Metrique = Union[Histogramme, Compteur, Jauge]
+
+
+class Famille:
+    """Métrique déclinée par valeurs d'étiquettes ; un enfant par combinaison."""
+
+    def __init__(self, fabrique: Callable[[], Metrique], etiquettes: Sequence[str]):
+        self.fabrique = fabrique
+        self.etiquettes = tuple(etiquettes)
+        self.enfants: Dict[Tuple[str, ...], Metrique] = {}
+        self._lock = Lock()
+
+    def etiqueter(self, *valeurs: str) -> Metrique:
+        enfant = self.enfants.get(valeurs)
+        if enfant is None:
+            with self._lock:
+                enfant = self.enfants.setdefault(valeurs, self.fabrique())
+        return enfant
+
+
+def _echapper(valeur: str) -> str:
+    return str(valeur).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquettes(noms: Sequence[str], valeurs: Sequence[str]) -> str:
+    if not noms:
+        return ""
+    return "{" + ",".join(f'{n}="{_echapper(v)}"' for n, v in zip(noms, valeurs)) + "}"
+
+
+def _nombre(valeur: float) -> str:
+    if math.isnan(valeur):
+        return "NaN"
+    if math.isinf(valeur):
+        return "+Inf" if valeur > 0 else "-Inf"
+    if valeur == int(valeur) and abs(valeur) < 1e15:
+        return str(int(valeur))
+    return repr(float(valeur))
+
+
+class Registre:
+    """Ensemble nommé de métriques, exposées par `exposer()`."""
+
+    def __init__(self):
+        self._metriques: Dict[str, Tuple[str, str, object]] = {}
+
+    def _ajouter(self, nom: str, aide: str, type_: str, objet):
+        # Réenregistrer un nom remplace la métrique (rechargements, tests)
+        self._metriques[nom] = (type_, aide, objet)
+        return objet
+
+    def compteur(self, nom: str, aide: str, etiquettes: Sequence[str] = ()):
+        objet = Famille(Compteur, etiquettes) if etiquettes else Compteur()
+        return self._ajouter(nom, aide, "counter", objet)
+
+    def jauge(self, nom: str, aide: str, etiquettes: Sequence[str] = ()):
+        objet = Famille(Jauge, etiquettes) if etiquettes else Jauge()
+        return self._ajouter(nom, aide, "gauge", objet)
+
+    def histogramme(
+        self, nom: str, aide: str, bornes: Sequence[float], etiquettes: Sequence[str] = ()
+    ):
+        if etiquettes:
+            objet = Famille(lambda: Histogramme(bornes), etiquettes)
+        else:
+            objet = Histogramme(bornes)
+        return self._ajouter(nom, aide, "histogram", objet)
+
+    def fonction(self, nom: str, aide: str, type_: str, fn: Callable[[], float]):
+        """Valeur lue à l'exposition (`type_` : "counter" ou "gauge")."""
+        return self._ajouter(nom, aide, type_, fn)
+
+    def exposer(self) -> str:
+        lignes: List[str] = []
+        for nom, (type_, aide, objet) in sorted(self._metriques.items()):
+            lignes.append(f"# HELP {nom} {aide}")
+            lignes.append(f"# TYPE {nom} {type_}")
+            if isinstance(objet, Famille):
+                enfants = sorted(objet.enfants.items())
+                noms = objet.etiquettes
+            else:
+                enfants, noms = [((), objet)], ()
+            for valeurs, enfant in enfants:
+                self._exposer_enfant(lignes, nom, noms, valeurs, enfant)
+        return "\n".join(lignes) + "\n"
+
+    @staticmethod
+    def _exposer_enfant(lignes, nom, noms, valeurs, enfant):
+        if isinstance(enfant, Histogramme):
+            snap = enfant.snapshot()
+            for borne, cumul in snap["seaux"].items():
+                le = borne if borne == "+Inf" else _nombre(float(borne))
+                etiq = _etiquettes(tuple(noms) + ("le",), tuple(valeurs) + (le,))
+                lignes.append(f"{nom}_bucket{etiq} {cumul}")
+            etiq = _etiquettes(noms, valeurs)
+            lignes.append(f"{nom}_sum{etiq} {_nombre(snap['somme'])}")
+            lignes.append(f"{nom}_count{etiq} {snap['nombre']}")
+            return
+        valeur = enfant() if callable(enfant) else enfant.valeur
+        lignes.append(f"{nom}{_etiquettes(noms, valeurs)} {_nombre(float(valeur))}")
+
+
+REGISTRE = Registre()
+
+DUREE_REQUETES = REGISTRE.histogramme(
+    "mobilitysoft_http_requete_duree_secondes",
+    "Durée des requêtes HTTP par route",
+    BORNES_LATENCE_S,
+    etiquettes=("methode", "route", "statut"),
+)
+REQUETES_EN_COURS = REGISTRE.jauge(
+    "mobilitysoft_http_requetes_en_cours", "Requêtes HTTP en cours de traitement"
+)
+DUREE_INFERENCE = REGISTRE.histogramme(
+    "mobilitysoft_inference_duree_secondes",
+    "Durée d'un appel au modèle (un lot de lignes)",
+    BORNES_LATENCE_S,
+)
+ATTENTE_VERROU_MODELE = REGISTRE.histogramme(
+    "mobilitysoft_modele_verrou_attente_secondes",
+    "Attente du verrou de publication du modèle",
+    BORNES_ATTENTE_S,
+)
+DUREE_COMMIT = REGISTRE.histogramme(
+    "mobilitysoft_db_commit_duree_secondes",
+    "Durée des commits de session SQLAlchemy (flush compris)",
+    BORNES_LATENCE_S,
+)
+ATTENTE_POOL = REGISTRE.histogramme(
+    "mobilitysoft_db_pool_attente_secondes",
+    "Attente d'une connexion du pool SQLAlchemy",
+    BORNES_ATTENTE_S,
+)
@@ -1,19 +1,95 @@
 # app/core/middleware.py
+# pylint: disable=no-member
+import logging
 import time
 import uuid
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
-
-
-class RequestContextMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        req_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
-        start = time.perf_counter()
-        response: Response = await call_next(request)
-        duration_ms = int((time.perf_counter() - start) * 1000)
-        response.headers["X-Request-ID"] = req_id
-        response.headers["X-Response-Time-ms"] = str(duration_ms)
-        request.state.request_id = req_id
-        return response
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import tracing
+from app.core.contexte import ChronoRequete, activer, desactiver
+from app.core.metrics import DUREE_REQUETES, REQUETES_EN_COURS
+
+
+logger_acces = logging.getLogger("mobilitysoft.acces")
+
+
+class RequestContextMiddleware:
+    """
+    Middleware ASGI pur : identifiant de requête, durée totale et `Server-Timing`
+    par étape, ajoutés au démarrage de la réponse (compatible avec le streaming).
+    Alimente aussi les métriques de latence par route et de requêtes en cours,
+    et le journal d'accès (identifiant de requête et durées par étape).
+    """
+
+    def __init__(self, app: ASGIApp, journal_acces: bool = True):
+        self.app = app
+        self.journal_acces = journal_acces
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        req_id = traceparent = None
+        for nom, valeur in scope["headers"]:
+            if nom == b"x-request-id":
+                req_id = valeur.decode("latin-1")
+            elif nom == b"traceparent":
+                traceparent = valeur.decode("latin-1")
+        chrono = ChronoRequete(req_id or str(uuid.uuid4()))
+        chrono.trace = tracing.traceur.commencer(chrono.request_id, traceparent, chrono.debut)
+        scope.setdefault("state", {})["request_id"] = chrono.request_id
+
+        statut = 500
+
+        async def envoyer(message: Message):
+            nonlocal statut
+            if message["type"] == "http.response.start":
+                statut = message["status"]
+                total_ms = (time.perf_counter() - chrono.debut) * 1000.0
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = chrono.request_id
+                headers["X-Response-Time-ms"] = f"{total_ms:.3f}"
+                headers["Server-Timing"] = chrono.server_timing(total_ms)
+                if chrono.trace is not None:
+                    headers[
+                        "traceparent"
+                    ] = f"00-{chrono.trace.trace_id}-{chrono.trace.racine_id}-01"
+            await send(message)
+
+        jeton = activer(chrono)
+        REQUETES_EN_COURS.inc()
+        try:
+            await self.app(scope, receive, envoyer)
+        finally:
+            desactiver(jeton)
+            REQUETES_EN_COURS.dec()
+            # Gabarit de route (cardinalité bornée), pas le chemin brut
+            route = getattr(scope.get("route"), "path", "non_routee")
+            fin = time.perf_counter()
+            duree = fin - chrono.debut
+            DUREE_REQUETES.etiqueter(scope["method"], route, str(statut)).observer(duree)
+            if chrono.trace is not None:
+                tracing.traceur.terminer(
+                    chrono.trace.terminer(
+                        f"{scope['method']} {route}",
+                        fin,
+                        request_id=chrono.request_id,
+                        statut=statut,
+                    )
+                )
+            if self.journal_acces and logger_acces.isEnabledFor(logging.INFO):
+                logger_acces.info(
+                    "requete",
+                    extra={
+                        "request_id": chrono.request_id,
+                        "methode": scope["method"],
+                        "chemin": scope["path"],
+                        "route": route,
+                        "statut": statut,
+                        "duree_ms": round(duree * 1000.0, 3),
+                        "etapes": {nom: round(d, 3) for nom, d in chrono.etapes.items()},
+                    },
+                )
@@ -0,0 +1,22 @@
+# app/core/pagination.py
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+from fastapi import HTTPException
+
+
+def encoder_curseur(ts: datetime, id_: int) -> str:
+    """Jeton opaque (base64url) de la dernière ligne d'une page triée par (timestamp, id)."""
+    brut = json.dumps({"t": ts.isoformat(), "i": id_}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(brut).decode().rstrip("=")
+
+
+def decoder_curseur(curseur: str) -> Tuple[datetime, int]:
+    try:
+        brut = base64.urlsafe_b64decode(curseur + "=" * (-len(curseur) % 4))
+        donnees = json.loads(brut)
+        return datetime.fromisoformat(donnees["t"]), int(donnees["i"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide") from exc
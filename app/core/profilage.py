@@ -0,0 +1,237 @@
+# app/core/profilage.py
+"""
+Profilage à la demande du processus serveur (désactivé par défaut).
+
+- Échantillonneur statistique : un thread relève périodiquement les piles de
+  tous les threads (`sys._current_frames`) et les agrège au format « folded »
+  (une ligne `cadre;cadre;cadre N` par pile), lu par flamegraph.pl, speedscope
+  ou inferno.
+- Allocations : deux instantanés `tracemalloc` à `duree_s` d'écart ; le delta
+  par pile d'allocation est écrit au même format (poids en octets) et les
+  lignes les plus coûteuses sont renvoyées.
+"""
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+PROFONDEUR_TRACEMALLOC = 25
+
+
+@contextmanager
+def essayer(verrou: threading.Lock) -> Iterator[bool]:
+    """Prise non bloquante du verrou pour la durée du bloc ; faux s'il est déjà pris."""
+    acquis = verrou.acquire(blocking=False)  # pylint: disable=consider-using-with
+    try:
+        yield acquis
+    finally:
+        if acquis:
+            verrou.release()
+
+
+def _cadre(code) -> str:
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class EchantillonneurPile:
+    """Relève les piles de tous les threads toutes les `intervalle_s` secondes."""
+
+    def __init__(self, intervalle_s: float = 0.005):
+        self.intervalle_s = max(0.0005, intervalle_s)
+        self.piles: Counter = Counter()
+        self.echantillons = 0
+        self._arret = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def demarrer(self):
+        self._thread = threading.Thread(
+            target=self._boucle, name="profilage-echantillonneur", daemon=True
+        )
+        self._thread.start()
+
+    def arreter(self):
+        self._arret.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _boucle(self):
+        moi = threading.get_ident()
+        while not self._arret.wait(self.intervalle_s):
+            noms = {t.ident: t.name for t in threading.enumerate()}
+            for ident, cadre in sys._current_frames().items():  # pylint: disable=protected-access
+                if ident == moi:
+                    continue
+                pile = []
+                while cadre is not None:
+                    pile.append(_cadre(cadre.f_code))
+                    cadre = cadre.f_back
+                pile.append(noms.get(ident, str(ident)))
+                self.piles[";".join(reversed(pile))] += 1
+            self.echantillons += 1
+
+    def ecrire(self, chemin: str) -> str:
+        ecrire_folded(chemin, self.piles)
+        return chemin
+
+
+def ecrire_folded(chemin: str, piles: Dict[str, int]):
+    os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+    tmp = f"{chemin}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for pile, poids in sorted(piles.items()):
+            f.write(f"{pile} {poids}\n")
+    os.replace(tmp, chemin)
+
+
+def nom_fichier(dossier: str, prefixe: str, suffixe: str = ".folded") -> str:
+    horodatage = time.strftime("%Y%m%dT%H%M%S")
+    return os.path.join(dossier, f"{prefixe}-{horodatage}-{uuid.uuid4().hex[:6]}{suffixe}")
+
+
+class Profileur:
+    """Point d'entrée des profils : un seul profil CPU et un seul diff mémoire à la fois."""
+
+    def __init__(self, dossier: str = "profils", intervalle_ms: float = 5.0):
+        self.dossier = dossier
+        self.intervalle_s = intervalle_ms / 1000.0
+        self._cpu = threading.Lock()
+        self._memoire = threading.Lock()
+
+    def profil_cpu(self, duree_s: float, intervalle_ms: Optional[float] = None) -> Optional[Dict]:
+        """Profil statistique de `duree_s` secondes (bloquant) ; None si un profil est en cours."""
+        with essayer(self._cpu) as acquis:
+            if not acquis:
+                return None
+            intervalle_s = intervalle_ms / 1000.0 if intervalle_ms else self.intervalle_s
+            echantillonneur = EchantillonneurPile(intervalle_s)
+            echantillonneur.demarrer()
+            time.sleep(duree_s)
+            echantillonneur.arreter()
+            chemin = echantillonneur.ecrire(nom_fichier(self.dossier, "profil-cpu"))
+            return {
+                "fichier": chemin,
+                "duree_s": duree_s,
+                "echantillons": echantillonneur.echantillons,
+            }
+
+    def profil_cpu_arriere_plan(self, duree_s: float) -> bool:
+        """Lance un profil dans un thread (signal) ; False si un profil est déjà en cours."""
+        if self._cpu.locked():
+            return False
+        threading.Thread(
+            target=self.profil_cpu, args=(duree_s,), name="profilage-signal", daemon=True
+        ).start()
+        return True
+
+    def diff_memoire(self, duree_s: float, top: int = 20) -> Optional[Dict]:
+        """Allocations nettes entre deux instantanés `tracemalloc` à `duree_s` d'écart."""
+        with essayer(self._memoire) as acquis:
+            if not acquis:
+                return None
+            deja_actif = tracemalloc.is_tracing()
+            try:
+                if not deja_actif:
+                    tracemalloc.start(PROFONDEUR_TRACEMALLOC)
+                avant = tracemalloc.take_snapshot()
+                time.sleep(duree_s)
+                apres = tracemalloc.take_snapshot()
+
+                piles: Dict[str, int] = {}
+                for stat in apres.compare_to(avant, "traceback"):
+                    if stat.size_diff > 0:
+                        cadres = [
+                            f"{os.path.basename(c.filename)}:{c.lineno}"
+                            for c in reversed(stat.traceback)
+                        ]
+                        pile = ";".join(cadres)
+                        piles[pile] = piles.get(pile, 0) + stat.size_diff
+                chemin = nom_fichier(self.dossier, "allocations")
+                ecrire_folded(chemin, piles)
+
+                lignes: List[Dict] = [
+                    {
+                        "ligne": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                        "octets": stat.size_diff,
+                        "blocs": stat.count_diff,
+                    }
+                    for stat in apres.compare_to(avant, "lineno")[:top]
+                ]
+                return {"fichier": chemin, "duree_s": duree_s, "top": lignes}
+            finally:
+                if not deja_actif:
+                    tracemalloc.stop()
+
+
+class ProfilageMiddleware:
+    """
+    Profil d'une seule requête quand elle porte l'en-tête `X-Profil: 1` et le
+    jeton d'administration dans `X-Admin-Token`. Accessible depuis toutes les
+    routes : sans jeton configuré, l'en-tête `X-Profil` est ignoré.
+    Tous les threads sont échantillonnés (boucle et exécuteur d'inférence) :
+    sous charge, les requêtes concurrentes apparaissent aussi dans le profil.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        profileur_requetes: Profileur,
+        jeton: str = "",
+        intervalle_ms: float = 1.0,
+    ):
+        self.app = app
+        self.profileur = profileur_requetes
+        self.jeton = jeton.encode()
+        self.intervalle_s = intervalle_ms / 1000.0
+        self._en_cours = threading.Lock()
+
+    def _autorise(self, scope: Scope) -> bool:
+        if not self.jeton:
+            return False
+        headers = dict(scope["headers"])
+        return headers.get(b"x-profil") == b"1" and hmac.compare_digest(
+            headers.get(b"x-admin-token", b""), self.jeton
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._autorise(scope):
+            await self.app(scope, receive, send)
+            return
+        with essayer(self._en_cours) as acquis:
+            if not acquis:
+                await self.app(scope, receive, send)  # un seul profil par requête à la fois
+                return
+            await self._profiler(scope, receive, send)
+
+    async def _profiler(self, scope: Scope, receive: Receive, send: Send):
+        # L'identifiant vient d'un en-tête client : seuls des caractères sûrs vont dans le nom
+        request_id = re.sub(r"[^A-Za-z0-9_-]", "", scope.get("state", {}).get("request_id", ""))
+        request_id = request_id[:64] or "requete"
+        chemin = nom_fichier(self.profileur.dossier, f"profil-requete-{request_id}")
+
+        async def envoyer(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Profil-Fichier"] = os.path.basename(chemin)
+            await send(message)
+
+        echantillonneur = EchantillonneurPile(self.intervalle_s)
+        echantillonneur.demarrer()
+        try:
+            await self.app(scope, receive, envoyer)
+        finally:
+            echantillonneur.arreter()
+            echantillonneur.ecrire(chemin)
+
+
+profileur = Profileur(settings.PROFILING_DIR, settings.PROFILING_INTERVAL_MS)
@@ -1,29 +1,118 @@
 # app/core/rate_limit.py
-import time
-from typing import Dict, Tuple
-from fastapi import Request, HTTPException
+import math
+from typing import Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import REGISTRE
+from app.core.contexte import etape
+from app.core.rate_limit_backends import (
+    StockageLocal,
+    StockagePartage,
+    StockageSeaux,
+    verrous_inter_processus,
+)
+
+MESSAGE_429 = "Trop de requêtes. Réessayez plus tard."
 
 
 class RateLimiter:
-    def __init__(self, per_minute: int = 60):
+    """
+    Limiteur à seau à jetons par client, en O(1) et à mémoire bornée.
+
+    Chaque client dispose de `per_minute` jetons rechargés en continu
+    (`per_minute / 60` par seconde). L'état des seaux est délégué à un
+    stockage : local au processus par défaut, partagé entre workers (mmap)
+    ou distant (voir `app.core.rate_limit_backends`).
+    """
+
+    def __init__(
+        self,
+        per_minute: int = 60,
+        max_clients: int = 100_000,
+        stockage: Optional[StockageSeaux] = None,
+    ):
         self.per_minute = per_minute
-        self.buckets: Dict[str, Tuple[int, float]] = {}
-
-    def check(self, request: Request):
-        ip = request.client.host if request.client else "unknown"
-        now = time.time()
-        count, reset = self.buckets.get(ip, (0, now + 60))
-        if now > reset:
-            count, reset = 0, now + 60
-        count += 1
-        self.buckets[ip] = (count, reset)
-        if count > self.per_minute:
-            retry = int(reset - now)
-            raise HTTPException(
+        self.capacite = float(per_minute)
+        self.taux = per_minute / 60.0
+        self.stockage = stockage if stockage is not None else StockageLocal(max_clients)
+        self.rejets = 0
+
+    def consommer(self, cle: str, maintenant: Optional[float] = None) -> float:
+        """Consomme un jeton ; renvoie 0 si autorisé, sinon le délai d'attente (s)."""
+        if maintenant is None:
+            maintenant = self.stockage.horloge()
+        attente = self.stockage.consommer(cle, self.capacite, self.taux, maintenant)
+        if attente > 0:
+            self.rejets += 1
+        return attente
+
+    def reinitialiser(self):
+        """Oublie tous les seaux (quota neuf pour chaque client)."""
+        self.stockage.reinitialiser()
+
+    def stats(self):
+        return {"per_minute": self.per_minute, "rejets": self.rejets, **self.stockage.stats()}
+
+
+def creer_stockage(backend: str) -> StockageSeaux:
+    """Stockage des seaux selon `RATE_LIMIT_BACKEND` ("local" ou "partage")."""
+    if backend == "local":
+        return StockageLocal(settings.RATE_LIMIT_MAX_CLIENTS)
+    if backend == "partage":
+        if not verrous_inter_processus():
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND=partage exige fcntl (POSIX) pour verrouiller entre "
+                "processus ; utiliser RATE_LIMIT_BACKEND=local sur cette plateforme"
+            )
+        return StockagePartage(
+            settings.RATE_LIMIT_SHM_PATH or None, nb_ensembles=settings.RATE_LIMIT_SHM_SETS
+        )
+    raise ValueError(f"Stockage de limite de débit inconnu : {backend}")
+
+
+def retry_after(attente: float) -> int:
+    return max(1, math.ceil(attente)) if math.isfinite(attente) else 60
+
+
+class RateLimitMiddleware:
+    """
+    Middleware ASGI pur : la limite est appliquée avant le routage, la lecture
+    du corps, la validation et l'ouverture d'une session de base de données.
+    """
+
+    def __init__(self, app: ASGIApp, limiteur: Optional[RateLimiter] = None, prefixe: str = ""):
+        self.app = app
+        self.limiteur = limiteur
+        self.prefixe = prefixe
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixe):
+            await self.app(scope, receive, send)
+            return
+        limiteur = self.limiteur or limiter
+        client = scope.get("client")
+        with etape("rate_limit"):
+            attente = limiteur.consommer(client[0] if client else "unknown")
+        if attente > 0:
+            reponse = JSONResponse(
+                {"detail": MESSAGE_429},
                 status_code=429,
-                detail="Trop de requêtes. Réessayez plus tard.",
-                headers={"Retry-After": str(max(1, retry))},
+                headers={"Retry-After": str(retry_after(attente))},
             )
+            await reponse(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
 
 
-limiter = RateLimiter()
+limiter = RateLimiter(
+    settings.RATE_LIMIT_PER_MIN, stockage=creer_stockage(settings.RATE_LIMIT_BACKEND)
+)
+REGISTRE.fonction(
+    "mobilitysoft_rate_limit_rejets_total",
+    "Requêtes rejetées (429) par le limiteur de débit",
+    "counter",
+    lambda: limiter.rejets,
+)
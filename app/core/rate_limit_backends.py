@@ -0,0 +1,290 @@
+# app/core/rate_limit_backends.py
+"""
+Stockages de seaux à jetons pour le limiteur de débit.
+
+- `StockageLocal` : dictionnaire LRU propre au processus (un seul worker).
+- `StockagePartage` : table de hachage à taille fixe dans un fichier mmap,
+  partagée par tous les workers d'un même hôte (verrous par bande).
+- `StockageDistant` : adaptateur vers un magasin distant (Redis, etc.) pour
+  plusieurs hôtes ; `ClientMemoire` le remplace en local et dans les tests.
+
+Tous exposent `consommer(cle, capacite, taux, maintenant)` qui renvoie 0 si
+un jeton a été pris, sinon le délai (s) avant le prochain jeton.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Protocol
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - hors POSIX (Windows) : verrous de threads seulement
+    fcntl = None
+
+
+def verrous_inter_processus() -> bool:
+    """Vrai si `StockagePartage` peut verrouiller entre processus (`fcntl`, POSIX)."""
+    return fcntl is not None
+
+
+def delai_jeton(jetons: float, taux: float) -> float:
+    return (1.0 - jetons) / taux if taux > 0 else float("inf")
+
+
+def recharger(jetons: float, dernier: float, capacite: float, taux: float, maintenant: float):
+    return min(capacite, jetons + max(0.0, maintenant - dernier) * taux)
+
+
+class StockageSeaux(Protocol):
+    horloge: Callable[[], float]
+
+    def consommer(self, cle: str, capacite: float, taux: float, maintenant: float) -> float:
+        ...
+
+    def reinitialiser(self):
+        ...
+
+    def stats(self) -> dict:
+        ...
+
+
+class StockageLocal:
+    """Seaux en mémoire du processus, ordre LRU et nombre borné de clients."""
+
+    horloge = staticmethod(time.monotonic)
+
+    def __init__(self, max_clients: int = 100_000):
+        self.max_clients = max(1, max_clients)
+        self.buckets: "OrderedDict[str, List[float]]" = OrderedDict()  # [jetons, dernier accès]
+        self.evictions = 0
+
+    def consommer(self, cle: str, capacite: float, taux: float, maintenant: float) -> float:
+        seau = self.buckets.get(cle)
+        if seau is None:
+            self._evincer(maintenant, capacite / taux if taux > 0 else float("inf"))
+            if capacite < 1:
+                return float("inf")
+            self.buckets[cle] = [capacite - 1.0, maintenant]
+            return 0.0
+
+        self.buckets.move_to_end(cle)
+        jetons = recharger(seau[0], seau[1], capacite, taux, maintenant)
+        seau[1] = maintenant
+        if jetons >= 1.0:
+            seau[0] = jetons - 1.0
+            return 0.0
+        seau[0] = jetons
+        return delai_jeton(jetons, taux)
+
+    def _evincer(self, maintenant: float, inactivite_s: float):
+        # Tête de l'ordre LRU : au plus deux seaux inactifs oubliés par appel (coût amorti O(1))
+        for _ in range(2):
+            if not self.buckets:
+                return
+            cle, seau = next(iter(self.buckets.items()))
+            if maintenant - seau[1] < inactivite_s:
+                break
+            del self.buckets[cle]
+        while len(self.buckets) >= self.max_clients:
+            self.buckets.popitem(last=False)
+            self.evictions += 1
+
+    def reinitialiser(self):
+        self.buckets.clear()
+
+    def stats(self) -> dict:
+        return {
+            "stockage": "local",
+            "clients": len(self.buckets),
+            "max_clients": self.max_clients,
+            "evictions": self.evictions,
+        }
+
+
+class StockagePartage:
+    """
+    Table de hachage associative par ensembles dans un fichier mmap.
+
+    Chaque clé (empreinte 64 bits) tombe dans un ensemble de `voies` cases
+    (empreinte, jetons, dernier accès). Si l'ensemble est plein, la case la
+    moins récemment utilisée est réutilisée : la mémoire reste fixe quel que
+    soit le nombre de clients. Un ensemble est protégé par une bande de
+    verrous : verrou de thread dans le processus, `fcntl.lockf` sur un octet
+    entre processus. `time.monotonic` est commune aux processus d'un hôte.
+    Sans `fcntl` (Windows), seuls les verrous de threads existent : la table
+    n'est sûre qu'au sein d'un processus (voir `verrous_inter_processus`).
+    """
+
+    MAGIC = b"MSRLIM01"
+    ENTETE = struct.Struct("<8sII")
+    TAILLE_ENTETE = 64
+    CASE = struct.Struct("<Qdd")
+
+    horloge = staticmethod(time.monotonic)
+
+    def __init__(
+        self,
+        chemin: Optional[str] = None,
+        nb_ensembles: int = 16384,
+        voies: int = 8,
+        nb_verrous: int = 64,
+    ):
+        self.chemin = chemin or chemin_partage_defaut()
+        self.nb_ensembles = max(1, nb_ensembles)
+        self.voies = max(1, voies)
+        self.nb_verrous = max(1, min(nb_verrous, self.nb_ensembles))
+        self.taille = self.TAILLE_ENTETE + self.nb_ensembles * self.voies * self.CASE.size
+        self._verrous = [threading.Lock() for _ in range(self.nb_verrous)]
+        self.evictions = 0
+
+        self._fd = os.open(self.chemin, os.O_RDWR | os.O_CREAT, 0o600)
+        self._verrouiller_fichier(True, 0, 0)
+        try:
+            if os.fstat(self._fd).st_size != self.taille:
+                os.ftruncate(self._fd, self.taille)
+            self._mm = mmap.mmap(self._fd, self.taille)
+            attendu = self.ENTETE.pack(self.MAGIC, self.nb_ensembles, self.voies)
+            if self._mm[: self.ENTETE.size] != attendu:
+                self._mm[self.TAILLE_ENTETE :] = bytes(self.taille - self.TAILLE_ENTETE)
+                self._mm[: self.ENTETE.size] = attendu
+        finally:
+            self._verrouiller_fichier(False, 0, 0)
+
+    def _verrouiller_fichier(self, exclusif: bool, longueur: int, debut: int):
+        if fcntl is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX if exclusif else fcntl.LOCK_UN, longueur, debut)
+
+    def consommer(self, cle: str, capacite: float, taux: float, maintenant: float) -> float:
+        empreinte = int.from_bytes(hashlib.blake2b(cle.encode(), digest_size=8).digest(), "little")
+        empreinte |= 1  # 0 réservé aux cases vides
+        ensemble = empreinte % self.nb_ensembles
+        bande = ensemble % self.nb_verrous
+        base = self.TAILLE_ENTETE + ensemble * self.voies * self.CASE.size
+        inactivite_s = capacite / taux if taux > 0 else float("inf")
+
+        with self._verrous[bande]:
+            self._verrouiller_fichier(True, 1, bande)
+            try:
+                return self._consommer_ensemble(
+                    base, empreinte, capacite, taux, maintenant, inactivite_s
+                )
+            finally:
+                self._verrouiller_fichier(False, 1, bande)
+
+    def _consommer_ensemble(self, base, empreinte, capacite, taux, maintenant, inactivite_s):
+        mm, case = self._mm, self.CASE
+        victime, plus_ancien = base, float("inf")
+        for i in range(self.voies):
+            position = base + i * case.size
+            cle_case, jetons, dernier = case.unpack_from(mm, position)
+            if cle_case == empreinte:
+                jetons = recharger(jetons, dernier, capacite, taux, maintenant)
+                if jetons >= 1.0:
+                    case.pack_into(mm, position, empreinte, jetons - 1.0, maintenant)
+                    return 0.0
+                case.pack_into(mm, position, empreinte, jetons, maintenant)
+                return delai_jeton(jetons, taux)
+            if cle_case == 0:
+                dernier = -float("inf")
+            if dernier < plus_ancien:
+                victime, plus_ancien = position, dernier
+
+        if capacite < 1:
+            return float("inf")
+        if maintenant - plus_ancien < inactivite_s:
+            self.evictions += 1  # seau encore partiellement consommé
+        case.pack_into(mm, victime, empreinte, capacite - 1.0, maintenant)
+        return 0.0
+
+    def reinitialiser(self):
+        for verrou in self._verrous:
+            verrou.acquire()
+        self._verrouiller_fichier(True, 0, 0)
+        try:
+            self._mm[self.TAILLE_ENTETE :] = bytes(self.taille - self.TAILLE_ENTETE)
+        finally:
+            self._verrouiller_fichier(False, 0, 0)
+            for verrou in self._verrous:
+                verrou.release()
+
+    def fermer(self):
+        self._mm.close()
+        os.close(self._fd)
+
+    def stats(self) -> dict:
+        return {
+            "stockage": "partage",
+            "chemin": self.chemin,
+            "cases": self.nb_ensembles * self.voies,
+            "octets": self.taille,
+            "evictions": self.evictions,
+        }
+
+
+def chemin_partage_defaut() -> str:
+    dossier = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(dossier, "mobilitysoft_rate_limit")
+
+
+class ClientSeaux(Protocol):
+    """
+    Opération atomique attendue d'un magasin distant : recharger puis prendre
+    un jeton en un aller-retour (script Lua sous Redis, par exemple).
+    """
+
+    def seau_jetons(self, cle: str, capacite: float, taux: float, maintenant: float) -> float:
+        ...
+
+
+class ClientMemoire:
+    """Remplaçant en mémoire d'un magasin distant (tests, développement)."""
+
+    def __init__(self, max_clients: int = 100_000):
+        self._seaux = StockageLocal(max_clients)
+        self._lock = threading.Lock()
+        self.appels = 0
+
+    def seau_jetons(self, cle: str, capacite: float, taux: float, maintenant: float) -> float:
+        with self._lock:
+            self.appels += 1
+            return self._seaux.consommer(cle, capacite, taux, maintenant)
+
+    def vider(self):
+        with self._lock:
+            self._seaux.reinitialiser()
+
+
+class StockageDistant:
+    """
+    Seaux tenus par un magasin distant partagé entre hôtes. L'horloge murale
+    est utilisée (`time.monotonic` n'est pas comparable d'une machine à
+    l'autre). Si le magasin est indisponible, la requête est laissée passer :
+    le limiteur ne doit pas rendre l'API indisponible.
+    """
+
+    horloge = staticmethod(time.time)
+
+    def __init__(self, client: ClientSeaux, prefixe: str = "rl:"):
+        self.client = client
+        self.prefixe = prefixe
+        self.erreurs = 0
+
+    def consommer(self, cle: str, capacite: float, taux: float, maintenant: float) -> float:
+        try:
+            return self.client.seau_jetons(self.prefixe + cle, capacite, taux, maintenant)
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.erreurs += 1
+            return 0.0
+
+    def reinitialiser(self):
+        vider = getattr(self.client, "vider", None)
+        if vider is not None:
+            vider()
+
+    def stats(self) -> dict:
+        return {"stockage": "distant", "prefixe": self.prefixe, "erreurs": self.erreurs}
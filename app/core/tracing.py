@@ -0,0 +1,326 @@
+# app/core/tracing.py
+# pylint: disable=no-member
+"""
+Traçage léger par spans, corrélé à `X-Request-ID`.
+
+Échantillonnage en tête : la décision est prise une fois par requête (hachage
+de l'identifiant de requête, ou drapeau `sampled` d'un `traceparent` W3C
+entrant) ; une requête non échantillonnée ne crée aucun span. Les spans d'une
+trace sont remis en bloc à un exportateur qui écrit par lots, dans un thread,
+vers un fichier JSONL ou un collecteur OTLP/HTTP (JSON).
+"""
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+import zlib
+from typing import Dict, List, Optional, Protocol, Tuple
+
+from app.core.config import settings
+from app.core.metrics import REGISTRE
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "nom", "debut_ns", "fin_ns", "attributs")
+
+    def __init__(self, trace_id, span_id, parent_id, nom, debut_ns, fin_ns, attributs=None):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.nom = nom
+        self.debut_ns = debut_ns
+        self.fin_ns = fin_ns
+        self.attributs = attributs or {}
+
+    def en_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "nom": self.nom,
+            "debut_ns": self.debut_ns,
+            "duree_ms": round((self.fin_ns - self.debut_ns) / 1e6, 4),
+            "attributs": self.attributs,
+        }
+
+
+class TraceRequete:
+    """Spans d'une requête échantillonnée, tous rattachés au span racine."""
+
+    __slots__ = ("trace_id", "racine_id", "parent_distant", "origine_ns", "origine_perf", "spans")
+
+    def __init__(self, trace_id: str, parent_distant: Optional[str], origine_perf: float):
+        self.trace_id = trace_id
+        self.racine_id = secrets.token_hex(8)
+        self.parent_distant = parent_distant
+        self.origine_ns = time.time_ns()
+        self.origine_perf = origine_perf
+        self.spans: List[Span] = []
+
+    def ajouter(self, nom: str, debut_perf: float, fin_perf: float, **attributs):
+        """Span enfant de la racine, bornes en `time.perf_counter()`."""
+        self.spans.append(
+            Span(
+                self.trace_id,
+                secrets.token_hex(8),
+                self.racine_id,
+                nom,
+                self.origine_ns + int((debut_perf - self.origine_perf) * 1e9),
+                self.origine_ns + int((fin_perf - self.origine_perf) * 1e9),
+                attributs,
+            )
+        )
+
+    def terminer(self, nom: str, fin_perf: float, **attributs) -> List[Span]:
+        racine = Span(
+            self.trace_id,
+            self.racine_id,
+            self.parent_distant,
+            nom,
+            self.origine_ns,
+            self.origine_ns + int((fin_perf - self.origine_perf) * 1e9),
+            attributs,
+        )
+        return [racine, *self.spans]
+
+
+def lire_traceparent(valeur: str) -> Optional[Tuple[str, str, bool]]:
+    """`00-<trace_id 32 hex>-<parent_id 16 hex>-<drapeaux>` → (trace_id, parent_id, drapeau)."""
+    parties = valeur.strip().split("-")
+    if len(parties) != 4 or len(parties[1]) != 32 or len(parties[2]) != 16:
+        return None
+    try:
+        drapeaux = int(parties[3], 16)
+        int(parties[1], 16)
+        int(parties[2], 16)
+    except ValueError:
+        return None
+    return parties[1], parties[2], bool(drapeaux & 1)
+
+
+class Sortie(Protocol):
+    def ecrire(self, spans: List[Span]):
+        ...
+
+
+class SortieJsonl:
+    """Une ligne JSON par span, en ajout dans un fichier local."""
+
+    def __init__(self, chemin: str):
+        self.chemin = chemin
+
+    def ecrire(self, spans: List[Span]):
+        os.makedirs(os.path.dirname(self.chemin) or ".", exist_ok=True)
+        with open(self.chemin, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(s.en_dict(), ensure_ascii=False) + "\n" for s in spans)
+
+
+def vers_otlp(spans: List[Span], service: str) -> Dict:
+    """Corps OTLP/HTTP JSON (`ExportTraceServiceRequest`)."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [{"key": "service.name", "value": {"stringValue": service}}]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "mobilitysoft"},
+                        "spans": [
+                            {
+                                "traceId": s.trace_id,
+                                "spanId": s.span_id,
+                                **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                                "name": s.nom,
+                                "kind": 2 if s.parent_id is None else 1,
+                                "startTimeUnixNano": str(s.debut_ns),
+                                "endTimeUnixNano": str(s.fin_ns),
+                                "attributes": [
+                                    {"key": k, "value": {"stringValue": str(v)}}
+                                    for k, v in s.attributs.items()
+                                ],
+                            }
+                            for s in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class SortieOtlp:
+    """POST des lots vers un collecteur OTLP/HTTP local (ex. http://localhost:4318/v1/traces)."""
+
+    def __init__(self, url: str, service: str = "mobilitysoft", timeout_s: float = 2.0):
+        self.url = url
+        self.service = service
+        self.timeout_s = timeout_s
+
+    def ecrire(self, spans: List[Span]):
+        corps = json.dumps(vers_otlp(spans, self.service)).encode()
+        requete = urllib.request.Request(
+            self.url, data=corps, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(requete, timeout=self.timeout_s):
+            pass
+
+
+class CollecteurMemoire:
+    """Remplaçant local d'un collecteur : garde les lots reçus (tests, développement)."""
+
+    def __init__(self):
+        self.lots: List[List[Span]] = []
+
+    def ecrire(self, spans: List[Span]):
+        self.lots.append(list(spans))
+
+    @property
+    def spans(self) -> List[Span]:
+        return [s for lot in self.lots for s in lot]
+
+
+class ExportateurSpans:
+    """
+    File bornée vidée par un thread : les spans partent par lots de `taille_lot`
+    ou toutes les `intervalle_s` secondes. File pleine : la trace est abandonnée.
+    """
+
+    def __init__(
+        self, sortie: Sortie, taille_lot: int = 512, intervalle_s: float = 1.0, capacite=10000
+    ):
+        self.sortie = sortie
+        self.taille_lot = max(1, taille_lot)
+        self.intervalle_s = intervalle_s
+        self._file: queue.Queue = queue.Queue(maxsize=max(1, capacite))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.exportes = 0
+        self.abandons = 0
+        self.erreurs = 0
+
+    def soumettre(self, spans: List[Span]):
+        if self._thread is None or not self._thread.is_alive():
+            self._demarrer()
+        try:
+            self._file.put_nowait(spans)
+        except queue.Full:
+            self.abandons += len(spans)
+
+    def _demarrer(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._boucle, name="tracing-export", daemon=True
+                )
+                self._thread.start()
+
+    def _boucle(self):
+        arret = False
+        while not arret:
+            lot: List[Span] = []
+            echeance = time.monotonic() + self.intervalle_s
+            while len(lot) < self.taille_lot:
+                try:
+                    element = self._file.get(timeout=max(0.0, echeance - time.monotonic()))
+                except queue.Empty:
+                    break
+                if element is None:
+                    arret = True
+                    break
+                lot.extend(element)
+            if lot:
+                self._exporter(lot)
+
+    def _exporter(self, lot: List[Span]):
+        try:
+            self.sortie.ecrire(lot)
+            self.exportes += len(lot)
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.erreurs += 1
+            logger.warning(f"Export de {len(lot)} spans en échec", exc_info=True)
+
+    def vider(self):
+        """Exporte ce qui est en file puis arrête le thread (redémarré au besoin)."""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._file.put(None)
+            thread.join()
+        self._thread = None
+
+    def stats(self):
+        return {
+            "exportes": self.exportes,
+            "abandons": self.abandons,
+            "erreurs": self.erreurs,
+            "en_file": self._file.qsize(),
+        }
+
+
+class Traceur:
+    """Décision d'échantillonnage en tête et remise des traces terminées à l'exportateur."""
+
+    def __init__(self, actif: bool, taux: float, exportateur: Optional[ExportateurSpans]):
+        self.actif = actif and exportateur is not None
+        self.taux = min(1.0, max(0.0, taux))
+        self.exportateur = exportateur
+
+    def echantillonner(self, request_id: str) -> bool:
+        # Hachage stable : la même requête est retenue ou non par tous les services
+        return zlib.crc32(request_id.encode()) < self.taux * 0x1_0000_0000
+
+    def commencer(
+        self, request_id: str, traceparent: Optional[str], origine_perf: float
+    ) -> Optional[TraceRequete]:
+        if not self.actif:
+            return None
+        parent = lire_traceparent(traceparent) if traceparent else None
+        if parent is not None:
+            trace_id, parent_id, echantillonne = parent
+        else:
+            trace_id, parent_id = None, None
+            echantillonne = self.echantillonner(request_id)
+        if not echantillonne:
+            return None
+        return TraceRequete(trace_id or secrets.token_hex(16), parent_id, origine_perf)
+
+    def terminer(self, spans: List[Span]):
+        self.exportateur.soumettre(spans)
+
+
+def creer_traceur() -> Traceur:
+    if not settings.TRACING_ENABLED:
+        return Traceur(False, 0.0, None)
+    if settings.TRACING_EXPORTER == "otlp":
+        sortie: Sortie = SortieOtlp(settings.TRACING_OTLP_ENDPOINT, service=settings.APP_NAME)
+    else:
+        sortie = SortieJsonl(settings.TRACING_FILE)
+    exportateur = ExportateurSpans(
+        sortie,
+        taille_lot=settings.TRACING_BATCH_SIZE,
+        intervalle_s=settings.TRACING_FLUSH_S,
+        capacite=settings.TRACING_QUEUE_MAX,
+    )
+    return Traceur(True, settings.TRACING_SAMPLE_RATE, exportateur)
+
+
+traceur = creer_traceur()
+
+REGISTRE.fonction(
+    "mobilitysoft_tracing_spans_exportes_total",
+    "Spans exportés",
+    "counter",
+    lambda: traceur.exportateur.exportes if traceur.exportateur else 0,
+)
+REGISTRE.fonction(
+    "mobilitysoft_tracing_spans_abandonnes_total",
+    "Spans abandonnés (file d'export pleine)",
+    "counter",
+    lambda: traceur.exportateur.abandons if traceur.exportateur else 0,
+)
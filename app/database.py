@@ -1,20 +1,69 @@
+import time
 from datetime import datetime
 
-from sqlalchemy import create_engine, Column, Integer, Float, DateTime
+from sqlalchemy import create_engine, event, Column, Integer, Float, DateTime, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 # Importer la configuration
 from app.core.config import settings
+from app.core.metrics import ATTENTE_POOL, DUREE_COMMIT, REGISTRE
+from app.core.contexte import span
 
 # Obtenir l'URL de la base de données depuis les paramètres
 DATABASE_URL = settings.DATABASE_URL
 print(f"INFO: Connexion à la base de données : {DATABASE_URL}")
 
-# Créer le moteur SQLAlchemy
-engine = create_engine(DATABASE_URL)
+
+class PoolChronometre(QueuePool):
+    """QueuePool qui mesure l'attente d'une connexion (aucun événement pool ne la couvre)."""
+
+    def _do_get(self):
+        debut = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            fin = time.perf_counter()
+            ATTENTE_POOL.observer(fin - debut)
+            span("db.connexion", debut, fin)
+
+
+# Créer le moteur SQLAlchemy (SQLite garde son pool par défaut, propre au dialecte)
+engine = create_engine(
+    DATABASE_URL, poolclass=None if DATABASE_URL.startswith("sqlite") else PoolChronometre
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if isinstance(engine.pool, QueuePool):
+    REGISTRE.fonction(
+        "mobilitysoft_db_pool_connexions_pretees",
+        "Connexions du pool actuellement prêtées",
+        "gauge",
+        engine.pool.checkedout,
+    )
+
+
+# Durée des commits, flush compris, pour toutes les sessions
+@event.listens_for(Session, "before_commit")
+def _debut_commit(session):
+    session.info["debut_commit"] = time.perf_counter()
+
+
+@event.listens_for(Session, "after_commit")
+def _fin_commit(session):
+    debut = session.info.pop("debut_commit", None)
+    if debut is not None:
+        fin = time.perf_counter()
+        DUREE_COMMIT.observer(fin - debut)
+        span("db.commit", debut, fin)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _commit_abandonne(session, _transaction):
+    session.info.pop("debut_commit", None)
+
+
 # Créer la base déclarative pour les modèles SQLAlchemy
 Base = declarative_base()
 
@@ -39,10 +88,30 @@ class Prediction(Base):
     temps_trajet_prevu = Column(Float)
     timestamp = Column(DateTime, default=datetime.now)
 
+    # Couvre le tri (timestamp, id) de la pagination par curseur ainsi que
+    # les filtres date_debut/date_fin (colonne de tête)
+    __table_args__ = (Index("ix_predictions_timestamp_id", "timestamp", "id"),)
+
+
+# Modèle pour stocker les retours terrain (issue réelle d'un trajet prédit)
+class Retour(Base):
+    __tablename__ = "retours"
+
+    id = Column(Integer, primary_key=True, index=True)
+    prediction_id = Column(Integer, ForeignKey("predictions.id"), index=True, nullable=False)
+    temps_trajet_reel = Column(Float)  # minutes
+    congestion = Column(Integer)  # 0/1 observé
+    timestamp = Column(DateTime, default=datetime.now)
+
 
 # Fonction pour initialiser la base de données (création des tables)
-def init_db():
-    Base.metadata.create_all(bind=engine)
+def init_db(moteur=None):
+    moteur = moteur or engine
+    Base.metadata.create_all(bind=moteur)
+    # create_all n'ajoute pas d'index à une table existante : ceux ajoutés depuis
+    # (pagination par curseur) sont créés s'ils manquent, sans effet sinon
+    for index in Prediction.__table__.indexes:
+        index.create(bind=moteur, checkfirst=True)
 
 
 # Fonction pour obtenir une session de base de données
@@ -1,16 +1,29 @@
 # app/main.py
+import signal
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.core.metrics import REGISTRE, TYPE_CONTENU
 from app.core.middleware import RequestContextMiddleware
-from app.api.v1.endpoints import router as api_v1_router
+from app.core.profilage import ProfilageMiddleware, profileur
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.tracing import traceur
+from app.api.v1.endpoints import (
+    router as api_v1_router,
+    APPRENTISSAGE,
+    ENTRAINEMENTS,
+    ORDONNANCEUR,
+    TAMPON,
+)
 from app.database import init_db
 
-logger = setup_logging(settings.LOG_LEVEL)
+logger = setup_logging(
+    settings.LOG_LEVEL, taille_file=settings.LOG_QUEUE_MAX, taux_info=settings.LOG_INFO_SAMPLE_RATE
+)
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -34,13 +47,46 @@ def startup_db_client():
     logger.info("Base de données initialisée")
 
 
-app.add_middleware(RequestContextMiddleware)
+@app.on_event("startup")
+async def demarrer_services():
+    """Planifie les mises à jour incrémentales et installe le signal de profilage."""
+    APPRENTISSAGE.demarrer()
+    if settings.PROFILING_ENABLED and hasattr(signal, "SIGUSR2"):
+        # kill -USR2 <pid> : profil CPU de PROFILING_SIGNAL_DURATION_S dans PROFILING_DIR
+        try:
+            signal.signal(
+                signal.SIGUSR2,
+                lambda *_: profileur.profil_cpu_arriere_plan(settings.PROFILING_SIGNAL_DURATION_S),
+            )
+        except ValueError:
+            logger.warning("Signal SIGUSR2 non installé : démarrage hors du thread principal")
+
+
+@app.on_event("shutdown")
+async def arreter_services():
+    """Vide les files (micro-batching, écriture, spans), arrête le pool d'entraînement."""
+    await APPRENTISSAGE.arreter()
+    await ORDONNANCEUR.arreter()
+    await TAMPON.arreter()
+    ENTRAINEMENTS.arreter()
+    if traceur.exportateur is not None:
+        traceur.exportateur.vider()
+
+
+# Ordre d'exécution : CORS → contexte de requête → [profil] → limite de débit → routage
+app.add_middleware(RateLimitMiddleware, prefixe=settings.API_V1_STR)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilageMiddleware, profileur_requetes=profileur, jeton=settings.ADMIN_TOKEN
+    )
+app.add_middleware(RequestContextMiddleware, journal_acces=settings.LOG_ACCESS)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "X-Curseur-Suivant", "Server-Timing"],
 )
 
 app.include_router(api_v1_router)
@@ -52,3 +98,9 @@ INDEX_PATH = UI_DIR / "index.html"
 @app.get("/", include_in_schema=False)
 async def servir_ui():
     return FileResponse(INDEX_PATH)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metriques_prometheus():
+    """Métriques au format texte Prometheus (hors préfixe API : non limité en débit)."""
+    return Response(REGISTRE.exposer(), media_type=TYPE_CONTENU)
@@ -1,6 +1,6 @@
 # app/models/schemas.py
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class EntreePrediction(BaseModel):
@@ -24,3 +24,84 @@ class SortiePrediction(BaseModel):
     risque: str
     proba: float
     recommandations: List[str]
+    version_modele: int = Field(description="Version du modèle ayant produit la prédiction")
+
+
+class ConditionsTrafic(BaseModel):
+    meteo: int = Field(ge=0, le=2, description="0=Clair, 1=Pluie, 2=Neige")
+    incidents: int = Field(ge=0, le=1, description="Incident (0/1)")
+    vitesse_moyenne: float = Field(gt=0, description="Vitesse moyenne (km/h)")
+    debit_vehicules: float = Field(gt=0, description="Débit (véh./min)")
+
+
+class EntreeDepartOptimal(ConditionsTrafic):
+    # Trajet
+    lat_a: Optional[float] = Field(default=None, description="Latitude point A")
+    lon_a: Optional[float] = Field(default=None, description="Longitude point A")
+    lat_b: Optional[float] = Field(default=None, description="Latitude point B")
+    lon_b: Optional[float] = Field(default=None, description="Longitude point B")
+    distance_km: Optional[float] = Field(default=None, description="Distance A–B (km)")
+    # Fenêtre de départ (heure_fin < heure_debut : la fenêtre passe minuit)
+    heure_debut: int = Field(default=0, ge=0, le=23, description="Première heure candidate")
+    heure_fin: int = Field(default=23, ge=0, le=23, description="Dernière heure candidate")
+    jours: List[int] = Field(
+        default_factory=lambda: list(range(7)), min_length=1, description="Jours candidats (0-6)"
+    )
+    nombre: int = Field(default=5, ge=1, le=168, description="Nombre de départs retournés")
+
+    @model_validator(mode="after")
+    def verifier_jours(self):
+        if any(j < 0 or j > 6 for j in self.jours):
+            raise ValueError("jours doit contenir des valeurs entre 0 et 6")
+        self.jours = sorted(set(self.jours))
+        return self
+
+
+class CandidatDepart(BaseModel):
+    heure: int
+    jour_semaine: int
+    risque: str
+    proba: float
+    temps_trajet_prevu: float
+
+
+class SortieDepartOptimal(BaseModel):
+    distance_km: float
+    version_modele: int
+    departs: List[CandidatDepart]
+
+
+class EntreeRetour(BaseModel):
+    congestion: Optional[int] = Field(default=None, ge=0, le=1, description="Congestion (0/1)")
+    temps_trajet_reel: Optional[float] = Field(
+        default=None, gt=0, description="Temps de trajet observé (minutes)"
+    )
+
+    @model_validator(mode="after")
+    def verifier_issue(self):
+        if self.congestion is None and self.temps_trajet_reel is None:
+            raise ValueError("congestion ou temps_trajet_reel est requis")
+        return self
+
+
+class PointGeo(BaseModel):
+    lat: float = Field(ge=-90, le=90, description="Latitude")
+    lon: float = Field(ge=-180, le=180, description="Longitude")
+
+
+class EntreeMatrice(ConditionsTrafic):
+    origines: List[PointGeo] = Field(min_length=1, description="Points de départ (dépôts)")
+    destinations: List[PointGeo] = Field(min_length=1, description="Points d'arrivée (clients)")
+    heure: int = Field(ge=0, le=23, description="Heure (0-23)")
+    jour_semaine: int = Field(ge=0, le=6, description="0=Lun … 6=Dim")
+    simple_precision: bool = Field(
+        default=False, description="Distances en float32 (moitié moins de mémoire)"
+    )
+
+
+class SortieMatrice(BaseModel):
+    version_modele: int
+    # Grilles [origine][destination]
+    distance_km: List[List[float]]
+    proba: List[List[float]]
+    temps_trajet_prevu: List[List[float]]
@@ -0,0 +1,117 @@
+# app/services/apprentissage.py
+import asyncio
+import logging
+from collections import deque
+from threading import Lock
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.services.model import ModeleTrafic
+
+logger = logging.getLogger(__name__)
+
+
+class ApprentissageEnLigne:
+    """
+    Mises à jour incrémentales du modèle servi à partir des retours terrain.
+
+    Les observations (caractéristiques + congestion réelle) s'accumulent dans
+    un tampon borné ; toutes les `intervalle_s` secondes, dès que `taille_min`
+    observations sont disponibles, elles sont appliquées en un mini-lot via
+    `ModeleTrafic.mise_a_jour_incrementale` (publication versionnée). Si un
+    ré-entraînement a publié entre-temps, le mini-lot est remis en tête du
+    tampon et sera appliqué à la nouvelle version au passage suivant.
+    """
+
+    def __init__(
+        self,
+        modele: ModeleTrafic,
+        intervalle_s: float = 60.0,
+        taille_min: int = 32,
+        taux: float = 0.05,
+        capacite: int = 10000,
+    ):
+        self.modele = modele
+        self.intervalle_s = intervalle_s
+        self.taille_min = max(1, taille_min)
+        self.taux = taux
+        self.mises_a_jour = 0
+        self.appliques = 0
+        self.abandonnes = 0
+        self.reportes = 0
+        self._tampon: deque = deque(maxlen=max(1, capacite))
+        self._lock = Lock()
+        self._tache: Optional[asyncio.Task] = None
+
+    def ajouter(self, caracteristiques: Sequence[float], congestion: int):
+        with self._lock:
+            if len(self._tampon) == self._tampon.maxlen:
+                self.abandonnes += 1  # la plus ancienne observation est évincée
+            self._tampon.append((tuple(caracteristiques), int(congestion)))
+
+    def appliquer(self) -> Optional[int]:
+        """Applique tout le tampon en un mini-lot ; renvoie la version publiée."""
+        with self._lock:
+            lot = list(self._tampon)
+            self._tampon.clear()
+        if not lot:
+            return None
+        X = np.array([x for x, _ in lot], dtype=np.float64)
+        y = np.array([c for _, c in lot], dtype=np.float64)
+        version = self.modele.mise_a_jour_incrementale(X, y, taux=self.taux)
+        if version is None:
+            self._remettre(lot)
+            logger.info("Mise à jour incrémentale reportée : modèle ré-entraîné entre-temps")
+            return None
+        self.mises_a_jour += 1
+        self.appliques += len(lot)
+        return version
+
+    def _remettre(self, lot):
+        # Le lot précède les observations arrivées pendant la mise à jour ; au-delà
+        # de la capacité, les plus anciennes sont évincées comme dans `ajouter`
+        with self._lock:
+            fusion = lot + list(self._tampon)
+            exces = max(0, len(fusion) - self._tampon.maxlen)
+            self._tampon.clear()
+            self._tampon.extend(fusion[exces:])
+            self.abandonnes += exces
+            self.reportes += len(lot)
+
+    def demarrer(self):
+        boucle = asyncio.get_running_loop()
+        if self._tache is not None and not self._tache.done():
+            if self._tache.get_loop() is boucle:
+                return
+        self._tache = boucle.create_task(self._planifier())
+
+    async def arreter(self):
+        if self._tache is None:
+            return
+        if not self._tache.done() and self._tache.get_loop() is asyncio.get_running_loop():
+            self._tache.cancel()
+            try:
+                await self._tache
+            except asyncio.CancelledError:
+                pass
+        self._tache = None
+
+    async def _planifier(self):
+        while True:
+            await asyncio.sleep(self.intervalle_s)
+            if len(self._tampon) >= self.taille_min:
+                try:
+                    await asyncio.to_thread(self.appliquer)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception("Échec de la mise à jour incrémentale")
+
+    def stats(self):
+        return {
+            "en_attente": len(self._tampon),
+            "mises_a_jour": self.mises_a_jour,
+            "appliques": self.appliques,
+            "abandonnes": self.abandonnes,
+            "reportes": self.reportes,
+            "version_modele": self.modele.version,
+        }
@@ -0,0 +1,159 @@
+# app/services/artefact.py
+"""
+Artefact de modèle persistant : paramètres entraînés dans un fichier binaire
+versionné et mappable en mémoire.
+
+Format (petit-boutiste) :
+    [8 octets]  signature MAGIC
+    [4 octets]  longueur L de l'en-tête JSON (uint32)
+    [L octets]  en-tête JSON (format, seed, version d'entraînement, …), complété
+                par des espaces pour aligner les données sur 64 octets
+    [reste]     float64 : mean_ | scale_ | var_ | coef_ | intercept_
+
+Usage CLI (ex. dans l'image Docker) :
+    python -m app.services.artefact --sortie artefacts/modele_trafic.bin --seed 42
+"""
+import argparse
+import json
+import logging
+import os
+import struct
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from app.core.config import settings
+from app.services.model import ModeleTrafic
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MSMODEL\0"
+FORMAT_ARTEFACT = 1
+ALIGNEMENT = 64
+_TAILLE_LONGUEUR = struct.calcsize("<I")
+
+
+class ArtefactInvalide(Exception):
+    """Artefact absent, corrompu ou périmé."""
+
+
+def sauvegarder(modele: ModeleTrafic, chemin: str, seed: int) -> Path:
+    """Écrit l'artefact de façon atomique (fichier temporaire + os.replace)."""
+    pipe = modele.pipe
+    scaler, clf = pipe.named_steps["scaler"], pipe.named_steps["clf"]
+    n = int(clf.coef_.shape[1])
+    entete = {
+        "format": FORMAT_ARTEFACT,
+        "version_entrainement": ModeleTrafic.VERSION_ENTRAINEMENT,
+        "seed": seed,
+        "n_caracteristiques": n,
+        "n_echantillons": int(scaler.n_samples_seen_),
+        "classes": [int(c) for c in clf.classes_],
+        "cree_le": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    brut = json.dumps(entete).encode("utf-8")
+    debut = len(MAGIC) + _TAILLE_LONGUEUR + len(brut)
+    brut += b" " * (-debut % ALIGNEMENT)
+    donnees = np.concatenate(
+        [scaler.mean_, scaler.scale_, scaler.var_, clf.coef_[0], clf.intercept_]
+    ).astype("<f8")
+
+    cible = Path(chemin)
+    cible.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cible.with_name(f"{cible.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(brut)))
+        f.write(brut)
+        f.write(donnees.tobytes())
+    os.replace(tmp, cible)
+    return cible
+
+
+def lire_entete(chemin: str) -> tuple:
+    with open(chemin, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ArtefactInvalide(f"{chemin} : signature invalide")
+        (longueur,) = struct.unpack("<I", f.read(_TAILLE_LONGUEUR))
+        entete = json.loads(f.read(longueur).decode("utf-8"))
+    return entete, len(MAGIC) + _TAILLE_LONGUEUR + longueur
+
+
+def charger(chemin: str, seed: Optional[int] = None) -> ModeleTrafic:
+    """Charge un artefact ; lève ArtefactInvalide s'il est périmé pour ce code/seed."""
+    if not os.path.exists(chemin):
+        raise ArtefactInvalide(f"{chemin} : fichier absent")
+    entete, decalage = lire_entete(chemin)
+    if entete.get("format") != FORMAT_ARTEFACT:
+        raise ArtefactInvalide(f"{chemin} : format {entete.get('format')} non supporté")
+    if entete.get("version_entrainement") != ModeleTrafic.VERSION_ENTRAINEMENT:
+        raise ArtefactInvalide(f"{chemin} : version d'entraînement périmée")
+    if seed is not None and entete.get("seed") != seed:
+        raise ArtefactInvalide(f"{chemin} : seed {entete.get('seed')} != {seed}")
+
+    n = entete["n_caracteristiques"]
+    vue = np.memmap(chemin, dtype="<f8", mode="r", offset=decalage, shape=(4 * n + 1,))
+    mean, scale, var, coef = (np.array(vue[i * n : (i + 1) * n]) for i in range(4))
+    intercept = np.array(vue[4 * n : 4 * n + 1])
+    del vue
+
+    scaler = StandardScaler()
+    scaler.mean_, scaler.scale_, scaler.var_ = mean, scale, var
+    scaler.n_features_in_ = n
+    scaler.n_samples_seen_ = entete["n_echantillons"]
+    clf = LogisticRegression(max_iter=200)
+    clf.coef_, clf.intercept_ = coef.reshape(1, n), intercept
+    clf.classes_ = np.array(entete["classes"])
+    clf.n_features_in_ = n
+    clf.n_iter_ = np.array([0], dtype=np.int32)
+    pipe = Pipeline([("scaler", scaler), ("clf", clf)])
+    return ModeleTrafic(seed=entete["seed"], pipe=pipe)
+
+
+def charger_ou_entrainer(chemin: Optional[str], seed: int) -> ModeleTrafic:
+    """Démarrage : artefact s'il est valide, sinon entraînement en mémoire."""
+    if chemin:
+        debut = time.perf_counter()
+        try:
+            modele = charger(chemin, seed=seed)
+            logger.info(
+                f"Modèle chargé depuis {chemin} en {(time.perf_counter() - debut) * 1000:.1f} ms"
+            )
+            return modele
+        except (ArtefactInvalide, OSError, ValueError, KeyError) as exc:
+            logger.warning(f"Artefact ignoré ({exc}) : ré-entraînement au démarrage")
+    return ModeleTrafic(seed=seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Construit l'artefact du modèle de trafic.")
+    parser.add_argument("--sortie", default=settings.MODEL_ARTIFACT_PATH or "modele_trafic.bin")
+    parser.add_argument("--seed", type=int, default=settings.MODEL_SEED)
+    parser.add_argument(
+        "--n-echantillons",
+        type=int,
+        default=None,
+        help="Entraînement en flux sur N lignes synthétiques (défaut : entraînement standard)",
+    )
+    parser.add_argument("--taille-bloc", type=int, default=ModeleTrafic.TAILLE_BLOC)
+    args = parser.parse_args(argv)
+
+    debut = time.perf_counter()
+    pipe, rapport = ModeleTrafic.entrainer_avec_rapport(
+        args.seed, args.n_echantillons, args.taille_bloc
+    )
+    chemin = sauvegarder(ModeleTrafic(seed=args.seed, pipe=pipe), args.sortie, seed=args.seed)
+    print(
+        f"Artefact écrit : {chemin} ({(time.perf_counter() - debut):.2f} s, "
+        f"{rapport['lignes']} lignes, {rapport['lignes_par_s']} lignes/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
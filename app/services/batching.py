@@ -0,0 +1,179 @@
+# app/services/batching.py
+import asyncio
+import time
+from contextlib import contextmanager
+from concurrent.futures import Executor
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.metrics import Histogramme
+from app.services.model import ModeleTrafic
+
+BORNES_TAILLE_LOT = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+BORNES_ATTENTE_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100)
+
+
+class RegroupeurLots:
+    """
+    File asynchrone vidée par lots par une tâche de fond : un lot part dès que
+    `taille_max` éléments sont en attente, ou `attente_max_s` après l'arrivée
+    du premier. Les sous-classes traitent chaque lot dans `_traiter_lot`.
+    """
+
+    def __init__(self, taille_max: int, attente_max_s: float, capacite: int = 0):
+        self.taille_max = max(1, taille_max)
+        self.attente_max = max(0.0, attente_max_s)
+        self.capacite = capacite  # 0 : file non bornée
+        self._file: Optional[asyncio.Queue] = None
+        self._plein: Optional[asyncio.Event] = None
+        self._tache: Optional[asyncio.Task] = None
+        self._boucle: Optional[asyncio.AbstractEventLoop] = None
+
+    def demarrer(self):
+        """Démarre la tâche de fond sur la boucle courante (idempotent)."""
+        boucle = asyncio.get_running_loop()
+        if self._tache is not None and not self._tache.done() and self._boucle is boucle:
+            return
+        self._boucle = boucle
+        self._file = asyncio.Queue(maxsize=self.capacite)
+        self._plein = asyncio.Event()
+        self._tache = boucle.create_task(self._traiter_file())
+
+    async def arreter(self):
+        """Traite les éléments encore en file puis arrête la tâche de fond."""
+        if self._tache is None or self._tache.done():
+            return
+        if self._boucle is not asyncio.get_running_loop():
+            self._tache = None
+            return
+        await self._file.put(None)
+        self._plein.set()
+        await self._tache
+        self._tache = None
+
+    def _signaler_depot(self):
+        """À appeler après chaque dépôt : réveille la tâche si un lot complet attend."""
+        if self._file.qsize() >= self.taille_max:
+            self._plein.set()
+
+    async def _traiter_file(self):
+        arret = False
+        while not arret:
+            premier = await self._file.get()
+            if premier is None:
+                break
+            if self._file.qsize() + 1 < self.taille_max and self.attente_max > 0:
+                try:
+                    await asyncio.wait_for(self._plein.wait(), self.attente_max)
+                except asyncio.TimeoutError:
+                    pass
+            self._plein.clear()
+
+            lot = [premier]
+            while len(lot) < self.taille_max and not self._file.empty():
+                element = self._file.get_nowait()
+                if element is None:
+                    arret = True
+                    break
+                lot.append(element)
+            if not arret:
+                self._signaler_depot()
+            await self._traiter_lot(lot)
+
+    async def _traiter_lot(self, lot: List):
+        raise NotImplementedError
+
+
+class OrdonnanceurLots(RegroupeurLots):
+    """
+    Regroupe les requêtes concurrentes en un seul appel vectorisé au modèle.
+
+    Chaque appel à `predire` dépose une ligne de caractéristiques dans une file ;
+    une tâche de fond attend au plus `attente_max_ms` (ou que `taille_max` lignes
+    soient disponibles) puis score tout le lot en un seul `predict_proba`.
+
+    Une requête isolée (aucune autre en file ou en cours de scoring) est scorée
+    tout de suite : sans requête concurrente, aucun lot ne peut se former et
+    l'attente ne ferait qu'ajouter de la latence.
+    """
+
+    def __init__(
+        self,
+        modele: ModeleTrafic,
+        taille_max: int = 64,
+        attente_max_ms: float = 2.0,
+        executeur: Optional[Executor] = None,
+    ):
+        super().__init__(taille_max, attente_max_ms / 1000.0)
+        self.modele = modele
+        # Exécuteur de l'inférence (None : directement sur la boucle d'événements)
+        self.executeur = executeur
+        self.hist_taille = Histogramme(BORNES_TAILLE_LOT)
+        self.hist_attente_ms = Histogramme(BORNES_ATTENTE_MS)
+        self.directes = 0
+        self._actives = 0  # appels à `predire` en file ou en cours de scoring
+
+    @contextmanager
+    def reserver(self) -> Iterator[bool]:
+        """
+        Compte l'appelant parmi les requêtes actives le temps du bloc ; vrai s'il
+        est seul, auquel cas il peut scorer lui-même sa ligne sans attendre.
+        """
+        self._actives += 1
+        try:
+            isolee = self._actives == 1
+            if isolee:
+                self.directes += 1
+            yield isolee
+        finally:
+            self._actives -= 1
+
+    async def predire(self, ligne: Sequence[float]) -> Tuple[int, float, int]:
+        with self.reserver() as isolee:
+            if isolee:
+                self.demarrer()
+                fut = self._boucle.create_future()
+                await self._traiter_lot([(ligne, time.perf_counter(), fut)])
+                return await fut
+            return await self.soumettre(ligne)
+
+    async def soumettre(self, ligne: Sequence[float]) -> Tuple[int, float, int]:
+        """Dépose la ligne dans la file : elle sera scorée avec le prochain lot."""
+        self.demarrer()
+        fut = self._boucle.create_future()
+        self._file.put_nowait((ligne, time.perf_counter(), fut))
+        self._signaler_depot()
+        return await fut
+
+    async def _traiter_lot(self, lot: List[tuple]):
+        debut = time.perf_counter()
+        self.hist_taille.observer(len(lot))
+        for _, soumis, _ in lot:
+            self.hist_attente_ms.observer((debut - soumis) * 1000.0)
+
+        X = np.array([ligne for ligne, _, _ in lot], dtype=float)
+        try:
+            if self.executeur is None:
+                y, proba, version = self.modele.predire_versionne(X)
+            else:
+                y, proba, version = await self._boucle.run_in_executor(
+                    self.executeur, self.modele.predire_versionne, X
+                )
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            for _, _, fut in lot:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for i, (_, _, fut) in enumerate(lot):
+            if not fut.done():
+                fut.set_result((int(y[i]), float(proba[i]), version))
+
+    def stats(self):
+        return {
+            "taille_max": self.taille_max,
+            "attente_max_ms": self.attente_max * 1000.0,
+            "directes": self.directes,
+            "taille_lot": self.hist_taille.snapshot(),
+            "attente_file_ms": self.hist_attente_ms.snapshot(),
+        }
@@ -0,0 +1,109 @@
+# app/services/cache.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Sequence, Tuple
+
+# Colonnes discrètes (heure, jour, météo, incidents) : gardées exactes dans la clé
+N_DISCRETES = 4
+
+
+class CachePredictions:
+    """
+    Cache LRU + TTL en mémoire devant le modèle, avec déduplication des calculs
+    en vol (single-flight) : des requêtes identiques simultanées partagent un
+    seul calcul. Seule une vraie exception du calcul est transmise aux suiveurs :
+    si le meneur est annulé, un suiveur reprend le calcul.
+
+    La clé contient la version du modèle : après `/reentrainer`, les anciennes
+    entrées ne sont plus jamais servies et sont purgées à la première lecture.
+    """
+
+    def __init__(self, taille_max: int = 10000, ttl_s: float = 300.0, decimales: int = 1):
+        self.taille_max = max(1, taille_max)
+        self.ttl_s = ttl_s
+        self.decimales = decimales
+        self.succes = 0
+        self.echecs = 0
+        self.partages = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entrees: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._en_vol: Dict[Tuple, asyncio.Future] = {}
+        self._version = None
+
+    def cle(self, version: int, ligne: Sequence[float]) -> Tuple:
+        """Clé (version, caractéristiques) ; les continues sont arrondies à `decimales`."""
+        return (
+            version,
+            *(int(v) for v in ligne[:N_DISCRETES]),
+            *(round(float(v), self.decimales) for v in ligne[N_DISCRETES:]),
+        )
+
+    async def obtenir(self, cle: Tuple, calcul: Callable[[], Awaitable[Any]]) -> Any:
+        if cle[0] != self._version:
+            self._purger_version(cle[0])
+
+        maintenant = time.monotonic()
+        entree = self._entrees.get(cle)
+        if entree is not None:
+            if entree[0] > maintenant:
+                self._entrees.move_to_end(cle)
+                self.succes += 1
+                return entree[1]
+            del self._entrees[cle]
+            self.expirations += 1
+
+        while (en_vol := self._en_vol.get(cle)) is not None:
+            # `asyncio.wait` n'annule pas le calcul partagé si ce suiveur est annulé
+            await asyncio.wait((en_vol,))
+            if not en_vol.cancelled():
+                self.partages += 1
+                return en_vol.result()
+            # Meneur annulé (client déconnecté, par ex.) : l'annulation ne concerne que
+            # lui ; le premier suiveur réveillé relance le calcul, les autres le suivent.
+
+        self.echecs += 1
+        fut = asyncio.get_running_loop().create_future()
+        self._en_vol[cle] = fut
+        try:
+            valeur = await calcul()
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                fut.cancel()
+            else:
+                fut.set_exception(exc)
+                fut.exception()  # évite « exception never retrieved » sans abonné
+            raise
+        finally:
+            del self._en_vol[cle]
+        fut.set_result(valeur)
+        self._stocker(cle, valeur)
+        return valeur
+
+    def _stocker(self, cle: Tuple, valeur: Any):
+        self._entrees[cle] = (time.monotonic() + self.ttl_s, valeur)
+        self._entrees.move_to_end(cle)
+        while len(self._entrees) > self.taille_max:
+            self._entrees.popitem(last=False)
+            self.evictions += 1
+
+    def _purger_version(self, version: int):
+        if self._version is not None and version is not None and version < self._version:
+            return  # lecture tardive d'une ancienne version : ne pas vider le cache
+        self.evictions += len(self._entrees)
+        self._entrees.clear()
+        self._version = version
+
+    def stats(self):
+        total = self.succes + self.echecs + self.partages
+        return {
+            "taille": len(self._entrees),
+            "taille_max": self.taille_max,
+            "succes": self.succes,
+            "echecs": self.echecs,
+            "partages": self.partages,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "taux_succes": (self.succes + self.partages) / total if total else 0.0,
+        }
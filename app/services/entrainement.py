@@ -0,0 +1,139 @@
+# app/services/entrainement.py
+import logging
+import multiprocessing
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from sklearn.pipeline import Pipeline
+
+from app.services.model import ModeleTrafic
+
+logger = logging.getLogger(__name__)
+
+
+def entrainer_hors_processus(parametres: Dict) -> Tuple[Pipeline, Dict]:
+    """Point d'entrée exécuté dans le processus enfant : pipeline entraîné + rapport."""
+    parametres = dict(parametres)
+    if parametres.pop("source", "synthetique") == "historique":
+        # pylint: disable=import-outside-toplevel
+        from app.database import engine
+        from app.services.historique import entrainer_depuis_historique
+
+        parametres.pop("seed", None)
+        return entrainer_depuis_historique(engine, **parametres)
+    return ModeleTrafic.entrainer_avec_rapport(**parametres)
+
+
+@dataclass
+class TacheEntrainement:
+    id: str
+    parametres: Dict
+    soumise_le: datetime = field(default_factory=datetime.now)
+    terminee_le: Optional[datetime] = None
+    version_modele: Optional[int] = None
+    rapport: Optional[Dict] = None
+    erreur: Optional[str] = None
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def statut(self) -> str:
+        if self.erreur is not None:
+            return "echec"
+        if self.version_modele is not None:
+            return "terminee"
+        if self.future is not None and (self.future.running() or self.future.done()):
+            return "en_cours"
+        return "en_attente"
+
+    def resume(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "statut": self.statut,
+            "parametres": self.parametres,
+            "soumise_le": self.soumise_le,
+            "terminee_le": self.terminee_le,
+            "version_modele": self.version_modele,
+            "rapport": self.rapport,
+            "erreur": self.erreur,
+        }
+
+
+class GestionnaireEntrainement:
+    """
+    Ré-entraînements en tâches de fond dans un pool de processus : la boucle
+    d'événements et le GIL du serveur restent libres pendant le `fit`. Une
+    soumission identique à une tâche encore active renvoie cette tâche, et le
+    modèle produit est publié par échange atomique (`ModeleTrafic.publier`).
+    """
+
+    def __init__(
+        self,
+        modele: ModeleTrafic,
+        max_workers: int = 1,
+        historique: int = 100,
+        executeur: Optional[Executor] = None,
+    ):
+        self.modele = modele
+        self.max_workers = max_workers
+        self.historique = historique
+        self._executeur = executeur
+        self._taches: "OrderedDict[str, TacheEntrainement]" = OrderedDict()
+        self._actives: Dict[Tuple, str] = {}
+        self._lock = Lock()
+
+    def _pool(self) -> Executor:
+        if self._executeur is None:
+            # « spawn » : pas de fork d'un serveur multi-thread
+            self._executeur = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executeur
+
+    def soumettre(self, **parametres) -> TacheEntrainement:
+        cle = tuple(sorted(parametres.items()))
+        with self._lock:
+            id_actif = self._actives.get(cle)
+            if id_actif is not None:
+                return self._taches[id_actif]
+
+            tache = TacheEntrainement(id=uuid.uuid4().hex, parametres=parametres)
+            self._taches[tache.id] = tache
+            self._actives[cle] = tache.id
+            # Historique borné : on oublie les plus anciennes tâches terminées
+            actives = set(self._actives.values())
+            for ancien_id in [i for i in self._taches if i not in actives][
+                : max(0, len(self._taches) - self.historique)
+            ]:
+                del self._taches[ancien_id]
+            tache.future = self._pool().submit(entrainer_hors_processus, parametres)
+        tache.future.add_done_callback(lambda f: self._terminer(tache, cle, f))
+        return tache
+
+    def _terminer(self, tache: TacheEntrainement, cle: Tuple, future: Future):
+        try:
+            pipe, tache.rapport = future.result()
+            tache.version_modele = self.modele.publier(pipe)
+            logger.info(
+                f"Ré-entraînement {tache.id} publié (version {tache.version_modele}, "
+                f"{tache.rapport.get('lignes_par_s')} lignes/s)"
+            )
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            tache.erreur = f"{type(exc).__name__}: {exc}"
+            logger.error(f"Ré-entraînement {tache.id} en échec : {tache.erreur}")
+        finally:
+            tache.terminee_le = datetime.now()
+            with self._lock:
+                self._actives.pop(cle, None)
+
+    def obtenir(self, job_id: str) -> Optional[TacheEntrainement]:
+        return self._taches.get(job_id)
+
+    def arreter(self):
+        if self._executeur is not None:
+            self._executeur.shutdown(wait=False, cancel_futures=True)
+            self._executeur = None
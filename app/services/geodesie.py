@@ -0,0 +1,86 @@
+# app/services/geodesie.py
+"""
+Distances orthodromiques (haversine) : scalaire, vectorisée avec diffusion
+NumPy, et matrices origines × destinations calculées par blocs de lignes pour
+borner la mémoire des temporaires.
+"""
+import math
+from typing import Iterator, Tuple
+
+import numpy as np
+
+RAYON_TERRE_KM = 6371.0088
+# Éléments (paires) par bloc de calcul : ~8 temporaires de cette taille au plus
+BLOC_ELEMENTS = 1_000_000
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    R = RAYON_TERRE_KM
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * R * math.asin(math.sqrt(a))
+
+
+def haversine_km_np(lat1, lon1, lat2, lon2, dtype=np.float64) -> np.ndarray:
+    """
+    Version vectorisée de `haversine_km` (diffusion standard : des colonnes
+    (N, 1) contre des lignes (1, M) donnent une matrice (N, M)).
+
+    Radians et écarts de coordonnées restent en float64 : en float32, la
+    soustraction de deux latitudes proches perd l'essentiel de la précision
+    (erreur relative ~1e-2 à 40 m). Avec `dtype=np.float32`, seuls les sinus,
+    cosinus et la sortie sont en simple précision (erreur relative ~1e-6).
+    """
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2)
+    )
+    dphi = ((lat2 - lat1) / 2).astype(dtype, copy=False)
+    dl = ((lon2 - lon1) / 2).astype(dtype, copy=False)
+    cos1 = np.cos(lat1).astype(dtype, copy=False)
+    cos2 = np.cos(lat2).astype(dtype, copy=False)
+    a = np.sin(dphi) ** 2 + cos1 * cos2 * np.sin(dl) ** 2
+    return (2 * RAYON_TERRE_KM) * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _radians(points) -> Tuple[np.ndarray, np.ndarray]:
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return np.radians(points[:, 0]), np.radians(points[:, 1])
+
+
+def blocs_distances_km(
+    origines, destinations, dtype=np.float64, bloc_elements: int = BLOC_ELEMENTS
+) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """
+    Distances origines (N, 2) × destinations (M, 2) en (lat, lon), par blocs
+    de lignes d'origines : produit `(debut, fin, bloc)` avec `bloc` de forme
+    (fin - debut, M) et de type `dtype`. Les cosinus des latitudes sont calculés
+    une seule fois ; les écarts sont formés en float64 (voir `haversine_km_np`).
+    """
+    lat_o, lon_o = _radians(origines)
+    lat_d, lon_d = _radians(destinations)
+    cos_o = np.cos(lat_o).astype(dtype, copy=False)
+    cos_d = np.cos(lat_d).astype(dtype, copy=False)
+    lignes = max(1, bloc_elements // max(1, lat_d.size))
+    for debut in range(0, lat_o.size, lignes):
+        fin = min(lat_o.size, debut + lignes)
+        ecart = np.subtract(lat_d[None, :], lat_o[debut:fin, None]) / 2
+        a = np.sin(ecart.astype(dtype, copy=False)) ** 2
+        ecart = np.subtract(lon_d[None, :], lon_o[debut:fin, None]) / 2
+        a += cos_o[debut:fin, None] * cos_d[None, :] * np.sin(ecart.astype(dtype, copy=False)) ** 2
+        del ecart
+        np.clip(a, 0.0, 1.0, out=a)
+        yield debut, fin, (2 * RAYON_TERRE_KM) * np.arcsin(np.sqrt(a, out=a), out=a)
+
+
+def matrice_distances_km(
+    origines, destinations, dtype=np.float64, bloc_elements: int = BLOC_ELEMENTS
+) -> np.ndarray:
+    """Matrice (N, M) des distances, remplie bloc par bloc (temporaires bornés)."""
+    n = np.asarray(origines).reshape(-1, 2).shape[0]
+    m = np.asarray(destinations).reshape(-1, 2).shape[0]
+    sortie = np.empty((n, m), dtype=dtype)
+    for debut, fin, bloc in blocs_distances_km(origines, destinations, dtype, bloc_elements):
+        sortie[debut:fin] = bloc
+    return sortie
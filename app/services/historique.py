@@ -0,0 +1,112 @@
+# app/services/historique.py
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from app.database import Prediction, Retour
+from app.services.model import ModeleTrafic
+
+# Même ordre que les colonnes de X attendues par le modèle
+COLONNES_CARACTERISTIQUES = (
+    Prediction.heure,
+    Prediction.jour_semaine,
+    Prediction.meteo,
+    Prediction.incidents,
+    Prediction.vitesse_moyenne,
+    Prediction.debit_vehicules,
+    Prediction.distance_km,
+)
+
+
+def congestion_observee():
+    """Dernière congestion observée sur le terrain (table `retours`) pour la prédiction, ou NULL."""
+    return (
+        select(Retour.congestion)
+        .where(Retour.prediction_id == Prediction.id, Retour.congestion.is_not(None))
+        .order_by(Retour.id.desc())
+        .limit(1)
+        .correlate(Prediction)
+        .scalar_subquery()
+    )
+
+
+def requete_historique(
+    date_debut: Optional[datetime] = None,
+    date_fin: Optional[datetime] = None,
+    observees_seulement: bool = False,
+):
+    requete = select(
+        *COLONNES_CARACTERISTIQUES, Prediction.vitesse_prevue, congestion_observee()
+    ).where(
+        *(c.is_not(None) for c in COLONNES_CARACTERISTIQUES),
+        Prediction.vitesse_prevue.is_not(None),
+    )
+    if observees_seulement:
+        requete = requete.where(congestion_observee().is_not(None))
+    if date_debut:
+        requete = requete.where(Prediction.timestamp >= date_debut)
+    if date_fin:
+        requete = requete.where(Prediction.timestamp <= date_fin)
+    return requete.order_by(Prediction.id)
+
+
+def blocs_historique(
+    engine: Engine,
+    taille_bloc: int = ModeleTrafic.TAILLE_BLOC,
+    date_debut: Optional[datetime] = None,
+    date_fin: Optional[datetime] = None,
+    observees_seulement: bool = False,
+    compteurs: Optional[Dict] = None,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Lit la table `predictions` par blocs via un curseur serveur
+    (`stream_results` + `yield_per`) et convertit chaque bloc de tuples
+    directement en tableaux NumPy, sans construire d'objets ORM.
+
+    L'étiquette est l'issue réelle quand un retour terrain existe (dernière
+    `retours.congestion` de la prédiction). À défaut, c'est la décision
+    enregistrée par le modèle déployé (vitesse_prevue < vitesse_moyenne) :
+    sur ces lignes, l'entraînement est une auto-distillation qui reproduit le
+    modèle courant sans rien apprendre de nouveau. `observees_seulement`
+    n'utilise que les lignes avec retour. `compteurs`, si fourni, reçoit le
+    nombre de lignes et d'étiquettes observées de la dernière passe.
+    """
+    lignes = observees = 0
+    with engine.connect() as connexion:
+        resultat = connexion.execution_options(stream_results=True, yield_per=taille_bloc).execute(
+            requete_historique(date_debut, date_fin, observees_seulement)
+        )
+        for bloc in resultat.partitions():
+            A = np.array(bloc, dtype=np.float64)  # NULL (sans retour) → nan
+            observe = ~np.isnan(A[:, 8])
+            lignes += len(A)
+            observees += int(observe.sum())
+            y = np.where(observe, A[:, 8], A[:, 7] < A[:, 4]).astype(int)
+            yield A[:, :7], y
+    if compteurs is not None:
+        compteurs.update(lignes=lignes, etiquettes_observees=observees)
+
+
+def entrainer_depuis_historique(
+    engine: Engine,
+    taille_bloc: int = ModeleTrafic.TAILLE_BLOC,
+    date_debut: Optional[datetime] = None,
+    date_fin: Optional[datetime] = None,
+    epoques: int = 1,
+    observees_seulement: bool = False,
+) -> Tuple[Pipeline, Dict]:
+    compteurs: Dict = {}
+    pipe, rapport = ModeleTrafic.entrainer_en_flux(
+        lambda: blocs_historique(
+            engine, taille_bloc, date_debut, date_fin, observees_seulement, compteurs
+        ),
+        epoques=epoques,
+    )
+    rapport["source"] = "historique"
+    # Part des étiquettes issues de retours terrain (le reste : décisions du modèle)
+    rapport["etiquettes_observees"] = compteurs.get("etiquettes_observees", 0)
+    return pipe, rapport
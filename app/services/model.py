@@ -1,25 +1,86 @@
 # app/services/model.py
+import copy
+import time
 from threading import Lock
-from typing import Tuple
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
 
 import numpy as np
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 
+from app.core.metrics import ATTENTE_VERROU_MODELE, DUREE_INFERENCE
+from app.core.contexte import span
+
+
+class EtatModele(NamedTuple):
+    """Instantané immuable publié aux lecteurs : pipeline entraîné + numéro de version."""
+
+    pipe: Pipeline
+    version: int
+    # Noyau fusionné : logit = X @ poids + biais (standardisation incluse)
+    poids: np.ndarray
+    biais: float
+
+
+def noyau_fusionne(pipe: Pipeline) -> Tuple[np.ndarray, float]:
+    """
+    Replie la moyenne/l'écart-type du StandardScaler dans les coefficients
+    de la régression logistique : ((x - m) / s) @ w + b == x @ (w / s) + (b - (m / s) @ w).
+    """
+    scaler, clf = pipe.named_steps["scaler"], pipe.named_steps["clf"]
+    w = clf.coef_[0].astype(np.float64)
+    moyenne = scaler.mean_ if scaler.mean_ is not None else np.zeros_like(w)
+    echelle = scaler.scale_ if scaler.scale_ is not None else np.ones_like(w)
+    poids = w / echelle
+    biais = float(clf.intercept_[0] - np.dot(moyenne, poids))
+    return np.ascontiguousarray(poids), biais
+
+
+def sigmoide(z: np.ndarray) -> np.ndarray:
+    # Le clip évite les débordements de np.exp pour des logits extrêmes
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -500.0, 500.0)))
+
+
+SourceBlocs = Callable[[], Iterable[Tuple[np.ndarray, np.ndarray]]]
+
 
 class ModeleTrafic:
-    def __init__(self, seed: int = 42):
+    # À incrémenter dès que `generer` ou la recette d'entraînement change :
+    # les artefacts persistés portant une autre valeur sont considérés périmés.
+    VERSION_ENTRAINEMENT = 1
+    N_ECHANTILLONS = 3000
+    TAILLE_BLOC = 100_000
+
+    def __init__(self, seed: int = 42, pipe: Optional[Pipeline] = None):
+        # Le verrou ne sérialise que la publication d'une nouvelle version :
+        # les prédictions lisent `self.etat` sans jamais le prendre.
         self.lock = Lock()
-        self.pipe = Pipeline(
+        self.etat: Optional[EtatModele] = None
+        if pipe is not None:
+            self.publier(pipe)
+        else:
+            self.reentrainer(seed)
+
+    @staticmethod
+    def nouveau_pipeline() -> Pipeline:
+        return Pipeline(
             [
                 ("scaler", StandardScaler()),
                 ("clf", LogisticRegression(max_iter=200)),
             ]
         )
-        self.reentrainer(seed)
 
-    def generer(self, n=3000, seed=42) -> Tuple[np.ndarray, np.ndarray]:
+    @property
+    def pipe(self) -> Pipeline:
+        return self.etat.pipe
+
+    @property
+    def version(self) -> int:
+        return self.etat.version if self.etat else 0
+
+    @staticmethod
+    def generer(n=N_ECHANTILLONS, seed=42) -> Tuple[np.ndarray, np.ndarray]:
         rng = np.random.default_rng(seed)
         heure = rng.integers(0, 24, size=n)
         jour = rng.integers(0, 7, size=n)
@@ -53,13 +114,154 @@ class ModeleTrafic:
         X = np.column_stack([heure, jour, meteo, incidents, vitesse, debit, distance])
         return X, y
 
-    def reentrainer(self, seed: int = 42):
-        X, y = self.generer(seed=seed)
+    def publier(self, pipe: Pipeline, si_version: Optional[int] = None) -> Optional[int]:
+        """
+        Publie un pipeline déjà entraîné par un simple échange de référence.
+        Avec `si_version`, la publication n'a lieu que si le modèle servi est
+        toujours à cette version (compare-and-swap) ; sinon renvoie None.
+        """
+        debut = time.perf_counter()
         with self.lock:
-            self.pipe.fit(X, y)
+            acquis = time.perf_counter()
+            ATTENTE_VERROU_MODELE.observer(acquis - debut)
+            span("modele.verrou", debut, acquis)
+            if si_version is not None and self.version != si_version:
+                return None
+            version = self.version + 1
+            poids, biais = noyau_fusionne(pipe)
+            self.etat = EtatModele(pipe, version, poids, biais)
+        return version
+
+    @classmethod
+    def blocs_synthetiques(
+        cls, n: int, taille_bloc: int = TAILLE_BLOC, seed: int = 42
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """`n` lignes synthétiques produites par blocs : la mémoire ne dépend que du bloc."""
+        nb_blocs = -(-n // taille_bloc)
+        for i, graine in enumerate(np.random.SeedSequence(seed).spawn(nb_blocs)):
+            yield cls.generer(n=min(taille_bloc, n - i * taille_bloc), seed=graine)
+
+    @classmethod
+    def entrainer_en_flux(cls, source: SourceBlocs, epoques: int = 1) -> Tuple[Pipeline, Dict]:
+        """
+        Entraînement hors mémoire : une passe sur `source()` pour les statistiques
+        du StandardScaler (`partial_fit`), puis `epoques` passes de descente de
+        gradient logistique (`SGDClassifier.partial_fit`) sur les blocs standardisés.
+        `source` est rappelée à chaque passe et doit renvoyer un nouvel itérateur.
+
+        Le rapport donne, comme l'entraînement en mémoire, `lignes_par_s` en lignes
+        d'entraînement distinctes par seconde de bout en bout ; le nombre de
+        lectures de la source (passe du scaler comprise) est dans `passes`.
+        """
+        debut = time.perf_counter()
+        scaler = StandardScaler()
+        lignes = 0
+        for X, _ in source():
+            scaler.partial_fit(X)
+            lignes += len(X)
+        if lignes == 0:
+            raise ValueError("Aucune donnée d'entraînement")
+
+        clf = SGDClassifier(loss="log_loss", alpha=1e-5, random_state=0)
+        classes = np.array([0, 1])
+        for _ in range(epoques):
+            for X, y in source():
+                clf.partial_fit(scaler.transform(X), y, classes=classes)
+
+        duree = time.perf_counter() - debut
+        rapport = {
+            "lignes": lignes,
+            "epoques": epoques,
+            "passes": epoques + 1,
+            "duree_s": round(duree, 3),
+            "lignes_par_s": round(lignes / duree, 1) if duree > 0 else None,
+        }
+        return Pipeline([("scaler", scaler), ("clf", clf)]), rapport
+
+    @classmethod
+    def entrainer(
+        cls,
+        seed: int = 42,
+        n_echantillons: Optional[int] = None,
+        taille_bloc: int = TAILLE_BLOC,
+    ) -> Pipeline:
+        """
+        Entraîne un pipeline neuf, sans toucher au modèle servi. Avec
+        `n_echantillons`, l'entraînement se fait en flux par blocs de `taille_bloc`.
+        """
+        return cls.entrainer_avec_rapport(seed, n_echantillons, taille_bloc)[0]
+
+    @classmethod
+    def entrainer_avec_rapport(
+        cls,
+        seed: int = 42,
+        n_echantillons: Optional[int] = None,
+        taille_bloc: int = TAILLE_BLOC,
+    ) -> Tuple[Pipeline, Dict]:
+        if n_echantillons is not None:
+            return cls.entrainer_en_flux(
+                lambda: cls.blocs_synthetiques(n_echantillons, taille_bloc, seed)
+            )
+        debut = time.perf_counter()
+        X, y = cls.generer(seed=seed)
+        pipe = cls.nouveau_pipeline()
+        pipe.fit(X, y)
+        duree = time.perf_counter() - debut
+        rapport = {
+            "lignes": len(X),
+            "epoques": 1,
+            "passes": 1,
+            "duree_s": round(duree, 3),
+            "lignes_par_s": round(len(X) / duree, 1) if duree > 0 else None,
+        }
+        return pipe, rapport
+
+    def reentrainer(self, seed: int = 42) -> int:
+        # Entraînement hors verrou sur un pipeline neuf (copie sur écriture)
+        return self.publier(self.entrainer(seed))
+
+    def mise_a_jour_incrementale(
+        self, X: np.ndarray, y: np.ndarray, taux: float = 0.05, iterations: int = 1
+    ) -> Optional[int]:
+        """
+        Quelques pas de gradient logistique sur un mini-lot d'observations réelles,
+        appliqués à une copie du classifieur servi (le scaler est conservé), puis
+        publiés comme nouvelle version. Renvoie None si un ré-entraînement complet
+        a publié entre-temps (la mise à jour, devenue obsolète, est abandonnée).
+        """
+        etat = self.etat
+        scaler, clf = etat.pipe.named_steps["scaler"], etat.pipe.named_steps["clf"]
+        Xs = scaler.transform(np.asarray(X, dtype=np.float64))
+        y = np.asarray(y, dtype=np.float64)
+        w, b = clf.coef_[0].astype(np.float64), float(clf.intercept_[0])
+        for _ in range(iterations):
+            erreur = sigmoide(Xs @ w + b) - y
+            w = w - taux * (Xs.T @ erreur) / len(y)
+            b = b - taux * float(erreur.mean())
+
+        nouveau = copy.deepcopy(clf)
+        nouveau.coef_ = w.reshape(1, -1)
+        nouveau.intercept_ = np.array([b])
+        pipe = Pipeline([("scaler", scaler), ("clf", nouveau)])
+        return self.publier(pipe, si_version=etat.version)
 
     def predire(self, X: np.ndarray):
-        with self.lock:
-            proba = self.pipe.predict_proba(X)[:, 1]
+        y, proba, _ = self.predire_versionne(X)
+        return y, proba
+
+    def predire_versionne(self, X: np.ndarray):
+        debut = time.perf_counter()
+        etat = self.etat  # une seule lecture : tout le lot est scoré par la même version
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != etat.poids.shape[0]:
+            raise ValueError(f"X doit être de forme (n, {etat.poids.shape[0]}), reçu {X.shape}")
+        proba = sigmoide(X @ etat.poids + etat.biais)
+        y = (proba >= 0.5).astype(int)
+        DUREE_INFERENCE.observer(time.perf_counter() - debut)
+        return y, proba, etat.version
+
+    def predire_sklearn(self, X: np.ndarray):
+        """Chemin de référence via `Pipeline.predict_proba` (tests d'équivalence, benchmark)."""
+        proba = self.etat.pipe.predict_proba(X)[:, 1]
         y = (proba >= 0.5).astype(int)
         return y, proba
@@ -0,0 +1,105 @@
+# app/services/persistance.py
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.database import Prediction, SessionLocal
+from app.services.batching import RegroupeurLots
+
+logger = logging.getLogger(__name__)
+
+
+class TamponPlein(Exception):
+    """La base ne suit pas : la file d'écriture est pleine depuis trop longtemps."""
+
+
+class TamponEcriture(RegroupeurLots):
+    """
+    Écriture différée (write-behind) des lignes `Prediction`.
+
+    Les lignes sont déposées dans une file bornée ; une tâche de fond les insère
+    par lots (INSERT multi-lignes + un seul commit) dès que `taille_lot` lignes
+    sont en attente ou que `intervalle_ms` s'est écoulé. Quand la file est pleine,
+    `ajouter` attend (contre-pression) au plus `attente_max_s` puis lève TamponPlein.
+
+    Un lot dont l'insertion échoue est retenté `tentatives` fois avec un délai
+    doublé à chaque essai ; pendant ce temps la file se remplit et les nouveaux
+    appelants reçoivent TamponPlein (503) au lieu d'une réponse que rien ne
+    persistera. Le lot n'est compté `perdues` qu'après le dernier échec.
+    """
+
+    def __init__(
+        self,
+        fabrique_session: Callable[[], Session] = SessionLocal,
+        taille_lot: int = 500,
+        intervalle_ms: float = 200.0,
+        capacite: int = 10000,
+        attente_max_s: float = 1.0,
+        tentatives: int = 5,
+        delai_reessai_ms: float = 100.0,
+    ):
+        super().__init__(taille_lot, intervalle_ms / 1000.0, capacite=max(1, capacite))
+        self.fabrique_session = fabrique_session
+        self.attente_max_s = attente_max_s
+        self.tentatives = max(1, tentatives)
+        self.delai_reessai_s = max(0.0, delai_reessai_ms) / 1000.0
+        self.ecrites = 0
+        self.lots = 0
+        self.rejets = 0
+        self.reessais = 0
+        self.perdues = 0
+
+    async def ajouter(self, ligne: Dict):
+        self.demarrer()
+        try:
+            await asyncio.wait_for(self._file.put(ligne), self.attente_max_s)
+        except asyncio.TimeoutError as exc:
+            self.rejets += 1
+            raise TamponPlein() from exc
+        self._signaler_depot()
+
+    async def _traiter_lot(self, lot: List[Dict]):
+        # L'aller-retour base de données se fait hors de la boucle d'événements
+        await asyncio.to_thread(self._inserer, lot)
+
+    def _inserer(self, lignes: List[Dict]):
+        delai = self.delai_reessai_s
+        for tentative in range(1, self.tentatives + 1):
+            try:
+                with self.fabrique_session() as db:
+                    db.execute(insert(Prediction), lignes)
+                    db.commit()
+                break
+            except Exception:  # pylint: disable=broad-exception-caught
+                if tentative == self.tentatives:
+                    self.perdues += len(lignes)
+                    logger.exception(
+                        f"Échec de l'écriture différée de {len(lignes)} prédictions "
+                        f"après {tentative} tentatives"
+                    )
+                    return
+                self.reessais += 1
+                logger.warning(
+                    f"Écriture différée en échec (tentative {tentative}/{self.tentatives}), "
+                    f"nouvel essai dans {delai * 1000:.0f} ms",
+                    exc_info=True,
+                )
+                time.sleep(delai)
+                delai = min(delai * 2, 5.0)
+        self.ecrites += len(lignes)
+        self.lots += 1
+
+    def stats(self):
+        return {
+            "en_attente": self._file.qsize() if self._file is not None else 0,
+            "capacite": self.capacite,
+            "ecrites": self.ecrites,
+            "lots": self.lots,
+            "rejets": self.rejets,
+            "reessais": self.reessais,
+            "perdues": self.perdues,
+        }
@@ -0,0 +1,106 @@
+# app/services/recommandations.py
+"""
+Recommandations de conduite.
+
+`recommandations()` est la définition de référence (chaîne de conditions).
+Son résultat ne dépend que de six entrées discrètes, codées sur 6 bits :
+
+    bit 0     alerte       y == 1 ou proba >= 0.6
+    bit 1     incident     incidents == 1
+    bits 2-3  météo        0, 1 ou 2
+    bit 4     pointe       heure de pointe
+    bit 5     long         distance_km fournie et > 10
+
+Les 64 résultats possibles sont calculés une fois à l'import en appelant la
+référence ; le chemin unitaire comme le chemin par lot ne font plus qu'une
+lecture de table (`TABLE_RECOMMANDATIONS[masque]`).
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.schemas import EntreePrediction
+
+HEURES_POINTE = (7, 8, 9, 16, 17, 18)
+SEUIL_ALERTE = 0.6
+DISTANCE_LONGUE_KM = 10
+
+
+def recommandations(e: EntreePrediction, proba: float, y: int):
+    rec = []
+    if y == 1 or proba >= SEUIL_ALERTE:
+        rec.append("Réduire la vitesse et augmenter la distance de sécurité.")
+        rec.append("Privilégier un itinéraire alternatif si possible.")
+        if e.incidents == 1:
+            rec.append("Éviter la zone d’incident signalée (contournement recommandé).")
+        if e.meteo == 1:
+            rec.append("Pluie : allonger les distances de freinage.")
+        if e.meteo == 2:
+            rec.append("Neige : conduite prudente, éviter les manœuvres brusques.")
+    else:
+        rec.append("Circulation fluide : maintenir une conduite défensive.")
+    if e.heure in HEURES_POINTE:
+        rec.append("Heure de pointe : attention aux ralentissements soudains.")
+    if e.distance_km and e.distance_km > DISTANCE_LONGUE_KM:
+        rec.append("Trajet long : planifier une pause si nécessaire.")
+    return rec
+
+
+def masque(
+    y: int, proba: float, incidents: int, meteo: int, heure: int, distance_km: Optional[float]
+) -> int:
+    return (
+        (y == 1 or proba >= SEUIL_ALERTE)
+        | (incidents == 1) << 1
+        | (meteo & 3) << 2
+        | (heure in HEURES_POINTE) << 4
+        | bool(distance_km and distance_km > DISTANCE_LONGUE_KM) << 5
+    )
+
+
+def _construire_table() -> Tuple[Tuple[str, ...], ...]:
+    table = []
+    for m in range(64):
+        representant = EntreePrediction.model_construct(
+            incidents=(m >> 1) & 1,
+            meteo=(m >> 2) & 3,
+            heure=HEURES_POINTE[0] if m & 16 else 0,
+            distance_km=DISTANCE_LONGUE_KM + 1.0 if m & 32 else None,
+        )
+        table.append(tuple(recommandations(representant, 0.0, m & 1)))
+    return tuple(table)
+
+
+TABLE_RECOMMANDATIONS = _construire_table()
+_EST_POINTE = np.isin(np.arange(24), HEURES_POINTE)
+
+
+def recommandations_table(e: EntreePrediction, proba: float, y: int) -> Tuple[str, ...]:
+    """Équivalent de `recommandations` par lecture de table (O(1))."""
+    return TABLE_RECOMMANDATIONS[masque(y, proba, e.incidents, e.meteo, e.heure, e.distance_km)]
+
+
+def masques_np(
+    y: np.ndarray,
+    proba: np.ndarray,
+    incidents: np.ndarray,
+    meteo: np.ndarray,
+    heure: np.ndarray,
+    distance_km: np.ndarray,
+) -> np.ndarray:
+    """Masques d'un lot (heures validées 0-23) ; `distance_km` absente codée NaN."""
+    heure = np.asarray(heure, dtype=np.int64)
+    with np.errstate(invalid="ignore"):
+        long_ = np.asarray(distance_km, dtype=float) > DISTANCE_LONGUE_KM
+    return (
+        ((np.asarray(y) == 1) | (np.asarray(proba) >= SEUIL_ALERTE)).astype(np.int64)
+        | (np.asarray(incidents) == 1).astype(np.int64) << 1
+        | (np.asarray(meteo, dtype=np.int64) & 3) << 2
+        | _EST_POINTE[heure].astype(np.int64) << 4
+        | long_.astype(np.int64) << 5
+    )
+
+
+def recommandations_lot(masques: Sequence[int]) -> List[Tuple[str, ...]]:
+    table = TABLE_RECOMMANDATIONS
+    return [table[m] for m in np.asarray(masques).tolist()]
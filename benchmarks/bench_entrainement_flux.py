@@ -0,0 +1,30 @@
+"""
+Benchmark : entraînement en flux — débit (lignes/s) et pic mémoire Python
+en fonction du nombre de lignes, à taille de bloc constante.
+
+Usage : python -m benchmarks.bench_entrainement_flux [n1 n2 ...]
+"""
+import sys
+import tracemalloc
+
+from app.services.model import ModeleTrafic
+
+TAILLE_BLOC = 100_000
+
+
+def main(tailles):
+    for n in tailles:
+        tracemalloc.start()
+        _, rapport = ModeleTrafic.entrainer_avec_rapport(
+            seed=42, n_echantillons=n, taille_bloc=TAILLE_BLOC
+        )
+        _, pic = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{n:>12,} lignes | {rapport['lignes_par_s']:>12,.0f} lignes/s"
+            f" | {rapport['duree_s']:8.2f} s | pic {pic / 2**20:8.1f} Mo"
+        )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 1_000_000, 10_000_000])
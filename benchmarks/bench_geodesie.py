@@ -0,0 +1,69 @@
+"""
+Benchmark : distances origines × destinations.
+
+- Boucle Python sur `haversine_km` (scalaire) contre `matrice_distances_km`
+  (diffusion NumPy), en float64 puis float32.
+- Pic mémoire (tracemalloc) de la matrice complète selon la taille des blocs :
+  les temporaires restent bornés par `bloc_elements`.
+
+Usage : python -m benchmarks.bench_geodesie [N] [M]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.services.geodesie import haversine_km, matrice_distances_km
+
+
+def points(n: int, rng) -> np.ndarray:
+    # Région de Montréal : ~50 km de côté
+    return np.column_stack([rng.uniform(45.3, 45.8, n), rng.uniform(-74.0, -73.4, n)])
+
+
+def chrono(fn) -> float:
+    debut = time.perf_counter()
+    fn()
+    return time.perf_counter() - debut
+
+
+def pic_memoire_mo(fn) -> float:
+    tracemalloc.start()
+    fn()
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pic / 1e6
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rng = np.random.default_rng(42)
+    origines, destinations = points(n, rng), points(m, rng)
+    print(f"{n} origines × {m} destinations = {n * m:,} paires")
+
+    # Boucle scalaire sur un échantillon de lignes, extrapolée à N
+    lignes = max(1, min(n, 50))
+    t_boucle = chrono(
+        lambda: [[haversine_km(*o, *d) for d in destinations] for o in origines[:lignes]]
+    ) * (n / lignes)
+    reference = matrice_distances_km(origines, destinations)
+    t64 = chrono(lambda: matrice_distances_km(origines, destinations))
+    t32 = chrono(lambda: matrice_distances_km(origines, destinations, dtype=np.float32))
+    ecart = np.max(
+        np.abs(matrice_distances_km(origines, destinations, dtype=np.float32) - reference)
+    )
+    print(f"boucle scalaire (extrapolée) : {t_boucle * 1000:10.1f} ms")
+    print(f"matrice float64              : {t64 * 1000:10.1f} ms | x{t_boucle / t64:.0f}")
+    print(f"matrice float32              : {t32 * 1000:10.1f} ms | écart max {ecart:.2e} km")
+
+    for bloc in (n * m, 1_000_000, 100_000):
+        pic = pic_memoire_mo(
+            lambda b=bloc: matrice_distances_km(origines, destinations, bloc_elements=b)
+        )
+        print(f"bloc {bloc:>12,} paires : pic mémoire {pic:8.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
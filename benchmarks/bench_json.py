@@ -0,0 +1,115 @@
+"""
+Benchmark : chemin JSON générique de FastAPI vs chemin rapide (µs par requête).
+
+- /predire : `json.loads` + validation du dict + `jsonable_encoder` + `json.dumps`
+  contre `validate_json` sur les octets + `dump_json` du schéma.
+- /predictions (100 lignes) : objets ORM validés par `PredictionOutput` puis
+  `jsonable_encoder` contre tuples de colonnes encodés directement par orjson.
+
+Usage : python -m benchmarks.bench_json
+"""
+import json
+import timeit
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.endpoints import (
+    ADAPTATEUR_ENTREE,
+    ADAPTATEUR_SORTIE,
+    COLONNES_SORTIE,
+    PredictionOutput,
+    _ligne_sortie,
+)
+from app.core.json_rapide import reponse_json
+from app.database import Base, Prediction
+from app.models.schemas import EntreePrediction, SortiePrediction
+
+CORPS = json.dumps(
+    {
+        "heure": 8,
+        "jour_semaine": 1,
+        "meteo": 0,
+        "incidents": 0,
+        "vitesse_moyenne": 60.0,
+        "debit_vehicules": 50.0,
+        "lat_a": 45.5017,
+        "lon_a": -73.5673,
+        "lat_b": 45.5088,
+        "lon_b": -73.5540,
+    }
+).encode()
+SORTIE = SortiePrediction(
+    risque="faible",
+    proba=0.123,
+    recommandations=["Trafic fluide prévu, départ à l'heure recommandé."],
+    version_modele=1,
+)
+
+
+def mesurer(fn, repetitions):
+    return min(timeit.repeat(fn, number=repetitions, repeat=5)) / repetitions * 1e6
+
+
+def predire_generique():
+    entree = EntreePrediction.model_validate(json.loads(CORPS))
+    return entree, json.dumps(jsonable_encoder(SORTIE)).encode()
+
+
+def predire_rapide():
+    entree = ADAPTATEUR_ENTREE.validate_json(CORPS)
+    return entree, ADAPTATEUR_SORTIE.dump_json(SORTIE)
+
+
+def main():
+    t_gen = mesurer(predire_generique, 20000)
+    t_rap = mesurer(predire_rapide, 20000)
+    print(
+        f"/predire      | générique {t_gen:8.2f} µs | rapide {t_rap:8.2f} µs | x{t_gen / t_rap:.1f}"
+    )
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(
+        Prediction(
+            distance_km=10.0 + i,
+            heure=i % 24,
+            jour_semaine=i % 7,
+            meteo=i % 3,
+            incidents=i % 2,
+            vitesse_moyenne=50.0,
+            debit_vehicules=40,
+            vitesse_prevue=45.0,
+            temps_trajet_prevu=12.5,
+            timestamp=datetime(2024, 1, 1, i % 24, i % 60),
+        )
+        for i in range(100)
+    )
+    db.commit()
+
+    def lister_generique():
+        lignes = db.query(Prediction).limit(100).all()
+        db.expunge_all()
+        sortie = [PredictionOutput.model_validate(l, from_attributes=True) for l in lignes]
+        return json.dumps(jsonable_encoder(sortie)).encode()
+
+    def lister_rapide():
+        lignes = db.query(*COLONNES_SORTIE).limit(100).all()
+        return reponse_json([_ligne_sortie(l) for l in lignes]).body
+
+    assert json.loads(lister_generique()) == json.loads(lister_rapide())
+    t_gen = mesurer(lister_generique, 200)
+    t_rap = mesurer(lister_rapide, 200)
+    print(
+        f"/predictions  | générique {t_gen:8.2f} µs | rapide {t_rap:8.2f} µs | x{t_gen / t_rap:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Benchmark : noyau NumPy fusionné vs `Pipeline.predict_proba` (latence par ligne).
+
+Usage : python -m benchmarks.bench_noyau
+"""
+import timeit
+
+import numpy as np
+
+from app.services.model import ModeleTrafic
+
+
+def mesurer(fn, X, repetitions):
+    duree = min(timeit.repeat(lambda: fn(X), number=repetitions, repeat=5))
+    return duree / repetitions / X.shape[0] * 1e6  # µs par ligne
+
+
+def main():
+    modele = ModeleTrafic(seed=42)
+    X_grand, _ = modele.generer(n=100_000, seed=7)
+    X_grand = X_grand.astype(np.float64)
+    X_un = X_grand[:1]
+
+    _, p_ref = modele.predire_sklearn(X_grand)
+    _, p_noyau = modele.predire(X_grand)
+    print(f"Écart max des probabilités : {np.max(np.abs(p_ref - p_noyau)):.2e}")
+
+    for nom, X, rep in [("1 ligne", X_un, 2000), ("100k lignes", X_grand, 10)]:
+        t_sk = mesurer(modele.predire_sklearn, X, rep)
+        t_noyau = mesurer(modele.predire, X, rep)
+        print(
+            f"{nom:>12} | sklearn {t_sk:10.4f} µs/ligne | noyau {t_noyau:10.4f} µs/ligne"
+            f" | gain x{t_sk / t_noyau:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
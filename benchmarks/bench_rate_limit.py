@@ -0,0 +1,60 @@
+"""
+Benchmark : limiteur à seau à jetons face à un grand nombre de clients distincts.
+
+Mesure le coût par appel et la mémoire retenue quand 1 million d'adresses
+différentes se présentent, avec la borne `max_clients` par défaut.
+
+Usage : python -m benchmarks.bench_rate_limit [nombre_clients] [local|partage]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from app.core.rate_limit import RateLimiter
+from app.core.rate_limit_backends import StockagePartage
+
+
+def creer_limiteur(backend: str) -> RateLimiter:
+    stockage = None
+    if backend == "partage":
+        stockage = StockagePartage(os.path.join(tempfile.mkdtemp(), "rl.shm"))
+    return RateLimiter(per_minute=60, stockage=stockage)
+
+
+def chronometrer(limiteur: RateLimiter, cles) -> float:
+    debut = time.perf_counter()
+    for cle in cles:
+        limiteur.consommer(cle)
+    return time.perf_counter() - debut
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n_clients = int(argv[0]) if argv else 1_000_000
+    backend = argv[1] if len(argv) > 1 else "local"
+    # Clés construites hors mesure : les deux boucles ne chronomètrent que `consommer`
+    cles = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}#{i >> 24}" for i in range(n_clients)]
+
+    # Temps : les deux boucles dans les mêmes conditions, sans tracemalloc
+    limiteur = creer_limiteur(backend)
+    duree = chronometrer(limiteur, cles)
+    duree_chaud = chronometrer(limiteur, ["client-chaud"] * n_clients)
+    stats = limiteur.stats()
+
+    # Mémoire : passe séparée sur un limiteur neuf (tracemalloc ralentit les appels)
+    limiteur = creer_limiteur(backend)
+    tracemalloc.start()
+    chronometrer(limiteur, cles)
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{n_clients} clients distincts : {duree / n_clients * 1e6:.3f} µs/appel")
+    print(f"client unique            : {duree_chaud / n_clients * 1e6:.3f} µs/appel")
+    print(f"stockage      : {stats}")
+    print(f"pic mémoire   : {pic / 1e6:.1f} Mo (tas Python)")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
+from app.core.rate_limit import limiter
 from app.database import Base, get_db
 
 
@@ -54,6 +55,7 @@ def client(db_session):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    limiter.reinitialiser()  # chaque test part d'un quota de requêtes neuf
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
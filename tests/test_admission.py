@@ -0,0 +1,55 @@
+"""
+Tests pour le contrôle d'admission et l'exécuteur d'inférence
+"""
+# pylint: disable=import-error
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.admission import ControleAdmission
+
+
+@pytest.mark.unit
+def test_admission_rejette_au_dela_de_la_capacite():
+    """Au-delà de concurrence + file, la requête échoue en 503 avec Retry-After"""
+    admission = ControleAdmission(max_concurrence=1, profondeur_file=1, retry_after_s=2)
+    with admission.admettre(), admission.admettre():
+        assert admission.stats()["profondeur_file"] == 1
+        with pytest.raises(HTTPException) as exc:
+            with admission.admettre():
+                pass
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "2"
+
+    stats = admission.stats()
+    assert (stats["en_cours"], stats["admises"], stats["rejets"]) == (0, 2, 1)
+
+
+@pytest.mark.unit
+async def test_admission_execute_hors_boucle():
+    """Le travail bloquant s'exécute sur un thread de l'exécuteur dédié"""
+    admission = ControleAdmission(max_concurrence=2)
+    nom = await admission.executer(lambda: threading.current_thread().name)
+    assert nom.startswith("inference")
+
+
+@pytest.mark.integration
+def test_predire_surcharge_503(client, monkeypatch):
+    """Quand la capacité est atteinte, /predire répond 503 + Retry-After"""
+    # pylint: disable=import-outside-toplevel
+    from app.api.v1.endpoints import ADMISSION
+
+    monkeypatch.setattr(ADMISSION, "capacite", 0)
+    payload = {
+        "heure": 8,
+        "jour_semaine": 1,
+        "meteo": 0,
+        "incidents": 0,
+        "vitesse_moyenne": 60.0,
+        "debit_vehicules": 50.0,
+    }
+    response = client.post("/api/v1/predire", json=payload)
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert client.get("/api/v1/metriques/admission").json()["rejets"] >= 1
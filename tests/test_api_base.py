@@ -4,6 +4,8 @@ Tests pour les endpoints de base de l'API MobilitySoft
 # pylint: disable=import-error
 import pytest
 
+from app.core.contexte import chrono_courant, etape
+
 
 @pytest.mark.integration
 def test_sante_endpoint(client):
@@ -22,3 +24,40 @@ def test_servir_ui(client):
     response = client.get("/")
     assert response.status_code == 200
     assert response.headers["content-type"].startswith("text/html")
+
+
+@pytest.mark.integration
+def test_contexte_requete_server_timing(client):
+    """L'identifiant est repris, la durée est sub-milliseconde et les étapes de /predire exposées"""
+    payload = {
+        "heure": 8,
+        "jour_semaine": 1,
+        "meteo": 0,
+        "incidents": 0,
+        "vitesse_moyenne": 60.0,
+        "debit_vehicules": 50.0,
+        "lat_a": 45.5017,
+        "lon_a": -73.5673,
+        "lat_b": 45.5088,
+        "lon_b": -73.5540,
+    }
+    response = client.post("/api/v1/predire", json=payload, headers={"X-Request-ID": "req-42"})
+    assert response.status_code == 200
+    assert response.headers["X-Request-ID"] == "req-42"
+    assert "." in response.headers["X-Response-Time-ms"]
+
+    etapes = {
+        entree.split(";")[0]: float(entree.split("dur=")[1])
+        for entree in response.headers["Server-Timing"].split(", ")
+    }
+    for nom in ("validation", "distance", "inference", "recommandations", "persistance", "total"):
+        assert nom in etapes
+    assert etapes["inference"] <= etapes["total"]
+
+
+@pytest.mark.unit
+def test_etape_hors_requete():
+    """Hors requête, le chronométrage d'étape est sans effet"""
+    with etape("distance"):
+        pass
+    assert chrono_courant() is None
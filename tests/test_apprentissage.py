@@ -0,0 +1,136 @@
+"""
+Tests pour les retours terrain et l'apprentissage en ligne
+"""
+# pylint: disable=import-error
+import pytest
+
+from app.services.apprentissage import ApprentissageEnLigne
+from app.services.model import ModeleTrafic
+
+
+@pytest.mark.unit
+def test_apprentissage_applique_le_tampon():
+    """Le tampon est appliqué en un mini-lot qui publie une nouvelle version"""
+    modele = ModeleTrafic(seed=42)
+    apprentissage = ApprentissageEnLigne(modele, capacite=3)
+    assert apprentissage.appliquer() is None
+
+    for _ in range(4):
+        apprentissage.ajouter([8, 1, 0, 0, 60.0, 50.0, 10.0], 1)
+    stats = apprentissage.stats()
+    assert stats["en_attente"] == 3
+    assert stats["abandonnes"] == 1
+
+    assert apprentissage.appliquer() == 2
+    stats = apprentissage.stats()
+    assert (stats["en_attente"], stats["mises_a_jour"], stats["appliques"]) == (0, 1, 3)
+
+
+@pytest.mark.unit
+def test_apprentissage_remet_le_lot_si_modele_republie(monkeypatch):
+    """Un mini-lot devancé par un ré-entraînement est remis en tampon, pas perdu"""
+    modele = ModeleTrafic(seed=42)
+    apprentissage = ApprentissageEnLigne(modele, capacite=3)
+    for congestion in (1, 0):
+        apprentissage.ajouter([8, 1, 0, 0, 60.0, 50.0, 10.0], congestion)
+
+    publier = modele.publier
+
+    def republier_avant(pipe, si_version=None):
+        # Un ré-entraînement publie juste avant la mise à jour incrémentale
+        publier(modele.etat.pipe)
+        apprentissage.ajouter([17, 4, 1, 1, 40.0, 80.0, 15.0], 1)
+        apprentissage.ajouter([17, 4, 1, 1, 40.0, 80.0, 15.0], 1)
+        return publier(pipe, si_version=si_version)
+
+    monkeypatch.setattr(modele, "publier", republier_avant)
+    assert apprentissage.appliquer() is None
+    stats = apprentissage.stats()
+    # Capacité 3 : le lot remis (2) précède les 2 nouvelles, la plus ancienne est évincée
+    assert (stats["en_attente"], stats["reportes"], stats["abandonnes"]) == (3, 2, 1)
+    assert list(apprentissage._tampon)[0][1] == 0  # pylint: disable=protected-access
+
+    monkeypatch.setattr(modele, "publier", publier)
+    assert apprentissage.appliquer() == modele.version
+    assert apprentissage.stats()["appliques"] == 3
+
+
+@pytest.mark.unit
+async def test_apprentissage_planifie():
+    """La tâche planifiée applique les retours sans intervention"""
+    # pylint: disable=import-outside-toplevel
+    import asyncio
+
+    modele = ModeleTrafic(seed=42)
+    apprentissage = ApprentissageEnLigne(modele, intervalle_s=0.01, taille_min=2)
+    apprentissage.demarrer()
+    apprentissage.ajouter([17, 4, 1, 1, 40.0, 80.0, 15.0], 0)
+    apprentissage.ajouter([17, 4, 1, 1, 40.0, 80.0, 15.0], 0)
+    for _ in range(100):
+        if apprentissage.stats()["mises_a_jour"]:
+            break
+        await asyncio.sleep(0.01)
+    await apprentissage.arreter()
+    assert modele.version == 2
+
+
+@pytest.mark.integration
+def test_retour_sur_prediction(client, db_session):
+    """Un retour terrain est enregistré et mis en tampon pour le modèle"""
+    # pylint: disable=import-outside-toplevel
+    from app.database import Retour
+
+    payload = {
+        "heure": 17,
+        "jour_semaine": 4,
+        "meteo": 1,
+        "incidents": 1,
+        "vitesse_moyenne": 40.0,
+        "debit_vehicules": 80.0,
+        "distance_km": 10.0,
+    }
+    assert client.post("/api/v1/predire", json=payload).status_code == 200
+    prediction_id = client.get("/api/v1/predictions").json()[0]["id"]
+
+    # 10 km en 30 min = 20 km/h < 80 % de 40 km/h : congestion déduite
+    response = client.post(
+        f"/api/v1/predictions/{prediction_id}/retour", json={"temps_trajet_reel": 30.0}
+    )
+    assert response.status_code == 202
+    data = response.json()
+    assert data["congestion"] == 1
+    assert data["en_attente"] >= 1
+
+    db_session.commit()
+    retour = db_session.query(Retour).filter(Retour.id == data["retour_id"]).first()
+    assert retour.prediction_id == prediction_id
+
+    assert client.post("/api/v1/predictions/9999/retour", json={"congestion": 0}).status_code == 404
+    assert client.post(f"/api/v1/predictions/{prediction_id}/retour", json={}).status_code == 422
+
+
+@pytest.mark.integration
+def test_retour_sans_distance(client):
+    """Sans distance enregistrée, le temps réel seul ne suffit pas à étiqueter le retour"""
+    from app.api.v1.endpoints import APPRENTISSAGE  # pylint: disable=import-outside-toplevel
+
+    payload = {
+        "heure": 8,
+        "jour_semaine": 1,
+        "meteo": 0,
+        "incidents": 0,
+        "vitesse_moyenne": 60.0,
+        "debit_vehicules": 50.0,
+    }
+    assert client.post("/api/v1/predire", json=payload).status_code == 200
+    prediction = client.get("/api/v1/predictions").json()[0]
+    assert not prediction["distance_km"]
+
+    en_attente = APPRENTISSAGE.stats()["en_attente"]
+    url = f"/api/v1/predictions/{prediction['id']}/retour"
+    assert client.post(url, json={"temps_trajet_reel": 30.0}).status_code == 422
+    assert APPRENTISSAGE.stats()["en_attente"] == en_attente
+
+    response = client.post(url, json={"temps_trajet_reel": 30.0, "congestion": 0})
+    assert response.status_code == 202
+    assert response.json()["congestion"] == 0
@@ -0,0 +1,62 @@
+"""
+Tests pour l'artefact de modèle persistant
+"""
+# pylint: disable=import-error
+import numpy as np
+import pytest
+
+from app.services.artefact import (
+    ArtefactInvalide,
+    charger,
+    charger_ou_entrainer,
+    lire_entete,
+    main,
+    sauvegarder,
+)
+from app.services.model import ModeleTrafic
+
+
+@pytest.mark.unit
+def test_artefact_aller_retour(tmp_path):
+    """Un modèle rechargé depuis l'artefact prédit exactement comme l'original"""
+    modele = ModeleTrafic(seed=42)
+    chemin = sauvegarder(modele, str(tmp_path / "modele.bin"), seed=42)
+
+    entete, decalage = lire_entete(str(chemin))
+    assert entete["seed"] == 42
+    assert decalage % 64 == 0
+
+    recharge = charger(str(chemin), seed=42)
+    X, _ = modele.generer(n=500, seed=3)
+    np.testing.assert_array_equal(recharge.predire(X)[1], modele.predire(X)[1])
+    np.testing.assert_allclose(recharge.predire_sklearn(X)[1], modele.predire_sklearn(X)[1])
+
+
+@pytest.mark.unit
+def test_artefact_perime_ou_corrompu(tmp_path):
+    """Un artefact d'un autre seed ou corrompu est refusé"""
+    chemin = tmp_path / "modele.bin"
+    sauvegarder(ModeleTrafic(seed=42), str(chemin), seed=42)
+    with pytest.raises(ArtefactInvalide):
+        charger(str(chemin), seed=7)
+
+    corrompu = tmp_path / "corrompu.bin"
+    corrompu.write_bytes(b"pas un artefact")
+    with pytest.raises(ArtefactInvalide):
+        charger(str(corrompu))
+
+
+@pytest.mark.unit
+def test_charger_ou_entrainer_sans_artefact(tmp_path):
+    """Sans artefact valide, le modèle est entraîné en mémoire"""
+    modele = charger_ou_entrainer(str(tmp_path / "absent.bin"), seed=42)
+    assert modele.version == 1
+    assert not (tmp_path / "absent.bin").exists()
+
+
+@pytest.mark.unit
+def test_cli_construit_artefact(tmp_path):
+    """La CLI écrit un artefact chargeable"""
+    chemin = tmp_path / "cli" / "modele.bin"
+    main(["--sortie", str(chemin), "--seed", "5"])
+    assert charger(str(chemin), seed=5).version == 1
@@ -0,0 +1,93 @@
+"""
+Tests pour l'ordonnanceur de micro-batching
+"""
+# pylint: disable=import-error,redefined-outer-name
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.services.batching import OrdonnanceurLots
+from app.services.model import ModeleTrafic
+
+LIGNES = [
+    [8, 1, 0, 0, 60.0, 50.0, 10.0],
+    [17, 4, 1, 1, 40.0, 80.0, 15.0],
+    [12, 6, 0, 0, 80.0, 30.0, 5.0],
+    [3, 2, 2, 1, 30.0, 90.0, 25.0],
+]
+
+
+@pytest.fixture(scope="module")
+def modele():
+    return ModeleTrafic(seed=42)
+
+
+@pytest.mark.unit
+async def test_lot_regroupe_requetes_concurrentes(modele):
+    """Les requêtes concurrentes sont scorées en un seul lot"""
+    with ThreadPoolExecutor(1) as executeur:
+        ordo = OrdonnanceurLots(modele, taille_max=64, attente_max_ms=50, executeur=executeur)
+        resultats = await asyncio.gather(*(ordo.predire(l) for l in LIGNES))
+        await ordo.arreter()
+
+    y, proba = modele.predire(np.array(LIGNES, dtype=float))
+    assert [r[0] for r in resultats] == list(y)
+    assert [r[1] for r in resultats] == pytest.approx(list(proba))
+
+    # La première, seule à son arrivée, part directement ; les suivantes forment un lot
+    stats = ordo.stats()
+    assert stats["directes"] == 1
+    assert stats["taille_lot"]["nombre"] == 2
+    assert stats["taille_lot"]["somme"] == len(LIGNES)
+    assert stats["attente_file_ms"]["nombre"] == len(LIGNES)
+
+
+@pytest.mark.unit
+async def test_requete_isolee_sans_attente(modele):
+    """Des requêtes séquentielles ne paient jamais l'attente de formation d'un lot"""
+    ordo = OrdonnanceurLots(modele, taille_max=64, attente_max_ms=1000)
+    debut = asyncio.get_running_loop().time()
+    for ligne in LIGNES:
+        await ordo.predire(ligne)
+    assert asyncio.get_running_loop().time() - debut < 0.5
+    await ordo.arreter()
+
+    stats = ordo.stats()
+    assert stats["directes"] == len(LIGNES)
+    assert stats["taille_lot"]["seaux"]["1"] == len(LIGNES)
+
+
+@pytest.mark.unit
+async def test_lot_respecte_taille_max(modele):
+    """Un lot ne dépasse jamais la taille maximale configurée"""
+    ordo = OrdonnanceurLots(modele, taille_max=3, attente_max_ms=50)
+    await asyncio.gather(*(ordo.predire(LIGNES[i % 4]) for i in range(10)))
+    await ordo.arreter()
+
+    stats = ordo.stats()["taille_lot"]
+    assert stats["somme"] == 10
+    assert stats["nombre"] >= 4
+    assert stats["seaux"]["4"] == stats["nombre"]
+
+
+@pytest.mark.integration
+def test_metriques_lots_endpoint(client):
+    """L'endpoint expose les histogrammes du micro-batching"""
+    payload = {
+        "heure": 8,
+        "jour_semaine": 1,
+        "meteo": 0,
+        "incidents": 0,
+        "vitesse_moyenne": 60.0,
+        "debit_vehicules": 50.0,
+        "distance_km": 10.0,
+    }
+    assert client.post("/api/v1/predire", json=payload).status_code == 200
+    response = client.get("/api/v1/metriques/lots")
+    assert response.status_code == 200
+    data = response.json()
+    # Requête seule : scorée sans passer par la file, comptée dans `directes`
+    assert data["directes"] >= 1
+    assert "+Inf" in data["attente_file_ms"]["seaux"]
@@ -0,0 +1,126 @@
+"""
+Tests pour le cache de prédictions versionné
+"""
+# pylint: disable=import-error
+import asyncio
+
+import pytest
+
+from app.services.cache import CachePredictions
+
+LIGNE = [8, 1, 0, 0, 60.04, 50.0, 10.0]
+
+
+def calcul_compte(compteur, valeur="v", delai=0.0):
+    async def calcul():
+        compteur.append(1)
+        await asyncio.sleep(delai)
+        return valeur
+
+    return calcul
+
+
+@pytest.mark.unit
+def test_cle_arrondie_et_versionnee():
+    """La clé arrondit les continues et inclut la version du modèle"""
+    cache = CachePredictions(decimales=1)
+    assert cache.cle(1, LIGNE) == cache.cle(1, [8, 1, 0, 0, 59.96, 50.0, 10.0])
+    assert cache.cle(1, LIGNE) != cache.cle(2, LIGNE)
+    assert cache.cle(1, LIGNE)[1:] == (8, 1, 0, 0, 60.0, 50.0, 10.0)
+
+
+@pytest.mark.unit
+async def test_cache_succes_et_echec():
+    """Un second appel identique est servi par le cache"""
+    cache, appels = CachePredictions(), []
+    cle = cache.cle(1, LIGNE)
+    assert await cache.obtenir(cle, calcul_compte(appels)) == "v"
+    assert await cache.obtenir(cle, calcul_compte(appels)) == "v"
+    assert len(appels) == 1
+    stats = cache.stats()
+    assert (stats["succes"], stats["echecs"]) == (1, 1)
+
+
+@pytest.mark.unit
+async def test_cache_single_flight():
+    """Des requêtes identiques simultanées partagent un seul calcul"""
+    cache, appels = CachePredictions(), []
+    cle = cache.cle(1, LIGNE)
+    resultats = await asyncio.gather(
+        *(cache.obtenir(cle, calcul_compte(appels, delai=0.01)) for _ in range(5))
+    )
+    assert resultats == ["v"] * 5
+    assert len(appels) == 1
+    assert cache.stats()["partages"] == 4
+
+
+@pytest.mark.unit
+async def test_cache_meneur_annule():
+    """L'annulation du meneur n'échoue pas ses suiveurs : l'un d'eux relance le calcul"""
+    cache, appels = CachePredictions(), []
+    cle = cache.cle(1, LIGNE)
+    meneur = asyncio.create_task(cache.obtenir(cle, calcul_compte(appels, delai=10.0)))
+    await asyncio.sleep(0)
+    suiveurs = [
+        asyncio.create_task(cache.obtenir(cle, calcul_compte(appels, valeur="s", delai=0.01)))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    meneur.cancel()
+
+    assert await asyncio.gather(*suiveurs) == ["s"] * 3
+    with pytest.raises(asyncio.CancelledError):
+        await meneur
+    assert len(appels) == 2
+    assert cache.stats()["partages"] == 2
+
+    # Une vraie exception du calcul est, elle, transmise aux suiveurs
+    async def echec():
+        await asyncio.sleep(0.01)
+        raise ValueError("modèle indisponible")
+
+    autre = cache.cle(1, [9, 1, 0, 0, 60.0, 50.0, 10.0])
+    resultats = await asyncio.gather(
+        cache.obtenir(autre, echec), cache.obtenir(autre, echec), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in resultats)
+
+
+@pytest.mark.unit
+async def test_cache_eviction_ttl_et_version():
+    """Éviction LRU, expiration TTL et invalidation par changement de version"""
+    cache, appels = CachePredictions(taille_max=2), []
+    for h in range(3):
+        await cache.obtenir(cache.cle(1, [h, *LIGNE[1:]]), calcul_compte(appels))
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["taille"] == 2
+
+    # Nouvelle version du modèle : les anciennes entrées ne sont plus servies
+    await cache.obtenir(cache.cle(2, [2, *LIGNE[1:]]), calcul_compte(appels))
+    assert len(appels) == 4
+    assert cache.stats()["taille"] == 1
+
+    cache.ttl_s = 0.0
+    cle = cache.cle(2, LIGNE)
+    await cache.obtenir(cle, calcul_compte(appels))
+    await cache.obtenir(cle, calcul_compte(appels))
+    assert cache.stats()["expirations"] == 1
+
+
+@pytest.mark.integration
+def test_metriques_cache_endpoint(client):
+    """Deux /predire identiques : le second est un succès de cache"""
+    payload = {
+        "heure": 11,
+        "jour_semaine": 3,
+        "meteo": 2,
+        "incidents": 1,
+        "vitesse_moyenne": 33.3,
+        "debit_vehicules": 77.7,
+        "distance_km": 4.2,
+    }
+    avant = client.get("/api/v1/metriques/cache").json()["succes"]
+    premiere = client.post("/api/v1/predire", json=payload).json()
+    seconde = client.post("/api/v1/predire", json=payload).json()
+    assert premiere == seconde
+    assert client.get("/api/v1/metriques/cache").json()["succes"] == avant + 1
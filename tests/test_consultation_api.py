@@ -4,8 +4,11 @@ Tests pour l'API de consultation des prédictions stockées
 # pylint: disable=import-error
 from datetime import datetime
 import pytest
+from sqlalchemy import create_engine, inspect, text
+from fastapi.encoders import jsonable_encoder
 
-from app.database import Prediction
+from app.api.v1.endpoints import PredictionOutput
+from app.database import Prediction, init_db
 
 
 @pytest.mark.integration
@@ -169,3 +172,138 @@ def test_lire_predictions_ordre_chronologique(client, db_session):
     # (plus récentes en premier)
     timestamps = [datetime.fromisoformat(p["timestamp"]) for p in data]
     assert timestamps == sorted(timestamps, reverse=True)
+
+
+@pytest.mark.integration
+def test_lire_predictions_pagination_curseur(client, db_session):
+    """Test de la pagination par curseur (keyset) avec timestamps égaux"""
+    meme_instant = datetime.now()
+    for i in range(5):
+        db_session.add(
+            Prediction(
+                distance_km=10.0 + i,
+                heure=8,
+                jour_semaine=1,
+                meteo=0,
+                incidents=0,
+                vitesse_moyenne=60.0,
+                debit_vehicules=50.0,
+                vitesse_prevue=55.0,
+                temps_trajet_prevu=11.0,
+                timestamp=meme_instant,
+            )
+        )
+    db_session.commit()
+
+    vus, curseur, pages = [], None, 0
+    while True:
+        url = "/api/v1/predictions?limit=2" + (f"&curseur={curseur}" if curseur else "")
+        response = client.get(url)
+        assert response.status_code == 200
+        vus.extend(p["id"] for p in response.json())
+        pages += 1
+        curseur = response.headers.get("X-Curseur-Suivant")
+        if curseur is None:
+            break
+
+    assert pages == 3
+    assert vus == sorted(vus, reverse=True)
+    assert len(set(vus)) == 5
+
+    # Compatibilité : la pagination par décalage donne le même ordre
+    offset = client.get("/api/v1/predictions?skip=0&limit=5").json()
+    assert [p["id"] for p in offset] == vus
+
+
+@pytest.mark.integration
+def test_lire_predictions_curseur_invalide(client):
+    """Un curseur illisible est rejeté avec une erreur 400"""
+    response = client.get("/api/v1/predictions?curseur=pas-un-curseur")
+    assert response.status_code == 400
+
+
+@pytest.mark.integration
+def test_exporter_predictions_ndjson_et_csv(client, db_session):
+    """Test de l'export en flux NDJSON et CSV avec filtre de date"""
+    # pylint: disable=import-outside-toplevel
+    import csv
+    import io
+    import json
+    from datetime import timedelta
+
+    base_time = datetime(2025, 1, 1, 12, 0, 0)
+    for i in range(3):
+        db_session.add(
+            Prediction(
+                distance_km=10.0 + i,
+                heure=8,
+                jour_semaine=1,
+                meteo=0,
+                incidents=0,
+                vitesse_moyenne=60.0,
+                debit_vehicules=50.0,
+                vitesse_prevue=55.0,
+                temps_trajet_prevu=11.0,
+                timestamp=base_time + timedelta(days=i),
+            )
+        )
+    db_session.commit()
+
+    response = client.get("/api/v1/predictions/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lignes = [json.loads(l) for l in response.text.splitlines()]
+    assert [l["distance_km"] for l in lignes] == [10.0, 11.0, 12.0]
+    assert datetime.fromisoformat(lignes[0]["timestamp"]) == base_time
+
+    response = client.get("/api/v1/predictions/export?format=csv&date_debut=2025-01-02T00:00:00")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lignes = list(csv.DictReader(io.StringIO(response.text)))
+    assert [float(l["distance_km"]) for l in lignes] == [11.0, 12.0]
+
+    assert client.get("/api/v1/predictions/export?format=xml").status_code == 422
+
+
+@pytest.mark.integration
+def test_lire_predictions_encodage_direct_identique(client, db_session):
+    """L'encodage direct des lignes donne le même JSON que la validation PredictionOutput"""
+    prediction = Prediction(
+        lat_depart=None,
+        lon_depart=None,
+        lat_arrivee=None,
+        lon_arrivee=None,
+        distance_km=3.25,
+        heure=17,
+        jour_semaine=4,
+        meteo=1,
+        incidents=1,
+        vitesse_moyenne=42.5,
+        debit_vehicules=80,
+        vitesse_prevue=34.0,
+        temps_trajet_prevu=5.735294117647059,
+        timestamp=datetime(2024, 3, 1, 17, 45, 12, 345678),
+    )
+    db_session.add(prediction)
+    db_session.commit()
+
+    attendu = jsonable_encoder(PredictionOutput.model_validate(prediction, from_attributes=True))
+    assert client.get("/api/v1/predictions").json() == [attendu]
+    assert isinstance(client.get("/api/v1/predictions").json()[0]["debit_vehicules"], float)
+
+
+@pytest.mark.unit
+def test_init_db_ajoute_index_pagination_table_existante(tmp_path):
+    """init_db crée l'index de pagination sur une table predictions antérieure à son ajout"""
+    moteur = create_engine(f"sqlite:///{tmp_path / 'ancienne.db'}")
+    with moteur.begin() as connexion:
+        connexion.execute(
+            text("CREATE TABLE predictions (id INTEGER PRIMARY KEY, timestamp DATETIME)")
+        )
+
+    init_db(moteur)
+    init_db(moteur)  # idempotent
+
+    index = {i["name"]: i["column_names"] for i in inspect(moteur).get_indexes("predictions")}
+    assert index["ix_predictions_timestamp_id"] == ["timestamp", "id"]
+    moteur.dispose()
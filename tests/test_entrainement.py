@@ -0,0 +1,81 @@
+"""
+Tests pour les ré-entraînements en tâche de fond
+"""
+# pylint: disable=import-error
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+import pytest
+
+from app.services import entrainement
+from app.services.entrainement import GestionnaireEntrainement
+from app.services.model import ModeleTrafic
+
+
+def attendre(tache, delai=30.0):
+    fin = time.monotonic() + delai
+    while tache.statut not in ("terminee", "echec") and time.monotonic() < fin:
+        time.sleep(0.02)
+    return tache.statut
+
+
+@pytest.mark.unit
+def test_tache_publie_nouvelle_version():
+    """Une tâche terminée publie une nouvelle version du modèle"""
+    modele = ModeleTrafic(seed=42)
+    gestionnaire = GestionnaireEntrainement(modele, executeur=ThreadPoolExecutor(1))
+    tache = gestionnaire.soumettre(seed=7)
+    assert attendre(tache) == "terminee"
+    assert tache.version_modele == modele.version == 2
+    assert gestionnaire.obtenir(tache.id) is tache
+    gestionnaire.arreter()
+
+
+@pytest.mark.unit
+def test_tache_dedupliquee_et_echec(monkeypatch):
+    """Une soumission identique réutilise la tâche active ; une erreur est rapportée"""
+    modele = ModeleTrafic(seed=42)
+    liberer = Event()
+    original = entrainement.entrainer_hors_processus
+
+    def entrainer_bloque(parametres):
+        liberer.wait(5)
+        if parametres["seed"] < 0:
+            raise ValueError("seed négatif")
+        return original(parametres)
+
+    monkeypatch.setattr(entrainement, "entrainer_hors_processus", entrainer_bloque)
+    gestionnaire = GestionnaireEntrainement(modele, executeur=ThreadPoolExecutor(2))
+    premiere = gestionnaire.soumettre(seed=7)
+    assert gestionnaire.soumettre(seed=7) is premiere
+    echec = gestionnaire.soumettre(seed=-1)
+    assert echec is not premiere
+
+    liberer.set()
+    assert attendre(premiere) == "terminee"
+    assert attendre(echec) == "echec"
+    assert "seed négatif" in echec.erreur
+    # Une fois terminée, une nouvelle soumission crée une nouvelle tâche
+    assert gestionnaire.soumettre(seed=7) is not premiere
+    gestionnaire.arreter()
+
+
+@pytest.mark.integration
+def test_reentrainer_endpoint_pool_processus(client):
+    """POST /reentrainer renvoie un job id ; le statut passe à « terminee »"""
+    response = client.post("/api/v1/reentrainer?seed=11")
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    fin = time.monotonic() + 60
+    statut = None
+    while time.monotonic() < fin:
+        statut = client.get(f"/api/v1/reentrainer/{job_id}").json()
+        if statut["statut"] in ("terminee", "echec"):
+            break
+        time.sleep(0.25)
+    assert statut["statut"] == "terminee"
+    assert statut["version_modele"] >= 2
+
+    assert client.get("/api/v1/reentrainer/inconnu").status_code == 404
@@ -0,0 +1,103 @@
+"""
+Tests pour l'entraînement depuis l'historique des prédictions
+"""
+# pylint: disable=import-error,redefined-outer-name
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, insert
+
+from app.database import Base, Prediction, Retour
+from app.services.historique import blocs_historique, entrainer_depuis_historique
+from app.services.model import ModeleTrafic
+
+DEBUT = datetime(2025, 1, 1)
+
+
+@pytest.fixture
+def engine_historique(tmp_path):
+    """Base SQLite remplie de 3000 prédictions dont la décision suit le générateur"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'historique.db'}")
+    Base.metadata.create_all(bind=engine)
+    X, y = ModeleTrafic.generer(n=3000, seed=5)
+    lignes = [
+        {
+            "heure": int(x[0]),
+            "jour_semaine": int(x[1]),
+            "meteo": int(x[2]),
+            "incidents": int(x[3]),
+            "vitesse_moyenne": float(x[4]),
+            "debit_vehicules": float(x[5]),
+            "distance_km": float(x[6]),
+            "vitesse_prevue": float(x[4]) * (1.0 - 0.2 * int(c)),
+            "temps_trajet_prevu": 1.0,
+            "timestamp": DEBUT + timedelta(minutes=i),
+        }
+        for i, (x, c) in enumerate(zip(X, y))
+    ]
+    with engine.begin() as connexion:
+        connexion.execute(insert(Prediction), lignes)
+    yield engine, X, y
+    engine.dispose()
+
+
+@pytest.mark.unit
+def test_blocs_historique_en_flux(engine_historique):
+    """Les lignes sont relues par blocs, dans l'ordre, avec l'étiquette enregistrée"""
+    engine, X, y = engine_historique
+    blocs = list(blocs_historique(engine, taille_bloc=1000))
+    assert [len(b[0]) for b in blocs] == [1000, 1000, 1000]
+    X_lu = np.vstack([b[0] for b in blocs])
+    # debit_vehicules est stocké en entier dans la table
+    np.testing.assert_allclose(X_lu[:, [0, 1, 2, 3, 4, 6]], X[:, [0, 1, 2, 3, 4, 6]])
+    np.testing.assert_array_equal(np.concatenate([b[1] for b in blocs]), y)
+
+    filtres = list(blocs_historique(engine, 1000, date_debut=DEBUT + timedelta(minutes=2500)))
+    assert sum(len(b[0]) for b in filtres) == 500
+
+
+@pytest.mark.unit
+def test_entrainer_depuis_historique(engine_historique):
+    """Un modèle entraîné sur l'historique reproduit les décisions enregistrées"""
+    engine, X, y = engine_historique
+    pipe, rapport = entrainer_depuis_historique(engine, taille_bloc=500, epoques=3)
+    assert rapport["lignes"] == 3000
+    assert rapport["source"] == "historique"
+    y_pred, _ = ModeleTrafic(pipe=pipe).predire(X)
+    assert (y_pred == y).mean() > 0.85
+
+
+@pytest.mark.unit
+def test_historique_etiquettes_observees(engine_historique):
+    """Un retour terrain remplace la décision enregistrée ; seul le dernier compte"""
+    engine, _, y = engine_historique
+    # Retours contraires à la décision sur les 100 premières prédictions (ids 1..100)
+    retours = [
+        {"prediction_id": i + 1, "congestion": int(y[i]), "timestamp": DEBUT} for i in range(100)
+    ] + [
+        {"prediction_id": i + 1, "congestion": 1 - int(y[i]), "timestamp": DEBUT}
+        for i in range(100)
+    ]
+    with engine.begin() as connexion:
+        connexion.execute(insert(Retour), retours)
+
+    compteurs = {}
+    etiquettes = np.concatenate([b[1] for b in blocs_historique(engine, 1000, compteurs=compteurs)])
+    np.testing.assert_array_equal(etiquettes[:100], 1 - y[:100])
+    np.testing.assert_array_equal(etiquettes[100:], y[100:])
+    assert compteurs == {"lignes": 3000, "etiquettes_observees": 100}
+
+    observees = list(blocs_historique(engine, 1000, observees_seulement=True))
+    assert sum(len(b[0]) for b in observees) == 100
+    _, rapport = entrainer_depuis_historique(engine, taille_bloc=500)
+    assert rapport["etiquettes_observees"] == 100
+
+
+@pytest.mark.unit
+def test_entrainer_depuis_historique_vide(tmp_path):
+    """Un historique vide est une erreur explicite"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'vide.db'}")
+    Base.metadata.create_all(bind=engine)
+    with pytest.raises(ValueError):
+        entrainer_depuis_historique(engine)
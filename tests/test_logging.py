@@ -0,0 +1,58 @@
+"""
+Tests pour la journalisation JSON non bloquante
+"""
+# pylint: disable=import-error,no-member
+import json
+import logging
+import queue
+
+import pytest
+
+from app.core.logging import EchantillonnageInfo, JsonFormatter, QueueHandlerNonBloquant
+
+
+def _enregistrement(niveau=logging.INFO, msg="bonjour %s", args=("monde",), **extra):
+    record = logging.LogRecord("test", niveau, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+@pytest.mark.unit
+def test_file_pleine_abandonne_sans_bloquer():
+    """Au-delà de la capacité, les enregistrements sont comptés comme abandonnés"""
+    handler = QueueHandlerNonBloquant(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(_enregistrement())
+    assert handler.queue.qsize() == 2
+    assert handler.abandons == 3
+    assert handler.queue.get_nowait().msg == "bonjour monde"
+
+
+@pytest.mark.unit
+def test_echantillonnage_epargne_les_avertissements():
+    """Taux nul : INFO écarté, WARNING conservé"""
+    filtre = EchantillonnageInfo(taux=0.0)
+    assert not filtre.filter(_enregistrement(logging.INFO))
+    assert filtre.filter(_enregistrement(logging.WARNING))
+    assert filtre.ecartes == 1
+
+
+@pytest.mark.unit
+def test_formatter_inclut_les_champs_extra():
+    """Les champs passés via extra (request_id, étapes) sont sérialisés"""
+    ligne = JsonFormatter().format(_enregistrement(request_id="abc", etapes={"inference": 0.12}))
+    payload = json.loads(ligne)
+    assert payload["msg"] == "bonjour monde"
+    assert payload["request_id"] == "abc"
+    assert payload["etapes"] == {"inference": 0.12}
+
+
+@pytest.mark.integration
+def test_journal_acces(client, caplog):
+    """Chaque requête produit un enregistrement d'accès corrélé à X-Request-ID"""
+    with caplog.at_level(logging.INFO, logger="mobilitysoft.acces"):
+        client.get("/api/v1/sante", headers={"X-Request-ID": "acces-1"})
+    acces = [r for r in caplog.records if r.name == "mobilitysoft.acces"]
+    assert acces and acces[-1].request_id == "acces-1"
+    assert acces[-1].route == "/api/v1/sante"
+    assert acces[-1].statut == 200
@@ -0,0 +1,72 @@
+"""
+Tests pour les métriques et l'endpoint /metrics au format Prometheus
+"""
+# pylint: disable=import-error
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import ATTENTE_POOL, Registre
+from app.database import PoolChronometre
+
+
+@pytest.mark.unit
+def test_exposition_format_texte():
+    """Histogramme cumulatif, étiquettes échappées, compteurs et fonctions"""
+    registre = Registre()
+    hist = registre.histogramme("h_secondes", "Latence", (0.1, 1.0), etiquettes=("route",))
+    hist.etiqueter('/a"b').observer(0.05)
+    hist.etiqueter('/a"b').observer(0.5)
+    registre.compteur("c_total", "Compteur").inc(3)
+    registre.fonction("g", "Jauge calculée", "gauge", lambda: 2.5)
+
+    texte = registre.exposer()
+    assert "# TYPE h_secondes histogram" in texte
+    assert 'h_secondes_bucket{route="/a\\"b",le="0.1"} 1' in texte
+    assert 'h_secondes_bucket{route="/a\\"b",le="+Inf"} 2' in texte
+    assert 'h_secondes_count{route="/a\\"b"} 2' in texte
+    assert "c_total 3" in texte
+    assert "g 2.5" in texte
+
+
+@pytest.mark.unit
+def test_attente_pool_mesuree(tmp_path):
+    """Le pool chronométré enregistre chaque obtention de connexion"""
+    moteur = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=PoolChronometre)
+    avant = ATTENTE_POOL.snapshot()["nombre"]
+    with moteur.connect() as connexion:
+        connexion.execute(text("SELECT 1"))
+    moteur.dispose()
+    assert ATTENTE_POOL.snapshot()["nombre"] == avant + 1
+
+
+@pytest.mark.integration
+def test_endpoint_metrics(client):
+    """Après une prédiction, /metrics expose latence par route, inférence et commit"""
+    payload = {
+        "heure": 8,
+        "jour_semaine": 1,
+        "meteo": 0,
+        "incidents": 0,
+        "vitesse_moyenne": 60.0,
+        "debit_vehicules": 50.0,
+        "distance_km": 12.0,
+    }
+    assert client.post("/api/v1/predire", json=payload).status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    texte = response.text
+    assert (
+        'mobilitysoft_http_requete_duree_secondes_count{methode="POST",route="/api/v1/predire",'
+        'statut="200"}' in texte
+    )
+    for nom in (
+        "mobilitysoft_inference_duree_secondes_count",
+        "mobilitysoft_db_commit_duree_secondes_count",
+        "mobilitysoft_modele_verrou_attente_secondes_count",
+        "mobilitysoft_db_pool_attente_secondes_count",
+        "mobilitysoft_rate_limit_rejets_total",
+        "mobilitysoft_http_requetes_en_cours 1",
+    ):
+        assert nom in texte
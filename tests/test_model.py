@@ -69,3 +69,105 @@ def test_modele_predictions_multiples():
     assert proba.shape == (3,)
     assert all(yi in [0, 1] for yi in y)
     assert all(0.0 <= p <= 1.0 for p in proba)
+
+
+@pytest.mark.unit
+def test_modele_version_incrementee_au_reentrainement():
+    """Chaque ré-entraînement publie une nouvelle version"""
+    modele = ModeleTrafic(seed=42)
+    X = np.array([[8, 1, 0, 0, 60.0, 50.0, 10.0]])
+    _, _, v1 = modele.predire_versionne(X)
+    assert modele.reentrainer(seed=123) == v1 + 1
+    _, _, v2 = modele.predire_versionne(X)
+    assert v2 == v1 + 1
+
+
+@pytest.mark.unit
+def test_modele_prediction_sans_verrou():
+    """Les lecteurs ne prennent jamais le verrou de publication"""
+    modele = ModeleTrafic(seed=42)
+    X = np.array([[8, 1, 0, 0, 60.0, 50.0, 10.0]])
+    ancien = modele.etat
+    with modele.lock:
+        y, proba = modele.predire(X)
+    assert y.shape == (1,)
+    assert proba.shape == (1,)
+    # L'ancien instantané reste intact après publication d'une nouvelle version
+    modele.reentrainer(seed=7)
+    assert modele.etat is not ancien
+    assert ancien.pipe is not modele.pipe
+
+
+@pytest.mark.unit
+def test_noyau_fusionne_equivalent_sklearn():
+    """Le noyau fusionné donne les mêmes probabilités que le pipeline sklearn"""
+    modele = ModeleTrafic(seed=42)
+    X, _ = modele.generer(n=2000, seed=99)
+    y_ref, p_ref = modele.predire_sklearn(X)
+    y, proba = modele.predire(X)
+    np.testing.assert_allclose(proba, p_ref, rtol=0, atol=1e-9)
+    np.testing.assert_array_equal(y, y_ref)
+
+
+@pytest.mark.unit
+def test_noyau_rejette_mauvaise_forme():
+    """Le noyau refuse une matrice qui n'a pas 7 colonnes"""
+    modele = ModeleTrafic(seed=42)
+    with pytest.raises(ValueError):
+        modele.predire(np.zeros((1, 6)))
+
+
+@pytest.mark.unit
+def test_blocs_synthetiques_taille_exacte():
+    """Les blocs couvrent exactement n lignes, chacun au plus taille_bloc"""
+    blocs = list(ModeleTrafic.blocs_synthetiques(n=12_345, taille_bloc=5_000, seed=1))
+    assert [len(X) for X, _ in blocs] == [5_000, 5_000, 2_345]
+    assert all(X.shape[1] == 7 and len(y) == len(X) for X, y in blocs)
+
+
+@pytest.mark.unit
+def test_entrainement_en_flux_precis_et_memoire_constante():
+    """L'entraînement en flux apprend le signal avec un pic mémoire indépendant de n"""
+    # pylint: disable=import-outside-toplevel
+    import tracemalloc
+
+    pics = []
+    for n in (20_000, 100_000):
+        tracemalloc.start()
+        pipe, rapport = ModeleTrafic.entrainer_avec_rapport(
+            seed=3, n_echantillons=n, taille_bloc=5_000
+        )
+        pics.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert rapport["lignes"] == n
+        assert rapport["passes"] == rapport["epoques"] + 1
+        assert rapport["lignes_par_s"] == pytest.approx(n / rapport["duree_s"], rel=0.05)
+    assert pics[1] < 1.5 * pics[0]
+
+    modele = ModeleTrafic(pipe=pipe)
+    X, y = ModeleTrafic.generer(n=5_000, seed=1234)
+    y_pred, _ = modele.predire(X)
+    assert (y_pred == y).mean() > 0.9
+
+
+@pytest.mark.unit
+def test_mise_a_jour_incrementale_suit_les_observations():
+    """Un mini-lot d'observations déplace les probabilités vers les étiquettes"""
+    modele = ModeleTrafic(seed=42)
+    X = np.array([[12, 6, 0, 0, 80.0, 30.0, 5.0]] * 16)
+    _, avant = modele.predire(X[:1])
+    version = modele.mise_a_jour_incrementale(X, np.ones(16), taux=0.5, iterations=5)
+    _, apres = modele.predire(X[:1])
+    assert version == 2
+    assert apres[0] > avant[0]
+
+
+@pytest.mark.unit
+def test_publication_conditionnelle_version():
+    """Une mise à jour calculée sur une version dépassée n'est pas publiée"""
+    modele = ModeleTrafic(seed=42)
+    pipe = modele.pipe
+    modele.reentrainer(seed=1)
+    assert modele.publier(pipe, si_version=1) is None
+    assert modele.version == 2
+    assert modele.publier(pipe, si_version=2) == 3
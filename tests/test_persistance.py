@@ -0,0 +1,132 @@
+"""
+Tests pour l'écriture différée (write-behind) des prédictions
+"""
+# pylint: disable=import-error,redefined-outer-name
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, Prediction
+from app.services.persistance import TamponEcriture, TamponPlein
+
+
+@pytest.fixture
+def fabrique(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tampon.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def ligne(i: int) -> dict:
+    return {
+        "distance_km": float(i),
+        "heure": i % 24,
+        "jour_semaine": i % 7,
+        "meteo": 0,
+        "incidents": 0,
+        "vitesse_moyenne": 60.0,
+        "debit_vehicules": 50.0,
+        "vitesse_prevue": 60.0,
+        "temps_trajet_prevu": 1.0,
+        "timestamp": datetime.now(),
+    }
+
+
+@pytest.mark.unit
+async def test_tampon_ecrit_par_lots(fabrique):
+    """Les lignes sont insérées par lots et tout est écrit à l'arrêt"""
+    tampon = TamponEcriture(fabrique, taille_lot=4, intervalle_ms=1000, capacite=100)
+    for i in range(10):
+        await tampon.ajouter(ligne(i))
+    await tampon.arreter()
+
+    with fabrique() as db:
+        assert db.query(Prediction).count() == 10
+    stats = tampon.stats()
+    assert stats["ecrites"] == 10
+    assert 3 <= stats["lots"] < 10
+    assert stats["en_attente"] == 0
+
+
+@pytest.mark.unit
+async def test_tampon_contre_pression(fabrique):
+    """Quand la base ne suit pas, la file bornée finit par refuser les lignes"""
+    debloquer = threading.Event()
+
+    def session_lente():
+        debloquer.wait(5)
+        return fabrique()
+
+    tampon = TamponEcriture(session_lente, taille_lot=1, intervalle_ms=0, capacite=1)
+    tampon.attente_max_s = 0.05
+    await tampon.ajouter(ligne(0))  # pris par la tâche de fond, bloquée sur la base
+    await asyncio.sleep(0.01)
+    await tampon.ajouter(ligne(1))  # remplit la file
+    with pytest.raises(TamponPlein):
+        await tampon.ajouter(ligne(2))
+    assert tampon.stats()["rejets"] == 1
+
+    debloquer.set()
+    await tampon.arreter()
+    with fabrique() as db:
+        assert db.query(Prediction).count() == 2
+
+
+@pytest.mark.unit
+async def test_tampon_reessaie_avant_abandon(fabrique):
+    """Un échec transitoire de la base est retenté ; les lignes ne sont perdues qu'en dernier"""
+    pannes = [2]
+
+    def session_instable():
+        if pannes[0] > 0:
+            pannes[0] -= 1
+            raise ConnectionError("base indisponible")
+        return fabrique()
+
+    tampon = TamponEcriture(
+        session_instable, taille_lot=10, intervalle_ms=0, tentatives=3, delai_reessai_ms=1
+    )
+    for i in range(3):
+        await tampon.ajouter(ligne(i))
+    await tampon.arreter()
+    with fabrique() as db:
+        assert db.query(Prediction).count() == 3
+    assert (tampon.stats()["reessais"], tampon.stats()["perdues"]) == (2, 0)
+
+    pannes[0] = 10
+    await tampon.ajouter(ligne(3))
+    await tampon.arreter()
+    assert (tampon.stats()["reessais"], tampon.stats()["perdues"]) == (4, 1)
+
+
+@pytest.mark.integration
+def test_predire_en_ecriture_differee(monkeypatch, fabrique):
+    """En mode write-behind, /predire répond puis la ligne est écrite à l'arrêt"""
+    # pylint: disable=import-outside-toplevel
+    from app.api.v1 import endpoints
+    from app.core.config import settings
+    from app.main import app
+
+    monkeypatch.setattr(settings, "WRITE_BEHIND_ENABLED", True)
+    monkeypatch.setattr(endpoints.TAMPON, "fabrique_session", fabrique)
+    payload = {
+        "heure": 10,
+        "jour_semaine": 2,
+        "meteo": 0,
+        "incidents": 0,
+        "vitesse_moyenne": 70.0,
+        "debit_vehicules": 40.0,
+        "distance_km": 10.0,
+    }
+    with TestClient(app) as client:
+        assert client.post("/api/v1/predire", json=payload).status_code == 200
+        assert client.get("/api/v1/metriques/persistance").json()["actif"] is True
+
+    with fabrique() as db:
+        assert db.query(Prediction).count() == 1
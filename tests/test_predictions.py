@@ -29,6 +29,7 @@ def test_predire_avec_donnees_valides(client):
     assert data["risque"] in ["élevé", "faible"]
     assert isinstance(data["proba"], float)
     assert isinstance(data["recommandations"], list)
+    assert data["version_modele"] >= 1
 
 
 @pytest.mark.integration
@@ -126,3 +127,221 @@ def test_predire_sauvegarde_en_base(client, db_session):
     assert prediction.heure == 10
     assert prediction.jour_semaine == 2
     assert prediction.vitesse_moyenne == 70.0
+
+
+@pytest.mark.integration
+def test_predire_lot(client, db_session):
+    """Test de prédiction par lot avec insertion groupée"""
+    # pylint: disable=import-outside-toplevel
+    from app.database import Prediction
+
+    lot = [
+        {
+            "heure": 8,
+            "jour_semaine": 1,
+            "meteo": 0,
+            "incidents": 0,
+            "vitesse_moyenne": 60.0,
+            "debit_vehicules": 50.0,
+            "lat_a": 45.5017,
+            "lon_a": -73.5673,
+            "lat_b": 45.5088,
+            "lon_b": -73.5540,
+        },
+        {
+            "heure": 17,
+            "jour_semaine": 4,
+            "meteo": 1,
+            "incidents": 1,
+            "vitesse_moyenne": 40.0,
+            "debit_vehicules": 80.0,
+            "distance_km": 15.5,
+        },
+        {
+            "heure": 12,
+            "jour_semaine": 6,
+            "meteo": 0,
+            "incidents": 0,
+            "vitesse_moyenne": 80.0,
+            "debit_vehicules": 30.0,
+        },
+    ]
+    response = client.post("/api/v1/predire/lot", json=lot)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 3
+    assert all(d["risque"] in ["élevé", "faible"] for d in data)
+
+    # Chaque élément du lot correspond à l'appel unitaire
+    for entree, sortie in zip(lot, data):
+        unitaire = client.post("/api/v1/predire", json=entree).json()
+        assert unitaire["proba"] == sortie["proba"]
+        assert unitaire["recommandations"] == sortie["recommandations"]
+
+    db_session.commit()
+    distances = [p.distance_km for p in db_session.query(Prediction).order_by(Prediction.id)]
+    assert len(distances) == 6
+    assert 1.0 < distances[0] < 1.5
+    assert distances[1] == 15.5
+    assert distances[2] == 0.0
+
+
+@pytest.mark.integration
+def test_predire_lot_vide_et_invalide(client):
+    """Un lot vide renvoie une liste vide ; un élément invalide est rejeté"""
+    assert client.post("/api/v1/predire/lot", json=[]).json() == []
+    payload = [
+        {
+            "heure": 25,
+            "jour_semaine": 1,
+            "meteo": 0,
+            "incidents": 0,
+            "vitesse_moyenne": 60.0,
+            "debit_vehicules": 50.0,
+        }
+    ]
+    assert client.post("/api/v1/predire/lot", json=payload).status_code == 422
+
+
+@pytest.mark.integration
+def test_depart_optimal(client):
+    """Les départs candidats sont classés par risque croissant"""
+    payload = {
+        "meteo": 1,
+        "incidents": 0,
+        "vitesse_moyenne": 50.0,
+        "debit_vehicules": 60.0,
+        "distance_km": 12.0,
+        "heure_debut": 6,
+        "heure_fin": 20,
+        "jours": [1, 2],
+        "nombre": 30,
+    }
+    response = client.post("/api/v1/depart-optimal", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    departs = data["departs"]
+    assert len(departs) == 30  # 15 heures × 2 jours
+    assert [d["proba"] for d in departs] == sorted(d["proba"] for d in departs)
+    assert {(d["heure"], d["jour_semaine"]) for d in departs} == {
+        (h, j) for h in range(6, 21) for j in (1, 2)
+    }
+
+    # Chaque candidat correspond à l'appel unitaire /predire
+    meilleur = departs[0]
+    unitaire = client.post(
+        "/api/v1/predire",
+        json={
+            "heure": meilleur["heure"],
+            "jour_semaine": meilleur["jour_semaine"],
+            "meteo": 1,
+            "incidents": 0,
+            "vitesse_moyenne": 50.0,
+            "debit_vehicules": 60.0,
+            "distance_km": 12.0,
+        },
+    ).json()
+    assert unitaire["proba"] == meilleur["proba"]
+
+
+@pytest.mark.integration
+def test_depart_optimal_fenetre_minuit(client):
+    """Une fenêtre qui passe minuit couvre la fin et le début de journée"""
+    payload = {
+        "meteo": 0,
+        "incidents": 0,
+        "vitesse_moyenne": 60.0,
+        "debit_vehicules": 40.0,
+        "heure_debut": 22,
+        "heure_fin": 1,
+        "jours": [5],
+        "nombre": 10,
+    }
+    response = client.post("/api/v1/depart-optimal", json=payload)
+    assert response.status_code == 200
+    assert sorted(d["heure"] for d in response.json()["departs"]) == [0, 1, 22, 23]
+
+    payload["jours"] = [7]
+    assert client.post("/api/v1/depart-optimal", json=payload).status_code == 422
+
+
+@pytest.mark.integration
+def test_predire_corps_invalide_format_422(client):
+    """Le chemin de validation rapide garde le format d'erreur 422 de FastAPI"""
+    response = client.post("/api/v1/predire", json={"heure": 8})
+    assert response.status_code == 422
+    locs = {tuple(erreur["loc"]) for erreur in response.json()["detail"]}
+    assert ("body", "jour_semaine") in locs
+
+    response = client.post(
+        "/api/v1/predire", content=b"{pas du json", headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.integration
+def test_matrice_trajets(client):
+    """Grille N × M cohérente avec /predire pour chaque paire ; taille bornée"""
+    # pylint: disable=import-outside-toplevel
+    from app.services.geodesie import haversine_km
+
+    conditions = {
+        "heure": 17,
+        "jour_semaine": 4,
+        "meteo": 1,
+        "incidents": 0,
+        "vitesse_moyenne": 45.0,
+        "debit_vehicules": 70.0,
+    }
+    origines = [{"lat": 45.5017, "lon": -73.5673}, {"lat": 45.55, "lon": -73.65}]
+    destinations = [
+        {"lat": 45.5088, "lon": -73.5540},
+        {"lat": 45.4, "lon": -73.9},
+        {"lat": 45.6, "lon": -73.5},
+    ]
+    response = client.post(
+        "/api/v1/matrice-trajets",
+        json={"origines": origines, "destinations": destinations, **conditions},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["proba"]) == 2 and all(len(ligne) == 3 for ligne in data["proba"])
+
+    o, d = origines[1], destinations[2]
+    assert data["distance_km"][1][2] == pytest.approx(
+        haversine_km(o["lat"], o["lon"], d["lat"], d["lon"]), abs=1e-3
+    )
+    unitaire = client.post(
+        "/api/v1/predire",
+        json={
+            **conditions,
+            "lat_a": o["lat"],
+            "lon_a": o["lon"],
+            "lat_b": d["lat"],
+            "lon_b": d["lon"],
+        },
+    ).json()
+    assert data["proba"][1][2] == unitaire["proba"]
+    assert data["version_modele"] == unitaire["version_modele"]
+
+
+@pytest.mark.integration
+def test_matrice_trajets_limites(client, monkeypatch):
+    """Au-delà de MATRICE_MAX_PAIRES : 413 ; liste vide : 422"""
+    # pylint: disable=import-outside-toplevel
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "MATRICE_MAX_PAIRES", 3)
+    point = {"lat": 45.5, "lon": -73.5}
+    conditions = {
+        "heure": 8,
+        "jour_semaine": 1,
+        "meteo": 0,
+        "incidents": 0,
+        "vitesse_moyenne": 50.0,
+        "debit_vehicules": 40.0,
+    }
+    trop = {"origines": [point] * 2, "destinations": [point] * 2, **conditions}
+    assert client.post("/api/v1/matrice-trajets", json=trop).status_code == 413
+    vide = {"origines": [], "destinations": [point], **conditions}
+    assert client.post("/api/v1/matrice-trajets", json=vide).status_code == 422
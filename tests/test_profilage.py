@@ -0,0 +1,115 @@
+"""
+Tests pour le profilage à la demande (échantillonnage de piles, tracemalloc)
+"""
+# pylint: disable=import-error
+import os
+import threading
+import time
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.config import settings
+from app.core.profilage import EchantillonneurPile, ProfilageMiddleware, Profileur, profileur
+
+
+def calcul_occupe(arret: threading.Event):
+    while not arret.is_set():
+        sum(i * i for i in range(1000))
+
+
+@pytest.mark.unit
+def test_echantillonneur_format_folded(tmp_path):
+    """Les piles du thread occupé apparaissent, une ligne `pile compte` par pile"""
+    arret = threading.Event()
+    travail = threading.Thread(target=calcul_occupe, args=(arret,), name="travail")
+    travail.start()
+    echantillonneur = EchantillonneurPile(intervalle_s=0.001)
+    echantillonneur.demarrer()
+    time.sleep(0.1)
+    echantillonneur.arreter()
+    arret.set()
+    travail.join()
+
+    chemin = echantillonneur.ecrire(str(tmp_path / "p.folded"))
+    with open(chemin, encoding="utf-8") as f:
+        lignes = f.read().splitlines()
+    assert echantillonneur.echantillons > 0
+    pile, compte = lignes[0].rsplit(" ", 1)
+    assert int(compte) >= 1 and ";" in pile
+    assert any(l.startswith("travail;") and "calcul_occupe" in l for l in lignes)
+
+
+@pytest.mark.unit
+def test_diff_memoire_points_chauds(tmp_path):
+    """Une allocation faite pendant la fenêtre ressort dans le diff"""
+    retenu = []
+
+    def allouer():
+        time.sleep(0.02)
+        retenu.append(bytearray(2_000_000))
+
+    thread = threading.Thread(target=allouer)
+    thread.start()
+    resultat = Profileur(str(tmp_path)).diff_memoire(duree_s=0.1, top=5)
+    thread.join()
+
+    assert os.path.exists(resultat["fichier"])
+    assert resultat["top"][0]["octets"] >= 2_000_000
+    assert "test_profilage.py" in resultat["top"][0]["ligne"]
+
+
+@pytest.mark.unit
+def test_middleware_profil_par_requete(tmp_path):
+    """`X-Profil: 1` avec le jeton d'administration produit un profil pour cette seule requête"""
+    app = Starlette(routes=[Route("/", lambda _: PlainTextResponse("ok"))])
+    app.add_middleware(
+        ProfilageMiddleware, profileur_requetes=Profileur(str(tmp_path)), jeton="secret"
+    )
+    client = TestClient(app)
+
+    assert "X-Profil-Fichier" not in client.get("/").headers
+    response = client.get("/", headers={"X-Profil": "1", "X-Admin-Token": "secret"})
+    assert os.path.exists(tmp_path / response.headers["X-Profil-Fichier"])
+
+
+@pytest.mark.unit
+def test_middleware_profil_sans_jeton(tmp_path):
+    """Jeton absent, erroné ou non configuré : l'en-tête `X-Profil` est ignoré"""
+    for configure, envoye in (("secret", None), ("secret", "faux"), ("", "")):
+        app = Starlette(routes=[Route("/", lambda _: PlainTextResponse("ok"))])
+        app.add_middleware(
+            ProfilageMiddleware, profileur_requetes=Profileur(str(tmp_path)), jeton=configure
+        )
+        headers = {"X-Profil": "1"}
+        if envoye is not None:
+            headers["X-Admin-Token"] = envoye
+        response = TestClient(app).get("/", headers=headers)
+        assert response.status_code == 200
+        assert "X-Profil-Fichier" not in response.headers
+    assert not os.listdir(tmp_path)
+
+
+@pytest.mark.integration
+def test_endpoint_admin_profil(client, monkeypatch, tmp_path):
+    """Surface absente par défaut ; refusée sans ADMIN_TOKEN ; jeton exigé sinon"""
+    assert client.post("/api/v1/admin/profil?duree_s=0.05").status_code == 404
+
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "")
+    assert client.post("/api/v1/admin/profil?duree_s=0.05").status_code == 403
+    assert client.post("/api/v1/admin/memoire?duree_s=0.05").status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(profileur, "dossier", str(tmp_path))
+    assert client.post("/api/v1/admin/profil?duree_s=0.05").status_code == 403
+
+    response = client.post(
+        "/api/v1/admin/profil?duree_s=0.05&intervalle_ms=1", headers={"X-Admin-Token": "secret"}
+    )
+    assert response.status_code == 200
+    assert response.json()["echantillons"] > 0
+    assert os.path.exists(response.json()["fichier"])
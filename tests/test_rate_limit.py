@@ -0,0 +1,149 @@
+"""
+Tests pour le limiteur de débit à seau à jetons
+"""
+# pylint: disable=import-error
+import multiprocessing
+import sys
+
+import pytest
+
+from app.core import rate_limit, rate_limit_backends
+from app.core.rate_limit import RateLimiter
+from app.core.rate_limit_backends import ClientMemoire, StockageDistant, StockagePartage
+from app.database import get_db
+from app.main import app
+
+
+@pytest.mark.unit
+def test_seau_se_recharge_continument():
+    """60/min : le quota initial s'épuise puis un jeton revient chaque seconde"""
+    limiteur = RateLimiter(per_minute=60)
+    assert all(limiteur.consommer("a", maintenant=0.0) == 0 for _ in range(60))
+
+    attente = limiteur.consommer("a", maintenant=0.0)
+    assert attente == pytest.approx(1.0)
+    assert limiteur.consommer("a", maintenant=0.5) == pytest.approx(0.5)
+    assert limiteur.consommer("a", maintenant=1.0) == 0
+    assert limiteur.rejets == 2
+
+
+@pytest.mark.unit
+def test_nombre_de_seaux_borne():
+    """Au-delà de max_clients, les seaux les moins récemment utilisés sont oubliés"""
+    limiteur = RateLimiter(per_minute=10, max_clients=3)
+    for i in range(5):
+        limiteur.consommer(f"ip{i}", maintenant=0.0)
+    limiteur.consommer("ip2", maintenant=0.1)  # ip2 redevient récent
+    limiteur.consommer("ip5", maintenant=0.2)
+
+    assert len(limiteur.stockage.buckets) == 3
+    assert list(limiteur.stockage.buckets) == ["ip4", "ip2", "ip5"]
+    assert limiteur.stockage.evictions == 3
+
+
+@pytest.mark.unit
+def test_seaux_inactifs_liberes():
+    """Un seau inactif depuis un cycle complet est plein : il est libéré sans compter d'éviction"""
+    limiteur = RateLimiter(per_minute=60, max_clients=100)
+    limiteur.consommer("ancien", maintenant=0.0)
+    limiteur.consommer("nouveau", maintenant=61.0)
+    assert list(limiteur.stockage.buckets) == ["nouveau"]
+    assert limiteur.stockage.evictions == 0
+
+
+def _consommer_partage(chemin, n, resultats):
+    stockage = StockagePartage(chemin, nb_ensembles=64)
+    limiteur = RateLimiter(per_minute=60, stockage=stockage)
+    resultats.put(sum(limiteur.consommer("client", maintenant=0.0) == 0 for _ in range(n)))
+    stockage.fermer()
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(
+    sys.platform == "win32" or not rate_limit_backends.verrous_inter_processus(),
+    reason="fork et fcntl indisponibles (Windows)",
+)
+def test_stockage_partage_entre_processus(tmp_path):
+    """Deux processus sur le même fichier mmap se partagent un seul quota"""
+    chemin = str(tmp_path / "rl.shm")
+    contexte = multiprocessing.get_context("fork")
+    resultats = contexte.Queue()
+    processus = [
+        contexte.Process(target=_consommer_partage, args=(chemin, 50, resultats)) for _ in range(2)
+    ]
+    for p in processus:
+        p.start()
+    for p in processus:
+        p.join(timeout=30)
+    assert resultats.get(timeout=5) + resultats.get(timeout=5) == 60
+
+
+@pytest.mark.unit
+def test_stockage_partage_taille_fixe(tmp_path):
+    """La table ne grossit pas : un ensemble plein réutilise sa case la plus ancienne"""
+    stockage = StockagePartage(str(tmp_path / "rl.shm"), nb_ensembles=1, voies=2)
+    limiteur = RateLimiter(per_minute=1, stockage=stockage)
+    assert limiteur.consommer("a", maintenant=0.0) == 0
+    assert limiteur.consommer("a", maintenant=1.0) > 0
+    limiteur.consommer("b", maintenant=2.0)
+    limiteur.consommer("c", maintenant=3.0)  # évince "a"
+    assert limiteur.consommer("a", maintenant=4.0) == 0
+    assert stockage.stats()["octets"] == 64 + 2 * 24
+    assert stockage.evictions == 2
+
+    # Une seconde ouverture du même fichier voit le même état
+    autre = StockagePartage(stockage.chemin, nb_ensembles=1, voies=2)
+    assert RateLimiter(per_minute=1, stockage=autre).consommer("a", maintenant=4.0) > 0
+    autre.fermer()
+    stockage.fermer()
+
+
+@pytest.mark.unit
+def test_stockage_distant():
+    """Le client en mémoire remplace le magasin distant ; une panne laisse passer"""
+    client = ClientMemoire()
+    limiteur = RateLimiter(per_minute=1, stockage=StockageDistant(client))
+    assert limiteur.consommer("a", maintenant=0.0) == 0
+    assert limiteur.consommer("a", maintenant=0.0) > 0
+    assert client.appels == 2
+
+    class ClientEnPanne:
+        def seau_jetons(self, *_):
+            raise ConnectionError("magasin injoignable")
+
+    stockage = StockageDistant(ClientEnPanne())
+    assert RateLimiter(per_minute=1, stockage=stockage).consommer("a") == 0
+    assert stockage.stats()["erreurs"] == 1
+
+
+@pytest.mark.integration
+def test_429_avant_lecture_du_corps(client, monkeypatch):
+    """Le rejet intervient avant validation du corps et ouverture de session"""
+    monkeypatch.setattr(rate_limit, "limiter", RateLimiter(per_minute=1))
+    sessions = []
+
+    def compter_sessions():
+        sessions.append(1)
+        yield None
+
+    app.dependency_overrides[get_db] = compter_sessions
+
+    premiere = client.get("/api/v1/sante")
+    assert premiere.status_code == 200
+
+    response = client.post("/api/v1/predire", content=b"{pas du json")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert "X-Request-ID" in response.headers
+    assert not sessions
+
+    # Hors préfixe API : pas de limite
+    assert client.get("/").status_code == 200
+
+
+@pytest.mark.unit
+def test_stockage_partage_exige_fcntl(monkeypatch):
+    """Sans verrous inter-processus, le backend partagé est refusé au démarrage"""
+    monkeypatch.setattr(rate_limit_backends, "fcntl", None)
+    with pytest.raises(RuntimeError, match="fcntl"):
+        rate_limit.creer_stockage("partage")
@@ -0,0 +1,66 @@
+"""
+Tests d'équivalence des tables de recommandations avec la fonction de référence
+"""
+# pylint: disable=import-error
+import itertools
+
+import numpy as np
+import pytest
+
+from app.api.v1.endpoints import recommandations
+from app.models.schemas import EntreePrediction
+from app.services.recommandations import (
+    TABLE_RECOMMANDATIONS,
+    masques_np,
+    recommandations_lot,
+    recommandations_table,
+)
+
+PROBAS = (0.0, 0.3, 0.5999, 0.6, 0.95)
+DISTANCES = (None, 0.0, 5.0, 10.0, 10.0001, 250.0)
+
+
+def _grille():
+    for heure, meteo, incidents, distance, proba, y in itertools.product(
+        range(24), range(3), range(2), DISTANCES, PROBAS, range(2)
+    ):
+        entree = EntreePrediction(
+            heure=heure,
+            jour_semaine=2,
+            meteo=meteo,
+            incidents=incidents,
+            vitesse_moyenne=50.0,
+            debit_vehicules=30.0,
+            distance_km=distance,
+        )
+        yield entree, proba, y
+
+
+@pytest.mark.unit
+def test_table_equivalente_scalaire():
+    """Toutes les combinaisons d'entrées donnent le même résultat que la référence"""
+    for entree, proba, y in _grille():
+        assert list(recommandations_table(entree, proba, y)) == recommandations(entree, proba, y)
+
+
+@pytest.mark.unit
+def test_table_equivalente_vectorisee():
+    """Le calcul des masques par lot retrouve la référence ligne à ligne"""
+    cas = list(_grille())
+    masques = masques_np(
+        np.array([y for _, _, y in cas]),
+        np.array([p for _, p, _ in cas]),
+        np.array([e.incidents for e, _, _ in cas]),
+        np.array([e.meteo for e, _, _ in cas], dtype=float),
+        np.array([e.heure for e, _, _ in cas], dtype=float),
+        np.array([np.nan if e.distance_km is None else e.distance_km for e, _, _ in cas]),
+    )
+    for (entree, proba, y), recos in zip(cas, recommandations_lot(masques)):
+        assert list(recos) == recommandations(entree, proba, y)
+
+
+@pytest.mark.unit
+def test_table_complete_et_immuable():
+    """64 entrées précalculées, sous forme de tuples partageables entre requêtes"""
+    assert len(TABLE_RECOMMANDATIONS) == 64
+    assert all(isinstance(entree, tuple) for entree in TABLE_RECOMMANDATIONS)
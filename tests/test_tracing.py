@@ -0,0 +1,100 @@
+"""
+Tests pour le traçage par spans et son export par lots
+"""
+# pylint: disable=import-error
+import json
+
+import pytest
+
+from app.core import tracing
+from app.core.config import settings
+from app.core.tracing import (
+    CollecteurMemoire,
+    ExportateurSpans,
+    SortieJsonl,
+    Span,
+    Traceur,
+    vers_otlp,
+)
+
+PAYLOAD = {
+    "heure": 8,
+    "jour_semaine": 1,
+    "meteo": 0,
+    "incidents": 0,
+    "vitesse_moyenne": 60.0,
+    "debit_vehicules": 50.0,
+    "distance_km": 12.0,
+}
+
+
+def _span(nom="s", parent="b" * 16):
+    return Span("a" * 32, "c" * 16, parent, nom, 1_000, 2_000_000, {"k": 1})
+
+
+@pytest.mark.unit
+def test_echantillonnage_en_tete():
+    """Taux 0 : rien n'est tracé, sauf si un traceparent entrant est échantillonné"""
+    traceur = Traceur(True, 0.0, ExportateurSpans(CollecteurMemoire()))
+    assert traceur.commencer("req-1", None, 0.0) is None
+
+    entrant = "00-" + "1" * 32 + "-" + "2" * 16 + "-01"
+    trace = traceur.commencer("req-1", entrant, 0.0)
+    assert trace.trace_id == "1" * 32 and trace.parent_distant == "2" * 16
+    assert traceur.commencer("req-1", entrant[:-1] + "0", 0.0) is None
+
+    tous = Traceur(True, 1.0, ExportateurSpans(CollecteurMemoire()))
+    assert tous.commencer("req-1", "invalide", 0.0) is not None
+    assert Traceur(False, 1.0, None).commencer("req-1", None, 0.0) is None
+
+
+@pytest.mark.unit
+def test_exportateur_par_lots():
+    """Les spans sont regroupés par lots de taille bornée et vidés à l'arrêt"""
+    collecteur = CollecteurMemoire()
+    exportateur = ExportateurSpans(collecteur, taille_lot=3, intervalle_s=5.0)
+    for _ in range(4):
+        exportateur.soumettre([_span(), _span()])
+    exportateur.vider()
+    assert len(collecteur.spans) == 8
+    assert all(len(lot) <= 4 for lot in collecteur.lots)  # une trace n'est jamais coupée
+    assert exportateur.stats()["exportes"] == 8
+
+
+@pytest.mark.unit
+def test_sorties_jsonl_et_otlp(tmp_path):
+    """JSONL : une ligne par span ; OTLP : structure resourceSpans/scopeSpans"""
+    chemin = tmp_path / "spans.jsonl"
+    SortieJsonl(str(chemin)).ecrire([_span("a"), _span("b")])
+    lignes = [json.loads(l) for l in chemin.read_text(encoding="utf-8").splitlines()]
+    assert [l["nom"] for l in lignes] == ["a", "b"]
+    assert lignes[0]["duree_ms"] == pytest.approx(1.999)
+
+    corps = vers_otlp([_span("racine", parent=None)], "svc")
+    span = corps["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert span["name"] == "racine" and "parentSpanId" not in span
+    assert span["endTimeUnixNano"] == "2000000"
+
+
+@pytest.mark.integration
+def test_trace_predire(client, monkeypatch):
+    """Une requête échantillonnée produit la racine et les spans d'étapes, corrélés à l'ID"""
+    collecteur = CollecteurMemoire()
+    traceur = Traceur(True, 1.0, ExportateurSpans(collecteur))
+    monkeypatch.setattr(tracing, "traceur", traceur)
+    monkeypatch.setattr(settings, "CACHE_ENABLED", False)  # un succès du cache n'infère pas
+
+    response = client.post("/api/v1/predire", json=PAYLOAD, headers={"X-Request-ID": "trace-1"})
+    assert response.status_code == 200
+    client.get("/api/v1/predictions?limit=5")
+    traceur.exportateur.vider()
+
+    trace_id = response.headers["traceparent"].split("-")[1]
+    spans = [s for s in collecteur.spans if s.trace_id == trace_id]
+    racine = next(s for s in spans if s.parent_id is None)
+    assert racine.nom == "POST /api/v1/predire"
+    assert racine.attributs["request_id"] == "trace-1"
+    noms = {s.nom for s in spans}
+    assert {"rate_limit", "distance", "inference", "persistance", "db.commit"} <= noms
+    assert all(racine.debut_ns <= s.debut_ns <= s.fin_ns <= racine.fin_ns for s in spans)
+    assert "db.requete" in {s.nom for s in collecteur.spans}
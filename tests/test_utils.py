@@ -104,3 +104,54 @@ def test_recommandations_heure_pointe():
 
     recs = recommandations(entree, proba=0.3, y=0)
     assert any("pointe" in rec.lower() for rec in recs)
+
+
+@pytest.mark.unit
+def test_haversine_vectorisee_equivalente():
+    """La haversine vectorisée donne les mêmes distances que la version scalaire"""
+    import numpy as np
+
+    from app.api.v1.endpoints import haversine_km
+    from app.services.geodesie import haversine_km_np
+
+    points = [
+        (45.5017, -73.5673, 45.5088, -73.5540),
+        (45.5017, -73.5673, 48.8566, 2.3522),
+        (45.5017, -73.5673, 45.5017, -73.5673),
+    ]
+    attendu = [haversine_km(*p) for p in points]
+    obtenu = haversine_km_np(*np.array(points).T)
+    assert obtenu == pytest.approx(attendu)
+
+
+@pytest.mark.unit
+def test_matrice_distances_par_blocs():
+    """Matrice N × M identique à la haversine scalaire, quel que soit le découpage en blocs"""
+    import numpy as np
+
+    from app.services.geodesie import haversine_km, matrice_distances_km
+
+    rng = np.random.default_rng(0)
+    origines = np.column_stack([rng.uniform(-80, 80, 7), rng.uniform(-180, 180, 7)])
+    destinations = np.column_stack([rng.uniform(-80, 80, 5), rng.uniform(-180, 180, 5)])
+    attendu = np.array([[haversine_km(*o, *d) for d in destinations] for o in origines])
+
+    complete = matrice_distances_km(origines, destinations)
+    par_blocs = matrice_distances_km(origines, destinations, bloc_elements=6)  # 1 ligne/bloc
+    assert complete.shape == (7, 5)
+    assert np.allclose(complete, attendu, rtol=1e-12)
+    assert np.array_equal(par_blocs, complete)
+
+    simple = matrice_distances_km(origines, destinations, dtype=np.float32)
+    assert simple.dtype == np.float32
+    assert np.allclose(simple, attendu, rtol=1e-5, atol=0)
+
+    # Échelle urbaine (< 2 km) : la simple précision ne doit pas dégrader les petits écarts
+    centre = np.array([45.5017, -73.5673])
+    proches_o = centre + rng.uniform(-0.008, 0.008, (6, 2))
+    proches_d = centre + rng.uniform(-0.008, 0.008, (4, 2))
+    attendu = np.array([[haversine_km(*o, *d) for d in proches_d] for o in proches_o])
+    assert attendu.max() < 2.0
+    for dtype in (np.float64, np.float32):
+        proches = matrice_distances_km(proches_o, proches_d, dtype=dtype, bloc_elements=4)
+        assert np.allclose(proches, attendu, rtol=1e-5, atol=0)